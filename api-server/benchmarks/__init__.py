@@ -0,0 +1,14 @@
+"""
+Benchmarks of the API hot paths and of the market data ingestion. The API ones
+send requests through the Django test client, i.e. every middleware, against
+generated data in the test database and an in-process fake Redis. The ingestion
+ones answer the third-party APIs with recorded responses, see
+`benchmarks/replay.py`. They are not part of the test suite:
+
+    pytest benchmarks --benchmark-save=baseline
+    # After a change
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:15%
+
+Results are kept under `.benchmarks/`, per machine, and are not committed. See
+`benchmarks/conftest.py` for the options that size the data.
+"""
@@ -0,0 +1,116 @@
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from functools import partial
+from weakref import WeakKeyDictionary
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import redis.asyncio
+from django.conf import settings
+from django.test import Client, override_settings
+from jose import jwt
+from jose.constants import ALGORITHMS
+from pytest_django import DjangoDbBlocker
+
+from benchmarks.generators import Dataset, generate_dataset
+from main.account import AUTH_COOKIE_NAME
+from main.account.models import User
+from main.core import cache as core_cache
+from main.market.views import MAX_BATCH_SIDS
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("benchmark data")
+    group.addoption("--bench-companies", type=int, default=2_000)
+    group.addoption("--bench-users", type=int, default=10)
+    group.addoption("--bench-trades", type=int, default=1_000, help="Per user.")
+    group.addoption(
+        "--bench-days",
+        type=int,
+        default=250,
+        help=f"Of price history, for the first {MAX_BATCH_SIDS} companies.",
+    )
+    group.addoption(
+        "--bench-facts",
+        type=int,
+        default=100,
+        help=f"Material facts per company, for the first {MAX_BATCH_SIDS} companies.",
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fake_redis() -> Iterator[None]:
+    """
+    Point every Redis client, sync, async and the cache's, at one in-process fake
+    server, so that the benchmarks neither need nor touch a real Redis.
+    """
+    with (
+        pytest.MonkeyPatch.context() as monkeypatch,
+        override_settings(
+            CACHES={
+                "default": {
+                    **settings.CACHES["default"],
+                    "OPTIONS": {"connection_class": fakeredis.FakeConnection},
+                }
+            },
+            # Every request comes from the same user
+            RATE_LIMIT_ENABLED=False,
+        ),
+    ):
+        monkeypatch.setattr(
+            core_cache.redis_connection_pool,
+            "connection_class",
+            fakeredis.FakeConnection,
+        )
+        core_cache.redis_connection_pool.disconnect()
+        monkeypatch.setattr(
+            core_cache, "_async_redis_connection_pools", WeakKeyDictionary()
+        )
+        monkeypatch.setattr(
+            redis.asyncio,
+            "ConnectionPool",
+            partial(
+                redis.asyncio.ConnectionPool,
+                connection_class=fakeredis.aioredis.FakeConnection,
+            ),
+        )
+        yield
+
+
+@pytest.fixture(scope="session")
+def dataset(
+    request: pytest.FixtureRequest,
+    django_db_setup: None,
+    django_db_blocker: DjangoDbBlocker,
+) -> Dataset:
+    """Generated once per run, in the test database."""
+    with django_db_blocker.unblock():
+        return generate_dataset(
+            companies=request.config.getoption("--bench-companies"),
+            users=request.config.getoption("--bench-users"),
+            trades_per_user=request.config.getoption("--bench-trades"),
+            history_days=request.config.getoption("--bench-days"),
+            history_companies=MAX_BATCH_SIDS,
+            facts_per_company=request.config.getoption("--bench-facts"),
+        )
+
+
+@pytest.fixture
+def user(dataset: Dataset) -> User:
+    return dataset.users[0]
+
+
+@pytest.fixture
+def client(db: None, user: User) -> Client:
+    """A test client logged in as `user`, going through every middleware."""
+    client = Client()
+    client.cookies[AUTH_COOKIE_NAME] = jwt.encode(
+        {
+            "id": str(user.id),
+            "exp": int((datetime.now() + timedelta(hours=1)).timestamp()),
+        },
+        key=settings.SECRET_KEY,
+        algorithm=ALGORITHMS.HS256,
+    )
+    return client
@@ -0,0 +1,212 @@
+"""
+Synthetic data for the benchmarks. Everything is derived from `seed`, so that
+runs compared with each other read the same rows.
+"""
+
+import random
+from datetime import UTC, date, datetime, time, timedelta
+from typing import NamedTuple
+
+from main.account import OAuthOrganization
+from main.account.models import User
+from main.core.models import DataChangeLog
+from main.market import Frequency, TradeType
+from main.market.models import (
+    Company,
+    History,
+    MarketIndexPerMinute,
+    MaterialFact,
+    StockInfo,
+)
+from main.market.tokenizer import search_document
+from main.trade_record.models import TradeRecord
+
+BATCH_SIZE = 5_000
+# Characters company names are made of, so that searches match some of them
+NAME_CHARACTERS = (
+    "台積電聯發科鴻海國泰富邦中華信統一大立光華碩宏達長榮陽明航運金控玉山元大兆豐"
+)
+# Trading minutes from 09:00 to 13:30
+MINUTES_PER_DAY = 270
+TODAY = date(2026, 10, 19)
+# Material facts are filed in a fixed numbered format, which is what makes them
+# compress well
+MATERIAL_FACT_TITLES = (
+    "公告本公司董事會決議通過{}年度財務報告",
+    "代子公司{}公告取得使用權資產",
+    "公告本公司{}年度股東常會重要決議事項",
+    "澄清媒體報導{}營收相關訊息",
+)
+MATERIAL_FACT_DESCRIPTION = (
+    "1.事實發生日:{date}\n2.公司名稱:{name}\n3.與公司關係(請輸入本公司或子公司):"
+    "本公司\n4.相互持股比例:不適用\n5.發生緣由:{reason}\n6.因應措施:無\n"
+    "7.其他應敘明事項(若事件發生或決議之主體係屬公開發行以上公司，本則重大訊息"
+    "同時觸發本中心重大訊息及其他公司重大訊息者，應一併敘明):無"
+)
+
+
+class Dataset(NamedTuple):
+    sids: list[str]
+    users: list[User]
+    trades_per_user: int
+
+
+def generate_companies(n: int, rng: random.Random) -> list[Company]:
+    """`n` companies, half of each market, every one with its latest stock info."""
+    companies = Company.objects.bulk_create(
+        (
+            Company(
+                stock_id=str(1000 + i),
+                name="".join(rng.choices(NAME_CHARACTERS, k=rng.randint(2, 4))),
+                trade_type=TradeType.ALL[i % 2],
+                business="",
+            )
+            for i in range(n)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    StockInfo.objects.bulk_create(
+        (
+            StockInfo(
+                company=company,
+                date=TODAY,
+                quantity=rng.randint(1, 10**7),
+                close_price=(price := round(rng.uniform(10, 1000), 2)),
+                fluct_price=round(price * rng.uniform(-0.1, 0.1), 2),
+            )
+            for company in companies
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    return companies
+
+
+def generate_history(companies: list[Company], days: int, rng: random.Random) -> None:
+    """Daily close prices of the last `days` days, weekends included."""
+    History.objects.bulk_create(
+        (
+            History(
+                company=company,
+                frequency=Frequency.DAILY,
+                date=TODAY - timedelta(days=day),
+                quantity=rng.randint(1, 10**7),
+                close_price=round(rng.uniform(10, 1000), 2),
+            )
+            for company in companies
+            for day in range(days)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def generate_market_index(rng: random.Random) -> None:
+    """A full trading day of both markets' index."""
+    MarketIndexPerMinute.objects.bulk_create(
+        MarketIndexPerMinute(
+            market=market,
+            date=TODAY,
+            number=number,
+            price=round(rng.uniform(15_000, 25_000), 2),
+            fluct_price=round(rng.uniform(-300, 300), 2),
+        )
+        for market in TradeType.ALL
+        for number in range(MINUTES_PER_DAY)
+    )
+
+
+def generate_material_facts(
+    companies: list[Company], k: int, rng: random.Random
+) -> None:
+    """`k` material facts per company, one every few days before `TODAY`."""
+    facts = []
+    for company in companies:
+        for i in range(k):
+            day = TODAY - timedelta(days=i * 3)
+            title = rng.choice(MATERIAL_FACT_TITLES).format(company.name)
+            description = MATERIAL_FACT_DESCRIPTION.format(
+                date=f"{day.year - 1911}/{day.month:02}/{day.day:02}",
+                name=company.name,
+                reason="".join(rng.choices(NAME_CHARACTERS, k=rng.randint(20, 200))),
+            )
+            facts.append(
+                MaterialFact(
+                    company=company,
+                    date_time=datetime.combine(day, time(8, rng.randrange(60)), UTC),
+                    title=title,
+                    description=description,
+                    search_tokens=search_document(title, description),
+                )
+            )
+    MaterialFact.objects.bulk_create(facts, batch_size=BATCH_SIZE)
+
+
+def generate_users(m: int) -> list[User]:
+    return [
+        User.objects.create_user(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id=f"benchmark{i}",
+            email=f"benchmark{i}@example.com",
+            username=f"Benchmark {i}",
+        )
+        for i in range(m)
+    ]
+
+
+def generate_trade_records(
+    users: list[User], companies: list[Company], k: int, rng: random.Random
+) -> None:
+    """
+    `k` trade records per user over the last year, each with the change log entry
+    that creating it through the API would have added.
+    """
+    for user in users:
+        records = TradeRecord.objects.bulk_create(
+            (
+                TradeRecord(
+                    owner=user,
+                    company=rng.choice(companies),
+                    deal_time=TODAY - timedelta(days=rng.randrange(365)),
+                    deal_price=round(rng.uniform(10, 1000), 2),
+                    deal_quantity=rng.choice([-1, 1]) * rng.randint(1, 10) * 1000,
+                    handling_fee=rng.randint(1, 1000),
+                )
+                for _ in range(k)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        DataChangeLog.objects.bulk_create(
+            (
+                DataChangeLog(
+                    user=user,
+                    subject=DataChangeLog.Subject.TRADE_RECORD,
+                    subject_id=str(record.pk),
+                    revision=revision,
+                    operation=DataChangeLog.Operation.UPSERT,
+                )
+                for revision, record in enumerate(records, start=1)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+
+def generate_dataset(
+    companies: int,
+    users: int,
+    trades_per_user: int,
+    history_days: int,
+    history_companies: int,
+    facts_per_company: int,
+    seed: int = 0,
+) -> Dataset:
+    rng = random.Random(seed)  # noqa: S311
+    company_objects = generate_companies(companies, rng)
+    generate_history(company_objects[:history_companies], history_days, rng)
+    generate_market_index(rng)
+    generate_material_facts(company_objects[:history_companies], facts_per_company, rng)
+    user_objects = generate_users(users)
+    generate_trade_records(user_objects, company_objects, trades_per_user, rng)
+    return Dataset(
+        sids=[company.pk for company in company_objects],
+        users=user_objects,
+        trades_per_user=trades_per_user,
+    )
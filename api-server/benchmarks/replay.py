@@ -0,0 +1,242 @@
+"""
+Stand-ins for the third-party APIs that `main.market.services` reads, so that
+ingestion can be measured and tuned without reaching twse.com.tw or tpex.org.tw:
+
+    with replay(ReplayAdapter(latency=0.05, error_rate=0.1)) as adapter:
+        fetch_and_store_realtime_stock_info()
+    print(adapter.stats)
+
+Every request sent with `requests` inside the block is answered by the adapter from
+the responses recorded in `recordings/` (the company info pages are the extractors'
+test fixtures). Requests that match no recording fail with a `ConnectionError`, so
+nothing leaks to the network. Run `python -m benchmarks.replay` to record the
+responses again.
+"""
+
+import json
+import random
+from collections import Counter, defaultdict, deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import date
+from http import HTTPStatus
+from pathlib import Path
+from threading import Lock
+from time import monotonic, sleep
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests import PreparedRequest, ReadTimeout, Response
+from requests.adapters import BaseAdapter
+
+from main.market import ThirdPartyApi, TradeType
+
+RECORDINGS_DIR = Path(__file__).resolve().parent / "recordings"
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "main/market/tests/fixtures"
+# Recording file names and the URLs they were recorded from
+RECORDINGS = {
+    "STOCK_DAY_ALL.json": ThirdPartyApi.single_day[TradeType.TSE],
+    "tpex_mainboard_quotes.json": ThirdPartyApi.single_day[TradeType.OTC],
+    "t187ap04_L.json": ThirdPartyApi.material_fact[TradeType.TSE],
+    "mopsfin_t187ap04_O.json": ThirdPartyApi.material_fact[TradeType.OTC],
+}
+REALTIME_RECORDING = (
+    "getStockInfo.json",
+    f"{ThirdPartyApi.realtime['stock']}"
+    "tse_t00.tw|otc_o00.tw|tse_2330.tw|tse_2891.tw|otc_1587.tw|otc_6488.tw",
+)
+MARKET_INDICES = ("t00", "o00")
+ERROR_KINDS = ("timeout", "server_error", "malformed")
+
+# Returns the status code, body and content type of the response to a request
+Responder = Callable[[PreparedRequest], tuple[int, bytes, str]]
+
+
+def file_responder(path: Path, content_type: str) -> Responder:
+    body = path.read_bytes()
+    return lambda request: (200, body, content_type)
+
+
+def realtime_responder(recording: dict) -> Responder:
+    """
+    Answer any list of channels (`ex_ch`) with the recorded rows, each stock's row
+    copied from one of the recorded stocks and dated today, so that every symbol
+    of the database can be replayed from a handful of recorded ones.
+    """
+    indices = {
+        row["c"]: row for row in recording["msgArray"] if row["c"] in MARKET_INDICES
+    }
+    stocks = [row for row in recording["msgArray"] if row["c"] not in indices]
+
+    def respond(request: PreparedRequest) -> tuple[int, bytes, str]:
+        channels = parse_qs(urlsplit(request.url).query)["ex_ch"][0].split("|")
+        today = date.today().strftime("%Y%m%d")
+        rows = []
+        for i, channel in enumerate(channels):
+            exchange, _, code = channel.removesuffix(".tw").partition("_")
+            rows.append(
+                {
+                    **(indices.get(code) or stocks[i % len(stocks)]),
+                    "c": code,
+                    "ch": f"{code}.tw",
+                    "ex": exchange,
+                    "d": today,
+                }
+            )
+        body = json.dumps({**recording, "msgArray": rows}, ensure_ascii=False)
+        return 200, body.encode(), "application/json"
+
+    return respond
+
+
+def default_routes(recordings_dir: Path = RECORDINGS_DIR) -> dict[str, Responder]:
+    """URL prefixes and the responders of the recorded APIs."""
+    routes = {
+        url: file_responder(recordings_dir / name, "application/json")
+        for name, url in RECORDINGS.items()
+    }
+    realtime_recording = recordings_dir / REALTIME_RECORDING[0]
+    routes[ThirdPartyApi.realtime["stock"]] = realtime_responder(
+        json.loads(realtime_recording.read_text(encoding="utf-8"))
+    )
+    routes[ThirdPartyApi.company_info] = file_responder(
+        FIXTURES_DIR / "isin_single_main_2330.html", "text/html; charset=utf-8"
+    )
+    routes[ThirdPartyApi.company_business] = file_responder(
+        FIXTURES_DIR / "mops_t05st03_2330.html", "text/html; charset=utf-8"
+    )
+    return routes
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answer requests with `routes` after `latency` seconds (plus up to `jitter`).
+    A share of `error_rate` of the requests fails with one of `error_kinds`, and
+    requests to a host over `rate_limit` (requests, per seconds) get a 429
+    response. What happened is counted in `stats`.
+    """
+
+    def __init__(
+        self,
+        routes: dict[str, Responder] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_kinds: tuple[str, ...] = ERROR_KINDS,
+        rate_limit: tuple[int, float] | None = None,
+        seed: int = 0,
+    ) -> None:
+        super().__init__()
+        self.routes = default_routes() if routes is None else routes
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_kinds = error_kinds
+        self.rate_limit = rate_limit
+        self.stats: Counter[str] = Counter()
+        self._rng = random.Random(seed)  # noqa: S311
+        self._sent_at: defaultdict[str, deque[float]] = defaultdict(deque)
+        self._lock = Lock()
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: float | tuple[float, float] | None = None,
+        verify: bool | str = True,
+        cert: str | tuple[str, str] | None = None,
+        proxies: dict[str, str] | None = None,
+    ) -> Response:
+        responder = next(
+            (r for prefix, r in self.routes.items() if request.url.startswith(prefix)),
+            None,
+        )
+        if responder is None:
+            raise requests.ConnectionError(
+                f"No recording for {request.url}", request=request
+            )
+
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            error = (
+                self._rng.choice(self.error_kinds)
+                if self._rng.random() < self.error_rate
+                else None
+            )
+            rate_limited = self._is_rate_limited(urlsplit(request.url).netloc)
+
+        self._count("requests")
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if error == "timeout" or (read_timeout is not None and delay > read_timeout):
+            self._count("timeout")
+            sleep(read_timeout or delay)
+            raise ReadTimeout(f"Replayed timeout of {request.url}", request=request)
+        sleep(delay)
+
+        if rate_limited:
+            self._count("rate_limited")
+            status, body, content_type = 429, b"", "text/html"
+        elif error == "server_error":
+            self._count("server_error")
+            status, body, content_type = 503, b"<html></html>", "text/html"
+        else:
+            status, body, content_type = responder(request)
+            if error == "malformed":
+                self._count("malformed")
+                body = body[: len(body) // 2]
+        self._count("bytes", len(body))
+        return self._build_response(request, status, body, content_type)
+
+    def close(self) -> None:
+        pass
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _is_rate_limited(self, host: str) -> bool:
+        if self.rate_limit is None:
+            return False
+        limit, period = self.rate_limit
+        now = monotonic()
+        sent_at = self._sent_at[host]
+        while sent_at and sent_at[0] <= now - period:
+            sent_at.popleft()
+        if len(sent_at) >= limit:
+            return True
+        sent_at.append(now)
+        return False
+
+    @staticmethod
+    def _build_response(
+        request: PreparedRequest, status: int, body: bytes, content_type: str
+    ) -> Response:
+        response = Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.headers["Content-Type"] = content_type
+        response.encoding = "utf-8"
+        response._content = body
+        response.url = request.url
+        response.request = request
+        return response
+
+
+@contextmanager
+def replay(adapter: ReplayAdapter) -> Iterator[ReplayAdapter]:
+    """Send every request of `requests` to `adapter`, whatever its URL."""
+    with patch.object(requests.Session, "get_adapter", lambda session, url: adapter):
+        yield adapter
+
+
+def record(recordings_dir: Path = RECORDINGS_DIR) -> None:
+    for name, url in [*RECORDINGS.items(), REALTIME_RECORDING]:
+        payload = requests.get(url, timeout=10, verify=False).json()  # noqa: S501
+        (recordings_dir / name).write_text(
+            json.dumps(payload, ensure_ascii=False, indent=1) + "\n", encoding="utf-8"
+        )
+
+
+if __name__ == "__main__":
+    record()
@@ -0,0 +1,70 @@
+import gzip
+from urllib.parse import quote
+
+import pytest
+from django.test import Client
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.generators import MATERIAL_FACT_TITLES, Dataset
+from main.market.views import MAX_BATCH_SIDS
+
+pytestmark = pytest.mark.benchmark(group="compression")
+
+# Levels of `gzip_comp_level` in `reverse-proxy/nginx.conf` worth comparing
+LEVELS = [1, 5, 9]
+
+
+def _paths(dataset: Dataset) -> dict[str, str]:
+    sid = dataset.sids[0]
+    return {
+        "trade_record_snapshot": "/api/trade-records/",
+        "material_facts": (
+            f"/api/stock-memo/company-info/{sid}/material-facts?limit=100"
+        ),
+        "material_fact_search": (
+            "/api/market/material-facts/search?keyword="
+            + quote(MATERIAL_FACT_TITLES[0][:4])
+        ),
+        "batch_historical_prices": (
+            f"/api/market/historical-prices?sids={','.join(dataset.sids[:MAX_BATCH_SIDS])}"
+        ),
+        "market_index": "/api/market/market-index",
+        "current_stock_info": (
+            f"/api/market/current-stock-info?sids={','.join(dataset.sids[:100])}"
+        ),
+    }
+
+
+@pytest.mark.parametrize("level", LEVELS)
+@pytest.mark.parametrize(
+    "endpoint",
+    [
+        "trade_record_snapshot",
+        "material_facts",
+        "material_fact_search",
+        "batch_historical_prices",
+        "market_index",
+        "current_stock_info",
+    ],
+)
+def test_gzip(
+    benchmark: BenchmarkFixture,
+    client: Client,
+    dataset: Dataset,
+    endpoint: str,
+    level: int,
+) -> None:
+    """
+    CPU time of compressing each endpoint's body, with the bytes on the wire
+    before and after in `extra_info`.
+    """
+    response = client.get(_paths(dataset)[endpoint])
+    assert response.status_code == 200, response.content
+    assert not response.has_header("Content-Encoding")
+    body = response.content
+
+    compressed = benchmark(gzip.compress, body, level)
+
+    benchmark.extra_info["bytes"] = len(body)
+    benchmark.extra_info["gzipped_bytes"] = len(compressed)
+    benchmark.extra_info["ratio"] = round(len(compressed) / len(body), 3)
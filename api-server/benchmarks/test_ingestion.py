@@ -0,0 +1,47 @@
+import math
+from datetime import date
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.generators import Dataset
+from benchmarks.replay import ReplayAdapter, replay
+from main.market import services
+from main.market.models import StockInfo
+
+pytestmark = pytest.mark.benchmark(group="ingestion")
+
+ROUNDS = 5
+
+
+@pytest.mark.parametrize(("latency", "error_rate"), [(0, 0), (0.05, 0), (0.05, 0.1)])
+def test_realtime_tick(
+    benchmark: BenchmarkFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    db: None,
+    dataset: Dataset,
+    latency: float,
+    error_rate: float,
+) -> None:
+    """
+    One full tick of `fetch_and_store_realtime_stock_info` over every company of
+    the dataset (2,000 with the default options). The pacing between requests
+    is turned off, so that what is measured is the fetching and the writing.
+    """
+    monkeypatch.setattr(services, "REALTIME_REQUEST_INTERVAL", 0)
+    adapter = ReplayAdapter(latency=latency, error_rate=error_rate)
+
+    with replay(adapter):
+        benchmark.pedantic(
+            services.fetch_and_store_realtime_stock_info,
+            rounds=ROUNDS,
+            warmup_rounds=1,
+        )
+
+    # The market indices are fetched along with the companies
+    requests_per_tick = math.ceil(
+        (len(dataset.sids) + 2) / services.REALTIME_BATCH_SIZE
+    )
+    assert adapter.stats["requests"] == (ROUNDS + 1) * requests_per_tick
+    if not error_rate:
+        assert StockInfo.objects.filter(date=date.today()).count() == len(dataset.sids)
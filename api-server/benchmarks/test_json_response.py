@@ -0,0 +1,83 @@
+import random
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from django.http import JsonResponse as DjangoJsonResponse
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.generators import NAME_CHARACTERS, TODAY
+from main.core.http import JsonResponse
+
+pytestmark = pytest.mark.benchmark(group="json_response")
+
+RESPONSE_CLASSES = {"django": DjangoJsonResponse, "orjson": JsonResponse}
+
+
+def _trade_record_snapshot(rng: random.Random) -> dict:
+    """Shaped like the full snapshot of `/api/trade-records/`."""
+    return {
+        "last_revision": 10_000,
+        "updates": [
+            {
+                "id": i,
+                "deal_time": TODAY - timedelta(days=rng.randrange(365)),
+                "sid": str(rng.randrange(1000, 10000)),
+                "company_name": "".join(rng.choices(NAME_CHARACTERS, k=3)),
+                "deal_price": round(rng.uniform(10, 1000), 2),
+                "deal_quantity": rng.randint(1, 10) * 1000,
+                "handling_fee": rng.randint(1, 1000),
+            }
+            for i in range(10_000)
+        ],
+        "deletes": [],
+        "is_full_snapshot": True,
+    }
+
+
+def _material_facts(rng: random.Random) -> dict:
+    """Shaped like a page of `/api/market/material-facts/search`, long texts."""
+    return {
+        "data": [
+            {
+                "sid": str(rng.randrange(1000, 10000)),
+                "company_name": "".join(rng.choices(NAME_CHARACTERS, k=3)),
+                "date_time": datetime(2026, 10, 19, tzinfo=UTC)
+                - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+                "title": "".join(rng.choices(NAME_CHARACTERS, k=40)),
+                "snippet": "".join(rng.choices(NAME_CHARACTERS, k=2_000)),
+            }
+            for _ in range(20)
+        ],
+        "next_page": 2,
+    }
+
+
+def _batch_historical_prices(rng: random.Random) -> dict:
+    """Shaped like `/api/market/historical-prices?sids=...` of 50 stocks."""
+    return {
+        "data": {
+            str(1000 + i): {
+                "days": list(range(20_000, 20_250)),
+                "prices": [round(rng.uniform(10, 1000), 2) for _ in range(250)],
+            }
+            for i in range(50)
+        }
+    }
+
+
+PAYLOADS = {
+    "trade_record_snapshot": _trade_record_snapshot,
+    "material_facts": _material_facts,
+    "batch_historical_prices": _batch_historical_prices,
+}
+
+
+@pytest.mark.parametrize("response_class", RESPONSE_CLASSES)
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_serialize(
+    benchmark: BenchmarkFixture, payload: str, response_class: str
+) -> None:
+    data = PAYLOADS[payload](random.Random(0))  # noqa: S311
+    benchmark.extra_info["bytes"] = len(RESPONSE_CLASSES[response_class](data).content)
+
+    benchmark(RESPONSE_CLASSES[response_class], data)
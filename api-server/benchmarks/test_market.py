@@ -0,0 +1,92 @@
+from urllib.parse import quote
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from pytest_benchmark.fixture import BenchmarkFixture
+from pytest_django.fixtures import SettingsWrapper
+
+from benchmarks.generators import NAME_CHARACTERS, Dataset
+from main.market.views import MAX_BATCH_SIDS
+
+pytestmark = pytest.mark.benchmark(group="market")
+
+
+def _get(client: Client, path: str) -> None:
+    response = client.get(path)
+    assert response.status_code == 200, response.content
+
+
+def test_market_index(benchmark: BenchmarkFixture, client: Client) -> None:
+    _get(client, "/api/market/market-index")  # Fills the cache
+
+    benchmark(_get, client, "/api/market/market-index")
+
+
+def test_market_index_gzip(benchmark: BenchmarkFixture, client: Client) -> None:
+    """Sends the precompressed cached body."""
+    path = "/api/market/market-index"
+    client.get(path, HTTP_ACCEPT_ENCODING="gzip")  # Fills the cache
+
+    response = benchmark(client.get, path, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+
+
+def test_market_index_cache_miss(benchmark: BenchmarkFixture, client: Client) -> None:
+    benchmark.pedantic(
+        _get,
+        args=(client, "/api/market/market-index"),
+        setup=cache.clear,
+        rounds=50,
+        warmup_rounds=1,
+    )
+
+
+@pytest.mark.parametrize("sid_count", [1, 20, 100])
+def test_current_stock_info(
+    benchmark: BenchmarkFixture, client: Client, dataset: Dataset, sid_count: int
+) -> None:
+    sids = ",".join(dataset.sids[:sid_count])
+
+    benchmark(_get, client, f"/api/market/current-stock-info?sids={sids}")
+
+
+@pytest.mark.parametrize("backend", ["tokens", "trie", "postgres"])
+@pytest.mark.parametrize("keyword", [NAME_CHARACTERS[0], NAME_CHARACTERS[:2], "10"])
+def test_search(
+    benchmark: BenchmarkFixture,
+    client: Client,
+    settings: SettingsWrapper,
+    backend: str,
+    keyword: str,
+) -> None:
+    settings.MARKET_SEARCH_BACKEND = backend
+    path = f"/api/market/search?keyword={quote(keyword)}"
+    _get(client, path)  # Builds the in-memory indexes
+
+    benchmark(_get, client, path)
+
+
+def test_historical_prices(
+    benchmark: BenchmarkFixture, client: Client, dataset: Dataset
+) -> None:
+    benchmark(
+        _get,
+        client,
+        f"/api/market/historical-prices/{dataset.sids[0]}?format=columnar",
+    )
+
+
+@pytest.mark.parametrize("max_points", [None, 100])
+def test_batch_historical_prices(
+    benchmark: BenchmarkFixture,
+    client: Client,
+    dataset: Dataset,
+    max_points: int | None,
+) -> None:
+    sids = ",".join(dataset.sids[:MAX_BATCH_SIDS])
+    path = f"/api/market/historical-prices?sids={sids}" + (
+        f"&max_points={max_points}" if max_points else ""
+    )
+
+    benchmark(_get, client, path)
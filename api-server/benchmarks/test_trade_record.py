@@ -0,0 +1,25 @@
+import pytest
+from django.test import Client
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.generators import Dataset
+
+pytestmark = pytest.mark.benchmark(group="trade_record")
+
+
+def _get(client: Client, path: str) -> None:
+    response = client.get(path)
+    assert response.status_code == 200, response.content
+
+
+def test_full_snapshot(benchmark: BenchmarkFixture, client: Client) -> None:
+    benchmark(_get, client, "/api/trade-records/")
+
+
+@pytest.mark.parametrize("changes", [0, 10, 100])
+def test_delta_sync(
+    benchmark: BenchmarkFixture, client: Client, dataset: Dataset, changes: int
+) -> None:
+    since_revision = dataset.trades_per_user - changes
+
+    benchmark(_get, client, f"/api/trade-records/?since_revision={since_revision}")
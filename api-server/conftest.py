@@ -0,0 +1 @@
+pytest_plugins = ["main.core.pytest_plugin"]
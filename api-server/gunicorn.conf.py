@@ -1,4 +1,7 @@
-wsgi_app = "main.wsgi"
+wsgi_app = "main.asgi:application"
+# Async views share an event loop. Sync views still run one at a time per worker,
+# in the thread Django runs them in.
+worker_class = "uvicorn_worker.UvicornWorker"
 workers = 3
 bind = "0.0.0.0:8000"
 reload = True
@@ -14,12 +14,23 @@ class MyBackend(BaseBackend):
     def authenticate(self, request: HttpRequest, token: str) -> User | None:
         user: User | None = None
         with suppress(Exception):
-            claims = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=[ALGORITHMS.HS256]
-            )
-            if claims["exp"] > datetime.now().timestamp():
+            if (user_id := self._verify(token)) is not None:
                 # TODO: read from cache
-                db_user: User = User.objects.get(pk=claims["id"], is_active=True)
+                db_user: User = User.objects.get(pk=user_id, is_active=True)
                 user = db_user
         request.user = user  # type: ignore
         return user
+
+    async def aauthenticate(self, request: HttpRequest, token: str) -> User | None:
+        user: User | None = None
+        with suppress(Exception):
+            if (user_id := self._verify(token)) is not None:
+                user = await User.objects.aget(pk=user_id, is_active=True)
+        request.user = user  # type: ignore
+        return user
+
+    @staticmethod
+    def _verify(token: str) -> str | None:
+        """The ID of the user the token was issued to, unless it has expired."""
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHMS.HS256])
+        return claims["id"] if claims["exp"] > datetime.now().timestamp() else None
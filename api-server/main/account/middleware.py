@@ -1,34 +1,51 @@
 from collections.abc import Callable
 
-from django.contrib.auth import authenticate
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import aauthenticate, authenticate
 from django.http import HttpRequest, HttpResponse
+from django.utils.decorators import sync_and_async_middleware
 
 from main.account import AUTH_COOKIE_NAME
 from main.account.utils import delete_auth_cookie, set_auth_cookie
 
 
+@sync_and_async_middleware
 def check_login_status_middleware(
     get_response: Callable[..., HttpResponse],
 ) -> Callable:
+    # Under ASGI the middleware is async, so that async views run without
+    # switching to a thread
+    if iscoroutinefunction(get_response):
+
+        async def async_middleware(request: HttpRequest) -> HttpResponse:
+            token: str = request.COOKIES.get(AUTH_COOKIE_NAME, "").strip()
+            # request.user will be modified here
+            user = await aauthenticate(request, token=token)
+            response = await get_response(request)
+            return _update_auth_cookie(response, token if user else "")
+
+        return async_middleware
+
     def middleware(request: HttpRequest) -> HttpResponse:
         token: str = request.COOKIES.get(AUTH_COOKIE_NAME, "").strip()
         user = authenticate(request, token=token)  # request.user will be modified here
-        token = token if user else ""
-
         response = get_response(request)
+        return _update_auth_cookie(response, token if user else "")
 
-        if response.status_code == 401:
+    return middleware
+
+
+def _update_auth_cookie(response: HttpResponse, token: str) -> HttpResponse:
+    if response.status_code == 401:
+        response = delete_auth_cookie(response)
+    elif response.get("is-log-out") != "yes" and response.get("is-log-in") != "yes":
+        if token:
+            # refresh the max_age of the auth cookie every time
+            response = set_auth_cookie(response, token)
+        else:
             response = delete_auth_cookie(response)
-        elif response.get("is-log-out") != "yes" and response.get("is-log-in") != "yes":
-            if token:
-                # refresh the max_age of the auth cookie every time
-                response = set_auth_cookie(response, token)
-            else:
-                response = delete_auth_cookie(response)
-
-        # Delete all the custom headers that may appear (KeyError won't be raised)
-        del response["is-log-out"]
-        del response["is-log-in"]
-        return response
 
-    return middleware
+    # Delete all the custom headers that may appear (KeyError won't be raised)
+    del response["is-log-out"]
+    del response["is-log-in"]
+    return response
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.http import HttpRequest
 from jose import jwt
@@ -128,3 +129,27 @@ class TestMyBackend:
         authenticated_user = backend.authenticate(request_obj, token)
 
         assert authenticated_user is None
+
+    def test_aauthenticate_valid_token_success(
+        self, backend: MyBackend, request_obj: HttpRequest, user: User
+    ) -> None:
+        payload = {
+            "id": str(user.id),
+            "exp": int((datetime.now() + timedelta(days=30)).timestamp()),
+        }
+        token = jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHMS.HS256)
+
+        authenticated_user = async_to_sync(backend.aauthenticate)(request_obj, token)
+
+        assert authenticated_user == user
+        assert request_obj.user == user
+
+    def test_aauthenticate_invalid_token(
+        self, backend: MyBackend, request_obj: HttpRequest
+    ) -> None:
+        authenticated_user = async_to_sync(backend.aauthenticate)(
+            request_obj, "invalid_token_format"
+        )
+
+        assert authenticated_user is None
+        assert request_obj.user is None
@@ -3,6 +3,7 @@ from collections.abc import Callable
 from datetime import datetime, timedelta
 
 import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
 from django.conf import settings
 from django.http import HttpRequest, HttpResponse
 from jose import jwt
@@ -190,3 +191,32 @@ class TestCheckLoginStatusMiddleware:
         assert cookie["samesite"] == "None" if env.ENV == Env.PROD else "Strict"
         if env.ENV == Env.PROD:
             assert cookie["domain"] == "taigu.tw"
+
+    def test_async_middleware_valid_token(
+        self, request_obj: HttpRequest, user: User
+    ) -> None:
+        async def get_response(request: HttpRequest) -> HttpResponse:
+            return HttpResponse(b"Test response")
+
+        middleware = check_login_status_middleware(get_response)
+        token = self.create_valid_token(user)
+        request_obj.COOKIES = {AUTH_COOKIE_NAME: token}
+
+        assert iscoroutinefunction(middleware)
+        response = async_to_sync(middleware)(request_obj)
+
+        assert response.status_code == 200
+        assert request_obj.user == user
+        assert response.cookies[AUTH_COOKIE_NAME].value == token
+
+    def test_async_middleware_401_response(self, request_obj: HttpRequest) -> None:
+        async def get_response(request: HttpRequest) -> HttpResponse:
+            return HttpResponse(status=401)
+
+        middleware = check_login_status_middleware(get_response)
+        request_obj.COOKIES = {AUTH_COOKIE_NAME: "invalid_token"}
+
+        response = async_to_sync(middleware)(request_obj)
+
+        assert response.status_code == 401
+        assert response.cookies[AUTH_COOKIE_NAME].value == ""
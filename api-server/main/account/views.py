@@ -4,12 +4,9 @@ from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.http import HttpRequest, JsonResponse
+from django.http import HttpRequest
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_GET, require_POST
-from google.auth.transport.requests import Request as GoogleRequest
-from google.oauth2 import id_token
-from google_auth_oauthlib import flow as google_oauth_flow
 from jose import jwt
 from jose.constants import ALGORITHMS
 from pydantic import BaseModel
@@ -18,7 +15,9 @@ from main.account import OAuthOrganization
 from main.account.models import User
 from main.account.utils import delete_auth_cookie, set_auth_cookie
 from main.core.decorators.auth import require_login
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse
 from main.env import env
 
 logger = logging.getLogger(__name__)
@@ -56,6 +55,11 @@ class TokenVerificationResult(BaseModel):
 
 
 def _verify_with_code_flow(code: str, redirect_uri: str) -> TokenVerificationResult:
+    # Imported here since the Google auth stack takes long to import
+    from google.auth.transport.requests import Request as GoogleRequest
+    from google.oauth2 import id_token
+    from google_auth_oauthlib import flow as google_oauth_flow
+
     flow = google_oauth_flow.Flow.from_client_config(
         GOOGLE_CLIENT_CONFIG, scopes=SCOPES
     )
@@ -79,6 +83,7 @@ def _make_jwt(user_id: str) -> str:
     )
 
 
+@query_budget(0)
 @ensure_csrf_cookie
 @require_GET
 def get_authorization_url(request: HttpRequest) -> JsonResponse:
@@ -86,6 +91,8 @@ def get_authorization_url(request: HttpRequest) -> JsonResponse:
     if not redirect_uri:
         return JsonResponse({"message": "redirect_uri is required"}, status=400)
 
+    from google_auth_oauthlib import flow as google_oauth_flow
+
     flow = google_oauth_flow.Flow.from_client_config(
         GOOGLE_CLIENT_CONFIG, scopes=SCOPES
     )
@@ -94,6 +101,7 @@ def get_authorization_url(request: HttpRequest) -> JsonResponse:
     return JsonResponse({"authorization_url": authorization_url, "state": state})
 
 
+@query_budget(2)
 @require_POST
 def google_login(request: HttpRequest) -> JsonResponse:
     code, redirect_uri = request.POST.get("code"), request.POST.get("redirect_uri")
@@ -118,6 +126,7 @@ def google_login(request: HttpRequest) -> JsonResponse:
     return response
 
 
+@query_budget(2)
 @rate_limit(rate=0.5)
 @require_POST
 @require_login
@@ -161,6 +170,7 @@ def change_google_binding(request: HttpRequest) -> JsonResponse:
     return response
 
 
+@query_budget(0)
 @rate_limit(rate=5)
 @require_GET
 @require_login
@@ -175,6 +185,7 @@ def me(request: HttpRequest) -> JsonResponse:
     )
 
 
+@query_budget(0)
 @require_GET
 @require_login
 def logout(request: HttpRequest) -> JsonResponse:
@@ -183,6 +194,7 @@ def logout(request: HttpRequest) -> JsonResponse:
     return response
 
 
+@query_budget(1)
 @rate_limit(rate=0.5)
 @require_POST
 @require_login
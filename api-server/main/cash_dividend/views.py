@@ -2,18 +2,30 @@ import json
 from datetime import datetime
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpRequest, JsonResponse
+from django.db.models import QuerySet
+from django.http import HttpRequest
 from django.views.decorators.http import require_http_methods
 
 from main.cash_dividend.models import CashDividendRecord
 from main.core.decorators.auth import require_login
+from main.core.decorators.conditional import etag
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse, aggregate_etag
+from main.market.cache import get_company_list_version
 from main.market.models import Company
 
 
+@query_budget(2)
 @rate_limit(rate=2)
 @require_login
 @require_http_methods(["GET", "POST"])
+@etag(
+    # Company names are part of the response
+    lambda request: aggregate_etag(
+        _filter_records(request), request.user.pk, get_company_list_version()
+    )
+)
 def create_or_list(request: HttpRequest) -> JsonResponse:
     if request.method == "GET":
         return _list(request)
@@ -24,23 +36,9 @@ def create_or_list(request: HttpRequest) -> JsonResponse:
 
 
 def _list(request: HttpRequest) -> JsonResponse:
-    deal_times = json.loads(request.GET.get("deal_times", "[]"))  # type: ignore
-    sids = json.loads(request.GET.get("sids", "[]"))  # type: ignore
-    if deal_times or sids:
-        if deal_times and sids:
-            query_set = request.user.cash_dividend_records.filter(
-                deal_time__in=deal_times
-            ).filter(company__pk__in=sids)
-        elif not deal_times:
-            query_set = request.user.cash_dividend_records.filter(company__pk__in=sids)
-        else:
-            query_set = request.user.cash_dividend_records.filter(
-                deal_time__in=deal_times
-            )
-    else:
-        query_set = request.user.cash_dividend_records.all()
-
-    query_set = query_set.select_related("company").order_by("-deal_time")
+    query_set = (
+        _filter_records(request).select_related("company").order_by("-deal_time")
+    )
     return JsonResponse(
         {
             "data": [
@@ -57,6 +55,21 @@ def _list(request: HttpRequest) -> JsonResponse:
     )
 
 
+def _filter_records(request: HttpRequest) -> QuerySet[CashDividendRecord]:
+    deal_times = json.loads(request.GET.get("deal_times", "[]"))  # type: ignore
+    sids = json.loads(request.GET.get("sids", "[]"))  # type: ignore
+    if deal_times or sids:
+        if deal_times and sids:
+            return request.user.cash_dividend_records.filter(
+                deal_time__in=deal_times
+            ).filter(company__pk__in=sids)
+        elif not deal_times:
+            return request.user.cash_dividend_records.filter(company__pk__in=sids)
+        else:
+            return request.user.cash_dividend_records.filter(deal_time__in=deal_times)
+    return request.user.cash_dividend_records.all()
+
+
 def _create(request: HttpRequest) -> JsonResponse:
     payload = json.loads(request.body)
 
@@ -94,6 +107,7 @@ def _create(request: HttpRequest) -> JsonResponse:
     )
 
 
+@query_budget(3)
 @rate_limit(rate=1)
 @require_login
 @require_http_methods(["POST", "DELETE"])
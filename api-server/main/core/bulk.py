@@ -0,0 +1,113 @@
+import uuid
+from collections.abc import Iterable, Sequence
+from typing import Any, NamedTuple
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import ForeignKey, Model
+
+from main.core.job_metrics import record_rows_written
+
+
+class BulkUpsertResult(NamedTuple):
+    inserted: int
+    updated: int
+
+
+def bulk_upsert(
+    model: type[Model],
+    fields: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    *,
+    unique_fields: Sequence[str],
+    update_fields: Sequence[str] = (),
+    skip_unknown_references: bool = False,
+    using: str = DEFAULT_DB_ALIAS,
+) -> BulkUpsertResult:
+    """
+    Upsert `rows` (value tuples ordered as `fields`) by streaming them through
+    `COPY` into a temp table and merging it with one `INSERT ... SELECT ... ON
+    CONFLICT` statement. Unlike `bulk_create(update_conflicts=True)`, the statement
+    size does not grow with the number of rows.
+
+    - `auto_now`/`auto_now_add` fields not listed in `fields` are set to the
+      statement's timestamp.
+    - Duplicated rows are collapsed into the last one.
+    - Conflicting rows are left untouched if `update_fields` is empty.
+    - If `skip_unknown_references` is set, rows referring to a missing foreign
+      key are dropped instead of failing the whole batch.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    meta = model._meta
+    table = quote(meta.db_table)
+    temp_table = quote(f"bulk_upsert_{uuid.uuid4().hex[:12]}")
+
+    def column(field_name: str) -> str:
+        return quote(meta.get_field(field_name).column)
+
+    columns = [column(f) for f in fields]
+    unique_columns = [column(f) for f in unique_fields]
+    timestamp_fields = [
+        f
+        for f in meta.concrete_fields
+        if (getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False))
+        and f.column not in {meta.get_field(name).column for name in fields}
+    ]
+    insert_columns = columns + [quote(f.column) for f in timestamp_fields]
+    select_values = [f"t.{c}" for c in columns] + ["statement_timestamp()"] * len(
+        timestamp_fields
+    )
+    update_columns = [column(f) for f in update_fields] + [
+        quote(f.column) for f in timestamp_fields if f.auto_now
+    ]
+
+    conditions = ["true"]
+    if skip_unknown_references:
+        for name in fields:
+            field = meta.get_field(name)
+            if isinstance(field, ForeignKey):
+                related_meta = field.related_model._meta  # type: ignore
+                conditions.append(
+                    f"EXISTS (SELECT 1 FROM {quote(related_meta.db_table)} r "  # noqa: S608
+                    f"WHERE r.{quote(field.target_field.column)} = t.{quote(field.column)})"
+                )
+
+    if update_columns:
+        on_conflict = "DO UPDATE SET " + ", ".join(
+            f"{c} = EXCLUDED.{c}" for c in update_columns
+        )
+    else:
+        on_conflict = "DO NOTHING"
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # Copy column types only, constraints and defaults are not needed
+        cursor.execute(
+            f"CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS "  # noqa: S608
+            f"SELECT {', '.join(columns)} FROM {table} WITH NO DATA"
+        )
+        with cursor.copy(
+            f"COPY {temp_table} ({', '.join(columns)}) FROM STDIN"
+        ) as copy:
+            for row in rows:
+                copy.write_row(row)
+        cursor.execute(
+            f"""
+            WITH upserted AS (
+                INSERT INTO {table} ({", ".join(insert_columns)})
+                SELECT DISTINCT ON ({", ".join(f"t.{c}" for c in unique_columns)})
+                    {", ".join(select_values)}
+                FROM {temp_table} t
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {", ".join(f"t.{c}" for c in unique_columns)}, t.ctid DESC
+                ON CONFLICT ({", ".join(unique_columns)}) {on_conflict}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                count(*) FILTER (WHERE inserted),
+                count(*) FILTER (WHERE NOT inserted)
+            FROM upserted
+            """  # noqa: S608
+        )
+        inserted, updated = cursor.fetchone()
+    record_rows_written(inserted + updated)
+    return BulkUpsertResult(inserted=inserted, updated=updated)
@@ -1,7 +1,17 @@
-from typing import TypeVar, get_args
+import asyncio
+import pickle
+from collections.abc import Callable
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, TypeVar, get_args
+from weakref import WeakKeyDictionary
 
 import redis
+import redis.asyncio
+import redis.asyncio.client
+import redis.client
 from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient
 from pydantic import BaseModel
 from redis.backoff import ExponentialBackoff
 from redis.retry import Retry
@@ -10,6 +20,85 @@ from main.env import env
 
 T = TypeVar("T", bound=BaseModel)
 
+# Called with the duration of every call made through the clients below while
+# it is set, see `main.core.request_metrics`
+redis_call_timer: ContextVar[Callable[[float], None] | None] = ContextVar(
+    "redis_call_timer", default=None
+)
+
+
+class _TimedRedis(redis.Redis):
+    def execute_command(self, *args, **options) -> Any:  # noqa: ANN002, ANN003, ANN401
+        if (timer := redis_call_timer.get()) is None:
+            return super().execute_command(*args, **options)
+        start = perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            timer(perf_counter() - start)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> redis.client.Pipeline:
+        return _TimedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class _TimedPipeline(redis.client.Pipeline):
+    # Pipelines queue their commands, and send them all in `execute`
+    def execute(self, raise_on_error: bool = True) -> list[Any]:
+        if (timer := redis_call_timer.get()) is None:
+            return super().execute(raise_on_error)
+        start = perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            timer(perf_counter() - start)
+
+
+class _AsyncTimedRedis(redis.asyncio.Redis):
+    async def execute_command(self, *args, **options) -> Any:  # noqa: ANN002, ANN003, ANN401
+        if (timer := redis_call_timer.get()) is None:
+            return await super().execute_command(*args, **options)
+        start = perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            timer(perf_counter() - start)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> redis.asyncio.client.Pipeline:
+        return _AsyncTimedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class _AsyncTimedPipeline(redis.asyncio.client.Pipeline):
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        if (timer := redis_call_timer.get()) is None:
+            return await super().execute(raise_on_error)
+        start = perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            timer(perf_counter() - start)
+
+
+class _TimedRedisCacheClient(RedisCacheClient):
+    def __init__(self, *args, **kwargs) -> None:  # noqa: ANN002, ANN003
+        super().__init__(*args, **kwargs)
+        self._client = _TimedRedis
+
+
+class TimedRedisCache(RedisCache):
+    """Django's Redis cache backend, with its calls timed like the clients above."""
+
+    def __init__(self, server: str, params: dict[str, Any]) -> None:
+        super().__init__(server, params)
+        self._class = _TimedRedisCacheClient
+
 
 redis_connection_pool = redis.ConnectionPool(
     host=env.REDIS_HOST,
@@ -23,7 +112,51 @@ redis_retry_policy = Retry(backoff=ExponentialBackoff(), retries=5)
 
 
 def get_redis_connection() -> redis.Redis:
-    return redis.Redis(retry=redis_retry_policy).from_pool(redis_connection_pool)
+    return _TimedRedis(retry=redis_retry_policy).from_pool(redis_connection_pool)
+
+
+_async_redis_connection_pools: WeakKeyDictionary[
+    asyncio.AbstractEventLoop, redis.asyncio.ConnectionPool
+] = WeakKeyDictionary()
+
+
+def get_async_redis_connection() -> redis.asyncio.Redis:
+    """
+    A client of the running event loop's pool, since asyncio connections can't be
+    shared across loops. Unlike `get_redis_connection`, responses are not decoded,
+    so that the pickled values of the Django cache can be read.
+    """
+    loop = asyncio.get_running_loop()
+    if (pool := _async_redis_connection_pools.get(loop)) is None:
+        pool = _async_redis_connection_pools[loop] = redis.asyncio.ConnectionPool(
+            host=env.REDIS_HOST,
+            port=env.REDIS_PORT,
+            max_connections=1000,
+            socket_connect_timeout=10,
+            socket_timeout=10,
+        )
+    return _AsyncTimedRedis(connection_pool=pool)
+
+
+async def acache_get(key: str, default: Any = None) -> Any:  # noqa: ANN401
+    """`cache.get` through the async Redis client instead of a thread."""
+    value = await get_async_redis_connection().get(cache.make_and_validate_key(key))
+    if value is None:
+        return default
+    # Same format as Django's `RedisSerializer`: integers are stored as is
+    try:
+        return int(value)
+    except ValueError:
+        return pickle.loads(value)  # noqa: S301
+
+
+async def acache_set(key: str, value: Any, timeout: int) -> None:  # noqa: ANN401
+    """`cache.set` through the async Redis client instead of a thread."""
+    await get_async_redis_connection().set(
+        cache.make_and_validate_key(key),
+        value if type(value) is int else pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+        ex=timeout,
+    )
 
 
 class BaseCacheManager[T: BaseModel]:
@@ -53,6 +186,15 @@ class BaseCacheManager[T: BaseModel]:
         cls._value_validator_model.model_validate(value)
         cache.set(cls.__gen_cache_key(identifier), value, timeout)
 
+    @classmethod
+    async def aget(cls, identifier: str) -> T | None:
+        return await acache_get(cls.__gen_cache_key(identifier))
+
+    @classmethod
+    async def aset(cls, identifier: str, value: T, timeout: int) -> None:
+        cls._value_validator_model.model_validate(value)
+        await acache_set(cls.__gen_cache_key(identifier), value, timeout)
+
     @classmethod
     def delete(cls, identifier: str) -> None:
         cache.delete(cls.__gen_cache_key(identifier))
@@ -1,21 +1,49 @@
 from collections.abc import Callable
 from functools import wraps
 
-from django.http import HttpRequest, JsonResponse
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpRequest
 
 from main.account.models import User
+from main.core.http import JsonResponse
 
 
 def require_login(func: Callable) -> Callable:
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrap(request: HttpRequest, *args, **kwargs) -> JsonResponse:  # noqa: ANN002, ANN003
+            if _is_logged_in(request):
+                return await func(request, *args, **kwargs)
+            else:
+                return JsonResponse({"message": "Login Required"}, status=401)
+
+        return async_wrap
+
     @wraps(func)
     def wrap(request: HttpRequest, *args, **kwargs) -> JsonResponse:  # noqa: ANN002, ANN003
-        if (
-            hasattr(request, "user")
-            and isinstance(request.user, User)
-            and request.user.is_authenticated
-        ):
+        if _is_logged_in(request):
             return func(request, *args, **kwargs)
         else:
             return JsonResponse({"message": "Login Required"}, status=401)
 
     return wrap
+
+
+def require_superuser(func: Callable) -> Callable:
+    @wraps(func)
+    def wrap(request: HttpRequest, *args, **kwargs) -> JsonResponse:  # noqa: ANN002, ANN003
+        if request.user.is_superuser:  # type: ignore
+            return func(request, *args, **kwargs)
+        else:
+            return JsonResponse({"message": "Permission Denied"}, status=403)
+
+    return wrap
+
+
+def _is_logged_in(request: HttpRequest) -> bool:
+    return (
+        hasattr(request, "user")
+        and isinstance(request.user, User)
+        and request.user.is_authenticated
+    )
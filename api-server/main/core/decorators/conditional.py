@@ -0,0 +1,55 @@
+from collections.abc import Callable
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+
+
+def etag(etag_func: Callable) -> Callable:
+    """
+    Answer GET requests whose If-None-Match has the ETag computed by `etag_func`
+    (called like the view, and awaited for async views) with 304 Not Modified
+    without running the view. Unlike Django's `etag` decorator, other methods
+    are passed through, so that writes don't compute the ETag.
+
+    Responses are marked private and to be revalidated every time, as they
+    belong to the logged-in user.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrap(request: HttpRequest, *args, **kwargs) -> HttpResponse:  # noqa: ANN002, ANN003
+                if request.method not in ("GET", "HEAD"):
+                    return await func(request, *args, **kwargs)
+                res_etag = quote_etag(await etag_func(request, *args, **kwargs))
+                response = get_conditional_response(
+                    request, etag=res_etag
+                ) or await func(request, *args, **kwargs)
+                return _set_etag(response, res_etag)
+
+            return async_wrap
+
+        @wraps(func)
+        def wrap(request: HttpRequest, *args, **kwargs) -> HttpResponse:  # noqa: ANN002, ANN003
+            if request.method not in ("GET", "HEAD"):
+                return func(request, *args, **kwargs)
+            res_etag = quote_etag(etag_func(request, *args, **kwargs))
+            response = get_conditional_response(request, etag=res_etag) or func(
+                request, *args, **kwargs
+            )
+            return _set_etag(response, res_etag)
+
+        return wrap
+
+    return decorator
+
+
+def _set_etag(response: HttpResponse, etag: str) -> HttpResponse:
+    # Error responses don't stand for the resource
+    if response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,15 @@
+from collections.abc import Callable
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare the most database queries a request to the view may make, whatever its
+    method and parameters. The view tests hold it to that with the
+    `assert_view_query_budget` fixture.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        func.query_budget = max_queries  # type: ignore
+        return func
+
+    return decorator
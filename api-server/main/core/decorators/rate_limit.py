@@ -1,17 +1,22 @@
+import asyncio
 import logging
 import math
 from collections.abc import Callable
 from functools import wraps
+from weakref import WeakKeyDictionary
 
-from django.http import HttpRequest, JsonResponse
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest
+from redis.commands.core import AsyncScript
 
 from main.account.models import User
-from main.core.cache import get_redis_connection
+from main.core.cache import get_async_redis_connection, get_redis_connection
+from main.core.http import JsonResponse
 
 logger = logging.getLogger(__name__)
 
-redis = get_redis_connection()
-LUA_SCRIPT = redis.register_script("""
+LUA_SOURCE = """
 local key = KEYS[1]
 local rate = tonumber(ARGV[1])
 local capacity = tonumber(ARGV[2])
@@ -59,7 +64,25 @@ else
     redis.call("EXPIRE", key, 3600)
     return 0
 end
-""")
+"""
+
+redis = get_redis_connection()
+LUA_SCRIPT = redis.register_script(LUA_SOURCE)
+
+
+_async_lua_scripts: WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncScript] = (
+    WeakKeyDictionary()
+)
+
+
+async def async_lua_script(keys: list[str], args: list) -> int:
+    """`LUA_SCRIPT` through the async Redis client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    if (script := _async_lua_scripts.get(loop)) is None:
+        script = _async_lua_scripts[loop] = (
+            get_async_redis_connection().register_script(LUA_SOURCE)
+        )
+    return await script(keys=keys, args=args)
 
 
 def rate_limit(rate: float, capacity: int | None = None) -> Callable:
@@ -84,9 +107,25 @@ def rate_limit(rate: float, capacity: int | None = None) -> Callable:
             )
             return f"rate_limit:{request.method}:{request.path}:{user_id}"
 
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrap(request: HttpRequest, *args, **kwargs) -> JsonResponse:  # noqa: ANN002, ANN003
+                allowed = not settings.RATE_LIMIT_ENABLED or await async_lua_script(
+                    keys=[make_key(request)], args=[rate, capacity]
+                )
+                if bool(int(allowed)):
+                    return await func(request, *args, **kwargs)
+                else:
+                    return JsonResponse({"message": "Rate Limit Exceeded"}, status=429)
+
+            return async_wrap
+
         @wraps(func)
         def wrap(request: HttpRequest, *args, **kwargs) -> JsonResponse:  # noqa: ANN002, ANN003
-            allowed = LUA_SCRIPT(keys=[make_key(request)], args=[rate, capacity])
+            allowed = not settings.RATE_LIMIT_ENABLED or LUA_SCRIPT(
+                keys=[make_key(request)], args=[rate, capacity]
+            )
             if bool(int(allowed)):
                 return func(request, *args, **kwargs)
             else:
@@ -0,0 +1,80 @@
+import hashlib
+
+import orjson
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.http import JsonResponse as DjangoJsonResponse
+
+# Non-string dict keys (e.g. the minute numbers of the market index) are turned
+# into strings like the `json` module does.
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+_django_json_encoder = DjangoJSONEncoder()
+
+
+def _default(o: object) -> str:
+    """Types orjson doesn't know, e.g. `Decimal`, serialized like Django does."""
+    return _django_json_encoder.default(o)
+
+
+def dumps(data: object) -> bytes:
+    return orjson.dumps(data, default=_default, option=OPTIONS)
+
+
+class JsonResponse(DjangoJsonResponse):
+    """
+    Django's `JsonResponse` serialized with orjson, which handles dates,
+    datetimes and UUIDs natively. Datetimes keep their microseconds, and UTC is
+    written as "Z".
+
+    Already serialized JSON is sent as is: either the whole body as `bytes`, or
+    parts of `data` wrapped in `orjson.Fragment`, e.g. fragments read from the
+    cache.
+    """
+
+    def __init__(self, data: object, safe: bool = True, **kwargs) -> None:  # noqa: ANN003
+        if safe and not isinstance(data, dict | bytes):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        # Skip `DjangoJsonResponse.__init__`, which serializes with `json`
+        HttpResponse.__init__(
+            self, content=data if isinstance(data, bytes) else dumps(data), **kwargs
+        )
+
+
+def aggregate_etag(query_set: QuerySet, *parts: object) -> str:
+    """
+    ETag of the rows of `query_set` and `parts` (e.g. the user's ID), from the
+    rows' count and latest `updated_at`, computed with one aggregate query. Any
+    insert, delete or update through `save()` changes it.
+    """
+    aggregate = query_set.aggregate(count=Count("pk"), updated_at=Max("updated_at"))
+    return hashlib.blake2b(
+        repr((aggregate["count"], aggregate["updated_at"], *parts)).encode(),
+        digest_size=16,
+    ).hexdigest()
+
+
+def accepts_encoding(request: HttpRequest, coding: str) -> bool:
+    """
+    Whether the request's Accept-Encoding allows `coding` (e.g. "gzip"): listed,
+    or covered by "*", with a q-value above 0. An explicit entry wins over "*".
+    """
+    q_values = {}
+    for entry in request.headers.get("Accept-Encoding", "").split(","):
+        name, *params = (part.strip() for part in entry.split(";"))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        q_values[name.lower()] = q
+    return q_values.get(coding, q_values.get("*", 0.0)) > 0
@@ -0,0 +1,91 @@
+"""
+Profile how a fresh interpreter starts a job command with `python -X importtime`.
+The script runs in a subprocess, since the imports of this one are already warm.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import NamedTuple
+
+from main.core.job_queue import JOBS
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+# What `manage.py <job>` does before the job starts, then the loaded modules
+STARTUP_SCRIPT = """
+import json
+import sys
+
+import django
+from django.core.checks import run_checks
+from django.core.management import get_commands, load_command_class
+
+django.setup()
+commands = get_commands()
+for name in {names!r}:
+    if load_command_class(commands[name], name).requires_system_checks:
+        run_checks()
+print(json.dumps(sorted(sys.modules)))
+"""
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class StartupProfile(NamedTuple):
+    duration: float  # In seconds
+    # Per `-X importtime`, which misses the modules Django loads with
+    # `importlib.import_module`, e.g. the settings, the models and the URLconf
+    imports: list[ImportRecord]
+    # Every module loaded once the job could start
+    modules: frozenset[str]
+
+    def slowest(self, n: int) -> list[ImportRecord]:
+        """The `n` top-level imports that took the longest, including their own."""
+        return sorted(
+            (r for r in self.imports if r.depth == 0),
+            key=lambda r: r.cumulative_us,
+            reverse=True,
+        )[:n]
+
+
+def profile_job_startup(
+    settings_module: str, names: list[str] | None = None
+) -> StartupProfile:
+    script = STARTUP_SCRIPT.format(names=names or list(JOBS))
+    start = perf_counter()
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    duration = perf_counter() - start
+    imports = []
+    for line in result.stderr.splitlines():
+        if match := _IMPORT_TIME_LINE.match(line):
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append(
+                ImportRecord(
+                    module=module,
+                    self_us=int(self_us),
+                    cumulative_us=int(cumulative_us),
+                    depth=len(indent) // 2,
+                )
+            )
+    return StartupProfile(
+        duration=duration,
+        imports=imports,
+        modules=frozenset(json.loads(result.stdout.splitlines()[-1])),
+    )
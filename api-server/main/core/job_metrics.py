@@ -0,0 +1,108 @@
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any
+
+import requests
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+@dataclass
+class JobMetrics:
+    rows_written: int = 0
+    http_calls: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, rows_written: int = 0, http_calls: int = 0) -> None:
+        with self._lock:
+            self.rows_written += rows_written
+            self.http_calls += http_calls
+
+
+_current_metrics: ContextVar[JobMetrics | None] = ContextVar(
+    "job_metrics", default=None
+)
+_instrumentation_lock = threading.Lock()
+_instrumented = False
+
+
+@contextmanager
+def collect_job_metrics() -> Iterator[JobMetrics]:
+    """
+    Count the rows written and HTTP requests sent within the block, including
+    those of `ContextThreadPoolExecutor` tasks it submits. Nothing is counted
+    before `install_job_instrumentation` is called.
+    """
+    metrics = JobMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+def record_rows_written(count: int) -> None:
+    """For writes the statement counter can't see, e.g. `bulk_upsert`."""
+    if (metrics := _current_metrics.get()) is not None:
+        metrics.add(rows_written=count)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Run tasks in the context of their submitter, i.e. its job metrics."""
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:  # noqa: ANN002, ANN003
+        return super().submit(copy_context().run, fn, *args, **kwargs)
+
+
+def install_job_instrumentation() -> None:
+    """Count every `requests` request and every statement writing to the database."""
+    global _instrumented
+    with _instrumentation_lock:
+        if _instrumented:
+            return
+        send = requests.Session.send
+
+        @wraps(send)
+        def counted_send(
+            self: requests.Session,
+            request: requests.PreparedRequest,
+            **kwargs,  # noqa: ANN003
+        ) -> requests.Response:
+            if (metrics := _current_metrics.get()) is not None:
+                metrics.add(http_calls=1)
+            return send(self, request, **kwargs)
+
+        requests.Session.send = counted_send  # type: ignore
+        connection_created.connect(_add_statement_counter, dispatch_uid=__name__)
+        _instrumented = True
+
+
+def _add_statement_counter(
+    sender: type,
+    connection: BaseDatabaseWrapper,
+    **kwargs,  # noqa: ANN003
+) -> None:
+    # The signal is sent again whenever the wrapper reconnects
+    if _count_written_rows not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_written_rows)
+
+
+def _count_written_rows(
+    execute: Callable,
+    sql: str,
+    params: Any,  # noqa: ANN401
+    many: bool,
+    context: dict[str, Any],
+) -> Any:  # noqa: ANN401
+    result = execute(sql, params, many, context)
+    metrics = _current_metrics.get()
+    if metrics is not None and sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+        metrics.add(rows_written=max(context["cursor"].rowcount, 0))
+    return result
@@ -0,0 +1,155 @@
+"""
+A durable job queue in Redis. The scheduler only enqueues jobs, and the
+long-lived `run_job_worker` processes run them.
+
+A job is a management command. Enqueued messages are pushed on the left of
+`JOB_QUEUE_KEY`, and a worker atomically moves each message it takes from the
+right end to its own processing list. The message is removed from there only
+once the run is over. If a worker dies, its heartbeat expires, and
+`recover_orphaned_jobs` puts the messages of its processing list back at the
+consuming end of the queue, and releases the concurrency slots their runs held.
+
+This module must not import models, so that the scheduler can enqueue jobs
+without setting Django up.
+"""
+
+import json
+import uuid
+from datetime import UTC, datetime
+from itertools import accumulate
+from typing import NamedTuple
+
+from main.core.cache import get_redis_connection
+
+JOB_QUEUE_KEY = "jobs:queue"
+PROCESSING_KEY_PREFIX = "jobs:processing:"
+WORKER_HEARTBEAT_KEY_PREFIX = "jobs:worker:"
+RUNNING_KEY_PREFIX = "jobs:running:"
+STATS_KEY_PREFIX = "jobs:stats:"
+WORKER_HEARTBEAT_TIMEOUT = 30
+# Upper bounds (in seconds) of the buckets of the job duration histograms
+DURATION_BUCKETS = (1, 5, 10, 30, 45, 60, 90, 120, 300, 600, 1800, 3600)
+
+
+class JobSpec(NamedTuple):
+    # How many runs of the job may be in progress at once across all workers
+    max_concurrency: int = 1
+    # Seconds after which a run's concurrency slot is released even if the worker
+    # holding it never returns it
+    lease: int = 60 * 60
+    # Seconds a run may wait in the queue before it is dropped as missed, since a
+    # newer one will be enqueued anyway
+    misfire_grace_time: int | None = None
+    # Seconds a run is expected to finish in, e.g. the interval of its schedule
+    budget: int | None = None
+
+
+JOBS: dict[str, JobSpec] = {
+    "fetch_and_store_realtime_stock_info": JobSpec(
+        lease=60 * 5, misfire_grace_time=30, budget=60
+    ),
+    "update_all_stocks_history": JobSpec(),
+    "update_company_list": JobSpec(),
+    "enrich_companies": JobSpec(),
+    "update_material_facts": JobSpec(lease=60 * 30),
+    "cleanup_data_change_logs": JobSpec(),
+    "cleanup_job_runs": JobSpec(),
+}
+
+
+class JobMessage(NamedTuple):
+    id: str
+    name: str
+    enqueued_at: datetime
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {
+                "id": self.id,
+                "name": self.name,
+                "enqueued_at": self.enqueued_at.isoformat(),
+            }
+        )
+
+    @classmethod
+    def loads(cls, raw: str) -> "JobMessage":
+        data = json.loads(raw)
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            enqueued_at=datetime.fromisoformat(data["enqueued_at"]),
+        )
+
+
+def enqueue_job(name: str) -> JobMessage:
+    if name not in JOBS:
+        raise ValueError(f"Unknown job: {name}")
+    message = JobMessage(id=uuid.uuid4().hex, name=name, enqueued_at=datetime.now(UTC))
+    get_redis_connection().lpush(JOB_QUEUE_KEY, message.dumps())
+    return message
+
+
+def recover_orphaned_jobs() -> list[JobMessage]:
+    """Requeue the jobs taken by workers that stopped beating, and return them."""
+    redis = get_redis_connection()
+    recovered = []
+    for key in redis.scan_iter(f"{PROCESSING_KEY_PREFIX}*"):
+        worker_id = key.removeprefix(PROCESSING_KEY_PREFIX)
+        if redis.exists(f"{WORKER_HEARTBEAT_KEY_PREFIX}{worker_id}"):
+            continue
+        while (raw := redis.lmove(key, JOB_QUEUE_KEY, "RIGHT", "RIGHT")) is not None:
+            message = JobMessage.loads(raw)
+            # Otherwise the slot held by the dead run would skip the requeued one
+            redis.zrem(f"{RUNNING_KEY_PREFIX}{message.name}", message.id)
+            recovered.append(message)
+    return recovered
+
+
+def record_job_event(name: str, event: str) -> None:
+    """Count an event of a job, e.g. a run the scheduler missed."""
+    get_redis_connection().hincrby(f"{STATS_KEY_PREFIX}{name}", event, 1)
+
+
+def record_job_run(
+    name: str,
+    status: str,
+    started_at: datetime,
+    duration: float,
+    rows_written: int = 0,
+    http_calls: int = 0,
+) -> None:
+    """Count a run by its status and add its duration to the job's histogram."""
+    key = f"{STATS_KEY_PREFIX}{name}"
+    bucket = next((str(b) for b in DURATION_BUCKETS if duration <= b), "+Inf")
+    pipeline = get_redis_connection().pipeline()
+    pipeline.hincrby(key, status, 1)
+    pipeline.hincrby(key, "rows_written", rows_written)
+    pipeline.hincrby(key, "http_calls", http_calls)
+    pipeline.hset(
+        key,
+        mapping={
+            "last_status": status,
+            "last_started_at": started_at.isoformat(),
+            "last_duration": duration,
+        },
+    )
+    pipeline.hincrby(f"{key}:duration", bucket, 1)
+    pipeline.execute()
+
+
+def get_job_stats(name: str) -> dict:
+    redis = get_redis_connection()
+    key = f"{STATS_KEY_PREFIX}{name}"
+    histogram = redis.hgetall(f"{key}:duration")
+    labels = [*map(str, DURATION_BUCKETS), "+Inf"]
+    return {
+        "counters": redis.hgetall(key),
+        # Cumulative, i.e. the number of runs that took at most each bound
+        "duration_histogram": dict(
+            zip(
+                labels,
+                accumulate(int(histogram.get(label, 0)) for label in labels),
+                strict=True,
+            )
+        ),
+    }
@@ -0,0 +1,218 @@
+import logging
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from time import monotonic, perf_counter, time
+
+from django.core.management import call_command
+from django.db import close_old_connections
+from redis.exceptions import RedisError
+
+from main.core.cache import get_redis_connection
+from main.core.job_metrics import collect_job_metrics, install_job_instrumentation
+from main.core.job_queue import (
+    JOB_QUEUE_KEY,
+    JOBS,
+    PROCESSING_KEY_PREFIX,
+    RUNNING_KEY_PREFIX,
+    WORKER_HEARTBEAT_KEY_PREFIX,
+    WORKER_HEARTBEAT_TIMEOUT,
+    JobMessage,
+    record_job_event,
+    record_job_run,
+    recover_orphaned_jobs,
+)
+from main.core.models import JobRun
+
+logger = logging.getLogger(__name__)
+
+RECOVERY_INTERVAL = 60
+POLL_TIMEOUT = 1
+HEARTBEAT_INTERVAL = WORKER_HEARTBEAT_TIMEOUT / 3
+
+redis = get_redis_connection()
+# Take a concurrency slot of a job unless all of them are held by unexpired leases
+ACQUIRE_SLOT_SCRIPT = redis.register_script("""
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local max_concurrency = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local run_id = ARGV[4]
+
+redis.call("ZREMRANGEBYSCORE", key, "-inf", now)
+if redis.call("ZCARD", key) >= max_concurrency then
+    return 0
+end
+redis.call("ZADD", key, now + lease, run_id)
+redis.call("EXPIRE", key, lease)
+return 1
+""")
+
+
+class JobWorker:
+    """
+    Runs the jobs of the queue in this process, `concurrency` of them at a time,
+    so that they share warm imports and connections.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{uuid.uuid4().hex[:8]}"
+        self.processing_key = f"{PROCESSING_KEY_PREFIX}{self.worker_id}"
+        self.heartbeat_key = f"{WORKER_HEARTBEAT_KEY_PREFIX}{self.worker_id}"
+        self._slots = threading.Semaphore(concurrency)
+
+    def run(self, stop_event: threading.Event) -> None:
+        install_job_instrumentation()
+        logger.info(f"Job worker {self.worker_id} started.")
+        # Beats until the jobs in progress are over, even after `stop_event` is
+        # set, so that other workers don't recover them meanwhile
+        drained = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._beat, args=(drained,), name="job-worker-heartbeat"
+        )
+        heartbeat.start()
+        try:
+            self._consume(stop_event)
+        finally:
+            drained.set()
+            heartbeat.join()
+        redis.delete(self.heartbeat_key)
+        logger.info(f"Job worker {self.worker_id} stopped.")
+
+    def _beat(self, drained: threading.Event) -> None:
+        while True:
+            try:
+                redis.set(self.heartbeat_key, 1, ex=WORKER_HEARTBEAT_TIMEOUT)
+            except RedisError as e:
+                logger.warning(f"Failed to refresh the heartbeat: {e}")
+            if drained.wait(HEARTBEAT_INTERVAL):
+                return
+
+    def _consume(self, stop_event: threading.Event) -> None:
+        last_recovery = float("-inf")
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            while not stop_event.is_set():
+                if monotonic() - last_recovery > RECOVERY_INTERVAL:
+                    self.recover()
+                    last_recovery = monotonic()
+
+                if not self._slots.acquire(timeout=POLL_TIMEOUT):
+                    continue
+                raw = redis.blmove(
+                    JOB_QUEUE_KEY, self.processing_key, POLL_TIMEOUT, "RIGHT", "LEFT"
+                )
+                if raw is None:
+                    self._slots.release()
+                    continue
+                executor.submit(self._process, raw)
+
+    def recover(self) -> None:
+        """
+        Requeue the jobs of dead workers, and mark the runs those workers left
+        running as abandoned.
+        """
+        if not (recovered := recover_orphaned_jobs()):
+            return
+        close_old_connections()
+        try:
+            JobRun.objects.filter(
+                job_id__in=[message.id for message in recovered],
+                status=JobRun.Status.RUNNING,
+            ).update(status=JobRun.Status.ABANDONED, finished_at=datetime.now(UTC))
+        finally:
+            close_old_connections()
+        for message in recovered:
+            record_job_event(message.name, JobRun.Status.ABANDONED)
+        logger.info(f"Requeued {len(recovered)} orphaned jobs.")
+
+    def _process(self, raw: str) -> None:
+        try:
+            self.execute(JobMessage.loads(raw))
+        except Exception as e:
+            logger.error(f"<{type(e).__name__}>: {e}")
+        finally:
+            redis.lrem(self.processing_key, 1, raw)
+            self._slots.release()
+
+    def execute(self, message: JobMessage) -> JobRun:
+        close_old_connections()
+        try:
+            return self._execute(message)
+        finally:
+            close_old_connections()
+
+    def _execute(self, message: JobMessage) -> JobRun:
+        job_run = JobRun.objects.create(
+            job_id=message.id,
+            attempt=JobRun.objects.filter(job_id=message.id).count() + 1,
+            name=message.name,
+            status=JobRun.Status.RUNNING,
+            worker=self.worker_id,
+            enqueued_at=message.enqueued_at,
+            started_at=datetime.now(UTC),
+        )
+        spec = JOBS.get(message.name)
+        running_key = f"{RUNNING_KEY_PREFIX}{message.name}"
+        if spec is None:
+            job_run.error = f"Unknown job: {message.name}"
+            return self._finish(job_run, JobRun.Status.SKIPPED, 0)
+        if (
+            spec.misfire_grace_time is not None
+            and (job_run.started_at - message.enqueued_at).total_seconds()
+            > spec.misfire_grace_time
+        ):
+            logger.warning(f"Missed {message.name} ({message.id}).")
+            return self._finish(job_run, JobRun.Status.MISSED, 0)
+        if not ACQUIRE_SLOT_SCRIPT(
+            keys=[running_key],
+            args=[time(), spec.max_concurrency, spec.lease, message.id],
+        ):
+            logger.warning(f"Skipped {message.name} ({message.id}).")
+            return self._finish(job_run, JobRun.Status.SKIPPED, 0)
+
+        start = perf_counter()
+        with collect_job_metrics() as metrics:
+            try:
+                call_command(message.name)
+                status = JobRun.Status.SUCCEEDED
+            except Exception as e:
+                status = JobRun.Status.FAILED
+                job_run.error = f"<{type(e).__name__}>: {e}"
+                logger.error(f"Error in {message.name}: {job_run.error}")
+            finally:
+                redis.zrem(running_key, message.id)
+        job_run.rows_written = metrics.rows_written
+        job_run.http_calls = metrics.http_calls
+        duration = perf_counter() - start
+        if spec.budget is not None and duration > spec.budget:
+            logger.warning(
+                f"{message.name} took {duration:.1f}s, over its {spec.budget}s budget."
+            )
+        return self._finish(job_run, status, duration)
+
+    def _finish(self, job_run: JobRun, status: str, duration: float) -> JobRun:
+        job_run.status = status
+        job_run.finished_at = datetime.now(UTC)
+        job_run.duration = duration
+        job_run.save(
+            update_fields=[
+                "status",
+                "finished_at",
+                "duration",
+                "rows_written",
+                "http_calls",
+                "error",
+            ]
+        )
+        record_job_run(
+            job_run.name,
+            status,
+            job_run.started_at,
+            duration,
+            rows_written=job_run.rows_written,
+            http_calls=job_run.http_calls,
+        )
+        return job_run
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+
+class JobCommand(BaseCommand):
+    """
+    A command run by the job worker. It skips the system checks, since checking
+    the URLconf imports every view and most of the startup time goes there.
+    """
+
+    requires_system_checks = []
@@ -0,0 +1,71 @@
+from copy import deepcopy
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.utils import load_backend
+
+from main.env import Env, env
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-request database latency of opening a new connection for "
+        "every request, of persistent connections (CONN_MAX_AGE) and of the "
+        "connection pool configured in settings."
+    )
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if env.ENV == Env.PROD:
+            raise CommandError("Benchmarks must not be run in production.")
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2.")
+
+        settings_dict = connections["default"].settings_dict
+        pool_options = settings_dict["OPTIONS"].get("pool")
+        if not pool_options:
+            raise CommandError("The default database has no connection pool.")
+        without_pool = deepcopy(settings_dict)
+        without_pool["OPTIONS"].pop("pool")
+        modes = {
+            "new connection": {**without_pool, "CONN_MAX_AGE": 0},
+            "persistent": {**without_pool, "CONN_MAX_AGE": None},
+            "pool": deepcopy(settings_dict),
+        }
+        for name, mode_settings in modes.items():
+            wrapper = load_backend(mode_settings["ENGINE"]).DatabaseWrapper(
+                mode_settings, alias=f"benchmark_{name.replace(' ', '_')}"
+            )
+            try:
+                latencies = self._measure(wrapper, options["requests"])
+                pool_stats = wrapper.pool.get_stats() if wrapper.pool else None
+            finally:
+                wrapper.close()
+                wrapper.close_pool()
+            self.stdout.write(
+                f"{name:<16} | p50 {median(latencies) * 1000:.2f}ms, "
+                f"p95 {quantiles(latencies, n=20)[-1] * 1000:.2f}ms"
+            )
+            if pool_stats is not None:
+                self.stdout.write(
+                    f"{'':<16} | {pool_stats.get('connections_num', 0)} connections "
+                    f"opened, {pool_stats.get('requests_wait_ms', 0)}ms waited for "
+                    f"one in {pool_stats.get('requests_num', 0)} requests"
+                )
+
+    def _measure(self, wrapper: BaseDatabaseWrapper, count: int) -> list[float]:
+        latencies = []
+        for _ in range(count):
+            start = perf_counter()
+            # What the request_started and request_finished signals do
+            wrapper.close_if_unusable_or_obsolete()
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            wrapper.close_if_unusable_or_obsolete()
+            latencies.append(perf_counter() - start)
+        return latencies
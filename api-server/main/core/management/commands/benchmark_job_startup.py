@@ -0,0 +1,37 @@
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.core.import_profile import profile_job_startup
+
+
+class Command(BaseCommand):
+    help = "Measure how long a fresh process takes to get to the start of the jobs."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument(
+            "--settings-modules",
+            nargs="+",
+            default=["main.settings", "main.job_settings"],
+        )
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--top", type=int, default=10)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        for settings_module in options["settings_modules"]:
+            profiles = [
+                profile_job_startup(settings_module)
+                for _ in range(options["iterations"])
+            ]
+            self.stdout.write(
+                f"{settings_module:<20} | "
+                f"p50 {median(p.duration for p in profiles) * 1000:.0f}ms, "
+                f"{len(profiles[-1].modules)} modules"
+            )
+            for record in profiles[-1].slowest(options["top"]):
+                self.stdout.write(
+                    f"    {record.module:<40} {record.cumulative_us / 1000:>8.1f}ms"
+                )
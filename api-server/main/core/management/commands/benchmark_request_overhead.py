@@ -0,0 +1,119 @@
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from statistics import median, quantiles
+from time import perf_counter
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+from jose import jwt
+from jose.constants import ALGORITHMS
+
+from main.account import AUTH_COOKIE_NAME, OAuthOrganization
+from main.account.middleware import check_login_status_middleware
+from main.account.models import User
+from main.core.decorators.auth import require_login
+from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse
+from main.env import Env, env
+
+UNLIMITED_RATE = 1e9
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of the login middleware, rate_limit and "
+        "require_login around an empty view, sync and async."
+    )
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--requests", type=int, default=2_000)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if env.ENV == Env.PROD:
+            raise CommandError("Benchmarks must not be run in production.")
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2.")
+
+        @rate_limit(rate=UNLIMITED_RATE)
+        @require_login
+        def sync_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({})
+
+        @rate_limit(rate=UNLIMITED_RATE)
+        @require_login
+        async def async_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({})
+
+        sync_handler = check_login_status_middleware(sync_view)
+        async_handler = check_login_status_middleware(async_view)
+
+        # Everything written by the benchmark is rolled back
+        with transaction.atomic():
+            user = User.objects.create_user(
+                oauth_org=OAuthOrganization.GOOGLE,
+                oauth_id="benchmark",
+                email="benchmark@example.com",
+                username="Benchmark",
+            )
+            self.token = jwt.encode(
+                {
+                    "id": str(user.id),
+                    "exp": int((datetime.now() + timedelta(hours=1)).timestamp()),
+                },
+                key=settings.SECRET_KEY,
+                algorithm=ALGORITHMS.HS256,
+            )
+            # `async_to_sync` runs the ORM calls of the async code in this thread,
+            # i.e. in the transaction the user was created in
+            results = {
+                "sync": self._measure(sync_handler, options["requests"]),
+                # What ASGI did when the middleware was sync-only
+                "sync in a thread": async_to_sync(self._ameasure)(
+                    sync_to_async(sync_handler), options["requests"]
+                ),
+                "async": async_to_sync(self._ameasure)(
+                    async_handler, options["requests"]
+                ),
+            }
+            transaction.set_rollback(True)
+
+        for name, latencies in results.items():
+            self.stdout.write(
+                f"{name:<16} | p50 {median(latencies) * 1e6:.0f}µs, "
+                f"p95 {quantiles(latencies, n=20)[-1] * 1e6:.0f}µs"
+            )
+
+    def _request(self) -> HttpRequest:
+        request = RequestFactory().get("/api/benchmark")
+        request.COOKIES[AUTH_COOKIE_NAME] = self.token
+        return request
+
+    def _measure(
+        self, handler: Callable[[HttpRequest], HttpResponse], count: int
+    ) -> list[float]:
+        latencies = []
+        for _ in range(count):
+            request = self._request()
+            start = perf_counter()
+            response = handler(request)
+            latencies.append(perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f"Unexpected status {response.status_code}.")
+        return latencies
+
+    async def _ameasure(
+        self, handler: Callable[[HttpRequest], Awaitable[HttpResponse]], count: int
+    ) -> list[float]:
+        latencies = []
+        for _ in range(count):
+            request = self._request()
+            start = perf_counter()
+            response = await handler(request)
+            latencies.append(perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f"Unexpected status {response.status_code}.")
+        return latencies
@@ -1,13 +1,13 @@
 from datetime import timedelta
 
-from django.core.management.base import BaseCommand
 from django.db.models import OuterRef, Subquery
 from django.utils import timezone
 
+from main.core.management.base import JobCommand
 from main.core.models import DataChangeLog
 
 
-class Command(BaseCommand):
+class Command(JobCommand):
     help = "Delete data change logs older than the retention window."
 
     def add_arguments(self, parser) -> None:  # noqa: ANN001
@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from main.core.management.base import JobCommand
+from main.core.models import JobRun
+
+
+class Command(JobCommand):
+    help = "Delete job runs older than the retention window."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        deleted_count, _ = JobRun.objects.filter(started_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted_count} job runs.")
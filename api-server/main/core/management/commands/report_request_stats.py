@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.core.request_metrics import (
+    get_request_profiles,
+    get_request_stats,
+    get_routes,
+    histogram_percentile,
+)
+
+SORT_KEYS = {
+    "avg": lambda stats: stats["avg_duration_ms"],
+    "total": lambda stats: stats["avg_duration_ms"] * stats["requests"],
+    "requests": lambda stats: stats["requests"],
+}
+
+
+class Command(BaseCommand):
+    help = "Print the slowest routes of the API server, from the metrics in Redis."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--sort", choices=SORT_KEYS, default="avg")
+        parser.add_argument(
+            "--profiles",
+            action="store_true",
+            help="Also print the latest sampled profile of each route.",
+        )
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if options["limit"] < 1:
+            raise CommandError("--limit must be at least 1.")
+
+        all_stats = {route: get_request_stats(route) for route in get_routes()}
+        if not all_stats:
+            self.stdout.write("No requests recorded yet.")
+            return
+        routes = sorted(
+            all_stats, key=lambda r: SORT_KEYS[options["sort"]](all_stats[r])
+        )[::-1][: options["limit"]]
+        for route in routes:
+            stats = all_stats[route]
+            histogram = stats["duration_histogram"]
+            self.stdout.write(
+                f"{route:<50} | {stats['requests']:>7} requests | "
+                f"avg {stats['avg_duration_ms']:.1f}ms, "
+                f"p50 ≤{histogram_percentile(histogram, 0.5)}ms, "
+                f"p95 ≤{histogram_percentile(histogram, 0.95)}ms | "
+                f"db {stats['avg_db_queries']:.1f} queries "
+                f"{stats['avg_db_ms']:.1f}ms | "
+                f"redis {stats['avg_redis_calls']:.1f} calls "
+                f"{stats['avg_redis_ms']:.1f}ms | "
+                f"{stats['avg_response_bytes']:.0f}B"
+            )
+            if options["profiles"] and (profiles := get_request_profiles(route)):
+                self.stdout.write(profiles[0])
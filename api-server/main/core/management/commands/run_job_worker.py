@@ -0,0 +1,24 @@
+import signal
+import threading
+
+from django.core.management.base import CommandError
+
+from main.core.job_worker import JobWorker
+from main.core.management.base import JobCommand
+
+
+class Command(JobCommand):
+    help = "Run the jobs enqueued by the scheduler in a long-lived process."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--concurrency", type=int, default=4)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        stop_event = threading.Event()
+        # Let the jobs in progress finish
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        JobWorker(options["concurrency"]).run(stop_event)
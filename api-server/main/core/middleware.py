@@ -0,0 +1,102 @@
+import random
+from collections.abc import Callable
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+from main.account.models import User
+from main.core.request_metrics import (
+    RequestMetrics,
+    RequestRecord,
+    collect_request_metrics,
+    format_profile,
+    install_request_instrumentation,
+    profile,
+    record_request_later,
+    server_timing,
+)
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(
+    get_response: Callable[..., HttpResponse],
+) -> Callable:
+    install_request_instrumentation()
+    if iscoroutinefunction(get_response):
+
+        async def async_middleware(request: HttpRequest) -> HttpResponse:
+            if not settings.REQUEST_METRICS_ENABLED:
+                return await get_response(request)
+            start = perf_counter()
+            profile_text = None
+            with collect_request_metrics() as metrics:
+                if _should_profile():
+                    # Also covers the other requests the event loop runs meanwhile
+                    with profile() as profiler:
+                        response = await get_response(request)
+                    if profiler is not None:
+                        profile_text = format_profile(profiler)
+                else:
+                    response = await get_response(request)
+            duration = perf_counter() - start
+            _record(request, response, metrics, duration, profile_text)
+            return _add_server_timing(request, response, metrics, duration)
+
+        return async_middleware
+
+    def middleware(request: HttpRequest) -> HttpResponse:
+        if not settings.REQUEST_METRICS_ENABLED:
+            return get_response(request)
+        start = perf_counter()
+        profile_text = None
+        with collect_request_metrics() as metrics:
+            if _should_profile():
+                with profile() as profiler:
+                    response = get_response(request)
+                if profiler is not None:
+                    profile_text = format_profile(profiler)
+            else:
+                response = get_response(request)
+        duration = perf_counter() - start
+        _record(request, response, metrics, duration, profile_text)
+        return _add_server_timing(request, response, metrics, duration)
+
+    return middleware
+
+
+def _should_profile() -> bool:
+    return random.random() < settings.REQUEST_PROFILE_SAMPLE_RATE  # noqa: S311
+
+
+def _record(
+    request: HttpRequest,
+    response: HttpResponse,
+    metrics: RequestMetrics,
+    duration: float,
+    profile_text: str | None,
+) -> None:
+    # Unknown paths are not recorded, so that scanners can't add routes
+    if (match := getattr(request, "resolver_match", None)) is None:
+        return
+    size = 0 if response.streaming else len(response.content)
+    record_request_later(
+        RequestRecord(match.view_name, metrics, duration, size, profile_text)
+    )
+
+
+def _add_server_timing(
+    request: HttpRequest,
+    response: HttpResponse,
+    metrics: RequestMetrics,
+    duration: float,
+) -> HttpResponse:
+    # The timings tell how the data is stored, so only superusers see them.
+    # `check_login_status_middleware` replaces the lazy user of Django with a
+    # `User` or None, and comparing the type doesn't evaluate a lazy one.
+    user = getattr(request, "user", None)
+    if settings.DEBUG or (type(user) is User and user.is_superuser):
+        response["Server-Timing"] = server_timing(metrics, duration)
+    return response
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=32, unique=True)),
+                ('name', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped')], max_length=16)),
+                ('worker', models.CharField(max_length=64)),
+                ('enqueued_at', models.DateTimeField()),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(null=True)),
+                ('duration', models.FloatField(null=True)),
+                ('error', models.TextField(db_default='')),
+            ],
+            options={
+                'db_table': 'job_run',
+                'indexes': [models.Index(fields=['name', '-started_at'], name='job_run_name_started_at_idx')],
+            },
+        ),
+    ]
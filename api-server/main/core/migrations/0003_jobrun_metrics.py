@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_jobrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobrun',
+            name='http_calls',
+            field=models.PositiveIntegerField(db_default=0),
+        ),
+        migrations.AddField(
+            model_name='jobrun',
+            name='rows_written',
+            field=models.PositiveIntegerField(db_default=0),
+        ),
+        migrations.AlterField(
+            model_name='jobrun',
+            name='status',
+            field=models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped'), ('missed', 'Missed')], max_length=16),
+        ),
+    ]
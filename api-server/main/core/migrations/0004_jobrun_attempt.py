@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_jobrun_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobrun',
+            name='attempt',
+            field=models.PositiveSmallIntegerField(db_default=1),
+        ),
+        migrations.AlterField(
+            model_name='jobrun',
+            name='job_id',
+            field=models.CharField(max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='jobrun',
+            name='status',
+            field=models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('skipped', 'Skipped'), ('missed', 'Missed'), ('abandoned', 'Abandoned')], max_length=16),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobrun',
+            unique_together={('job_id', 'attempt')},
+        ),
+    ]
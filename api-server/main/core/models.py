@@ -44,3 +44,43 @@ class DataChangeLog(models.Model):
                 name="data_change_log_created_at_idx",
             ),
         ]
+
+
+class JobRun(models.Model):
+    class Status(models.TextChoices):
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+        # Not run because the job had as many runs in progress as it allows
+        SKIPPED = "skipped", "Skipped"
+        # Not run because it waited in the queue longer than its grace time
+        MISSED = "missed", "Missed"
+        # Its worker stopped before the run was over, and the job was requeued
+        ABANDONED = "abandoned", "Abandoned"
+
+    job_id = models.CharField(max_length=32)
+    # Runs of a requeued job share its `job_id`
+    attempt = models.PositiveSmallIntegerField(db_default=1)
+    name = models.CharField(max_length=64)
+    status = models.CharField(max_length=16, choices=Status.choices)
+    worker = models.CharField(max_length=64)
+    enqueued_at = models.DateTimeField()
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True)
+    duration = models.FloatField(null=True)  # In seconds
+    rows_written = models.PositiveIntegerField(db_default=0)
+    http_calls = models.PositiveIntegerField(db_default=0)
+    error = models.TextField(db_default="")
+
+    class Meta:
+        db_table = "job_run"
+        unique_together = [["job_id", "attempt"]]
+        indexes = [
+            models.Index(
+                fields=["name", "-started_at"],
+                name="job_run_name_started_at_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name}({self.started_at}, {self.status})"
@@ -0,0 +1,41 @@
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+
+
+class RequestPacer:
+    """Spaces out requests sent to the same host across threads."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_allowed_at = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = monotonic()
+            wait_seconds = max(0.0, self._next_allowed_at - now)
+            self._next_allowed_at = max(now, self._next_allowed_at) + self.interval
+        if wait_seconds:
+            sleep(wait_seconds)
+
+
+class HostRequestPacer:
+    """A `RequestPacer` for each host, picked by the URL about to be requested."""
+
+    def __init__(
+        self, default_interval: float, intervals: dict[str, float] | None = None
+    ) -> None:
+        self.default_interval = default_interval
+        self.intervals = intervals or {}
+        self._lock = threading.Lock()
+        self._pacers: dict[str, RequestPacer] = {}
+
+    def wait(self, url: str) -> None:
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            if (pacer := self._pacers.get(host)) is None:
+                pacer = self._pacers[host] = RequestPacer(
+                    self.intervals.get(host, self.default_interval)
+                )
+        pacer.wait()
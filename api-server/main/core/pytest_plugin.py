@@ -0,0 +1,42 @@
+"""The query budget marker and fixture, see `main.core.query_budget`."""
+
+from collections.abc import Callable, Generator
+from typing import Any
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpRequest, HttpResponse
+
+from main.core.query_budget import assert_query_budget, get_query_budget
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries): fail the test if its body runs more queries, "
+        "or possible N+1 queries",
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: pytest.Item) -> Generator[None, Any, Any]:
+    # Around the test body only, so that the queries of its fixtures don't count
+    if (marker := item.get_closest_marker("query_budget")) is None:
+        return (yield)
+    with assert_query_budget(*marker.args, **marker.kwargs):
+        return (yield)
+
+
+@pytest.fixture
+def assert_view_query_budget() -> Callable[..., HttpResponse]:
+    """Call a view, sync or async, and fail if it goes over its `query_budget`."""
+
+    def call(view: Callable, request: HttpRequest, *args, **kwargs) -> HttpResponse:  # noqa: ANN002, ANN003
+        if (budget := get_query_budget(view)) is None:
+            pytest.fail(f"{view.__qualname__} declares no query budget.")
+        with assert_query_budget(budget):
+            if iscoroutinefunction(view):
+                return async_to_sync(view)(request, *args, **kwargs)
+            return view(request, *args, **kwargs)
+
+    return call
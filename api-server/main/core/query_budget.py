@@ -0,0 +1,78 @@
+"""
+Catch views that query the database more than they should: more queries than
+their `query_budget`, or the same query over and over with different values,
+which is what a missing `select_related`/`prefetch_related` looks like.
+"""
+
+import re
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# How many times the same query may run in one block before it counts as N+1
+REPEAT_THRESHOLD = 3
+# Nested `transaction.atomic` blocks run these, but only within the transaction
+# every test runs in, so they would make the counts differ from production
+_SAVEPOINT_STATEMENT = re.compile(
+    r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.IGNORECASE
+)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\((?:\s*\?\s*,)*\s*\?\s*\)")
+
+
+class QueryBudgetExceededError(AssertionError):
+    pass
+
+
+def normalize_sql(sql: str) -> str:
+    """The query with its values replaced, so that repetitions of it are equal."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _VALUE_LIST.sub("(...)", sql)
+
+
+def find_repeated_queries(
+    queries: list[str], threshold: int = REPEAT_THRESHOLD
+) -> dict[str, int]:
+    """The normalized queries run at least `threshold` times, and how many times."""
+    counts = Counter(map(normalize_sql, queries))
+    return {sql: count for sql, count in counts.items() if count >= threshold}
+
+
+def get_query_budget(view: Callable) -> int | None:
+    return getattr(view, "query_budget", None)
+
+
+@contextmanager
+def assert_query_budget(
+    max_queries: int,
+    repeat_threshold: int = REPEAT_THRESHOLD,
+    using: str = DEFAULT_DB_ALIAS,
+) -> Iterator[list[str]]:
+    """
+    Fail if the block runs more than `max_queries` queries, or the same query
+    `repeat_threshold` times or more. Yields the queries run, once the block is
+    over.
+    """
+    queries: list[str] = []
+    with CaptureQueriesContext(connections[using]) as context:
+        yield queries
+    queries.extend(
+        query["sql"]
+        for query in context.captured_queries
+        if not _SAVEPOINT_STATEMENT.match(query["sql"])
+    )
+    if len(queries) > max_queries:
+        raise QueryBudgetExceededError(
+            f"{len(queries)} queries were run, over the budget of {max_queries}:\n"
+            + "\n".join(f"{i}. {sql}" for i, sql in enumerate(queries, start=1))
+        )
+    if repeated := find_repeated_queries(queries, repeat_threshold):
+        raise QueryBudgetExceededError(
+            "Possible N+1 queries:\n"
+            + "\n".join(f"{count}x {sql}" for sql, count in repeated.items())
+        )
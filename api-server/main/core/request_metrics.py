@@ -0,0 +1,285 @@
+"""
+Where the time of each request goes: its database queries, its Redis calls and
+the rest. `request_metrics_middleware` collects the metrics of a request, sends
+them back in a `Server-Timing` header to superusers, and adds them to the stats
+of its route in Redis, which `report_request_stats` prints.
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from itertools import accumulate
+from time import perf_counter
+from typing import Any, NamedTuple
+
+import redis.client
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from redis.exceptions import RedisError
+
+from main.core.cache import get_redis_connection, redis_call_timer
+
+logger = logging.getLogger(__name__)
+
+ROUTES_KEY = "requests:routes"
+STATS_KEY_PREFIX = "requests:stats:"
+PROFILES_KEY_PREFIX = "requests:profiles:"
+PROFILES_KEPT = 20
+PROFILE_LINES = 30
+# Upper bounds (in milliseconds) of the buckets of the route duration histograms
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Requests waiting to be recorded, beyond which new ones are dropped, e.g. while
+# Redis is down
+RECORD_QUEUE_SIZE = 10_000
+RECORD_BATCH_SIZE = 100
+
+
+@dataclass
+class RequestMetrics:
+    db_queries: int = 0
+    db_time: float = 0  # In seconds, as are the other times
+    redis_calls: int = 0
+    redis_time: float = 0
+    # Async views run their ORM calls in other threads
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_query(self, duration: float) -> None:
+        with self._lock:
+            self.db_queries += 1
+            self.db_time += duration
+
+    def add_redis_call(self, duration: float) -> None:
+        with self._lock:
+            self.redis_calls += 1
+            self.redis_time += duration
+
+
+_current_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    "request_metrics", default=None
+)
+_instrumentation_lock = threading.Lock()
+_instrumented = False
+
+
+@contextmanager
+def collect_request_metrics() -> Iterator[RequestMetrics]:
+    """
+    Count the queries and Redis calls made within the block, and the time they
+    took. Redis calls are those of the clients of `main.core.cache`, and queries
+    are not counted before `install_request_instrumentation` is called.
+    """
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    timer_token = redis_call_timer.set(metrics.add_redis_call)
+    try:
+        yield metrics
+    finally:
+        redis_call_timer.reset(timer_token)
+        _current_metrics.reset(token)
+
+
+def install_request_instrumentation() -> None:
+    """Time every database query."""
+    global _instrumented
+    with _instrumentation_lock:
+        if _instrumented:
+            return
+        connection_created.connect(_add_query_timer, dispatch_uid=__name__)
+        _instrumented = True
+
+
+def _add_query_timer(
+    sender: type,
+    connection: BaseDatabaseWrapper,
+    **kwargs,  # noqa: ANN003
+) -> None:
+    # The signal is sent again whenever the wrapper reconnects
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _time_query(
+    execute: Callable,
+    sql: str,
+    params: Any,  # noqa: ANN401
+    many: bool,
+    context: dict[str, Any],
+) -> Any:  # noqa: ANN401
+    if (metrics := _current_metrics.get()) is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(perf_counter() - start)
+
+
+def server_timing(metrics: RequestMetrics, duration: float) -> str:
+    """The value of the `Server-Timing` header of a request."""
+    return ", ".join(
+        [
+            f"total;dur={duration * 1000:.1f}",
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+            (
+                f"redis;dur={metrics.redis_time * 1000:.1f};"
+                f'desc="{metrics.redis_calls} calls"'
+            ),
+        ]
+    )
+
+
+@contextmanager
+def profile() -> Iterator[cProfile.Profile | None]:
+    """
+    Profile the block in this thread. Yields None if another profiler is already
+    active in it, e.g. that of another request on the same event loop.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        yield None
+        return
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def format_profile(profiler: cProfile.Profile) -> str:
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(
+        PROFILE_LINES
+    )
+    return stream.getvalue()
+
+
+class RequestRecord(NamedTuple):
+    route: str
+    metrics: RequestMetrics
+    duration: float  # In seconds
+    response_size: int
+    profile_text: str | None = None
+
+
+def _queue_request_record(
+    pipeline: redis.client.Pipeline, record: RequestRecord
+) -> None:
+    key = f"{STATS_KEY_PREFIX}{record.route}"
+    duration_ms = record.duration * 1000
+    bucket = next((str(b) for b in DURATION_BUCKETS if duration_ms <= b), "+Inf")
+    pipeline.sadd(ROUTES_KEY, record.route)
+    pipeline.hincrby(key, "requests", 1)
+    pipeline.hincrbyfloat(key, "duration_ms", duration_ms)
+    pipeline.hincrby(key, "db_queries", record.metrics.db_queries)
+    pipeline.hincrbyfloat(key, "db_ms", record.metrics.db_time * 1000)
+    pipeline.hincrby(key, "redis_calls", record.metrics.redis_calls)
+    pipeline.hincrbyfloat(key, "redis_ms", record.metrics.redis_time * 1000)
+    pipeline.hincrby(key, "response_bytes", record.response_size)
+    pipeline.hincrby(f"{key}:duration", bucket, 1)
+    if record.profile_text is not None:
+        profiles_key = f"{PROFILES_KEY_PREFIX}{record.route}"
+        pipeline.lpush(profiles_key, record.profile_text)
+        pipeline.ltrim(profiles_key, 0, PROFILES_KEPT - 1)
+
+
+def record_requests(records: list[RequestRecord]) -> None:
+    """Add requests to their routes' counters and duration histograms."""
+    pipeline = get_redis_connection().pipeline(transaction=False)
+    for record in records:
+        _queue_request_record(pipeline, record)
+    pipeline.execute()
+
+
+_record_queue: queue.Queue[RequestRecord] = queue.Queue(RECORD_QUEUE_SIZE)
+_recorder_lock = threading.Lock()
+_recorder: threading.Thread | None = None
+
+
+def record_request_later(record: RequestRecord) -> None:
+    """
+    Queue a request to be recorded by a background thread, so that the response
+    doesn't wait for Redis. The thread writes the queued requests in batches.
+    """
+    global _recorder
+    if _recorder is None or not _recorder.is_alive():
+        with _recorder_lock:
+            # Started lazily, i.e. in every process the server forks
+            if _recorder is None or not _recorder.is_alive():
+                _recorder = threading.Thread(
+                    target=_run_recorder,
+                    args=(_record_queue,),
+                    name="request-recorder",
+                    daemon=True,
+                )
+                _recorder.start()
+    try:
+        _record_queue.put_nowait(record)
+    except queue.Full:
+        logger.warning(f"Dropped the request metrics of {record.route}.")
+
+
+def _run_recorder(records_to_write: queue.Queue[RequestRecord]) -> None:
+    while True:
+        records = [records_to_write.get()]
+        with suppress(queue.Empty):
+            while len(records) < RECORD_BATCH_SIZE:
+                records.append(records_to_write.get_nowait())
+        try:
+            record_requests(records)
+        except RedisError as e:
+            logger.warning(f"Failed to record request metrics: {e}")
+
+
+def get_routes() -> list[str]:
+    return sorted(get_redis_connection().smembers(ROUTES_KEY))
+
+
+def get_request_stats(route: str) -> dict:
+    redis_connection = get_redis_connection()
+    key = f"{STATS_KEY_PREFIX}{route}"
+    counters = redis_connection.hgetall(key)
+    histogram = redis_connection.hgetall(f"{key}:duration")
+    labels = [*map(str, DURATION_BUCKETS), "+Inf"]
+    requests = int(counters.get("requests", 0))
+    return {
+        "requests": requests,
+        **{
+            f"avg_{name}": float(counters.get(name, 0)) / requests if requests else 0
+            for name in (
+                "duration_ms",
+                "db_queries",
+                "db_ms",
+                "redis_calls",
+                "redis_ms",
+                "response_bytes",
+            )
+        },
+        # Cumulative, i.e. the number of requests that took at most each bound
+        "duration_histogram": dict(
+            zip(
+                labels,
+                accumulate(int(histogram.get(label, 0)) for label in labels),
+                strict=True,
+            )
+        ),
+    }
+
+
+def histogram_percentile(histogram: dict[str, int], q: float) -> str | None:
+    """The upper bound of the bucket that the `q` quantile falls into."""
+    if not histogram or (total := list(histogram.values())[-1]) == 0:
+        return None
+    return next(label for label, count in histogram.items() if count >= q * total)
+
+
+def get_request_profiles(route: str) -> list[str]:
+    """The latest profiles of the route, newest first."""
+    return get_redis_connection().lrange(f"{PROFILES_KEY_PREFIX}{route}", 0, -1)
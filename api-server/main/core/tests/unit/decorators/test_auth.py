@@ -1,12 +1,14 @@
 # ruff: noqa: ANN401
+import json
 from unittest.mock import Mock
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.http import HttpRequest, JsonResponse
 
 from main.account import OAuthOrganization
 from main.account.models import User
-from main.core.decorators.auth import require_login
+from main.core.decorators.auth import require_login, require_superuser
 
 
 @pytest.mark.django_db
@@ -64,3 +66,49 @@ class TestRequireLoginDecorator:
 
         response_data = json.loads(response.content.decode("utf-8"))
         assert response_data["message"] == "Login Required"
+
+    def test_require_login_async_view(
+        self,
+        authenticated_request: HttpRequest,
+        unauthenticated_request: HttpRequest,
+    ) -> None:
+        @require_login
+        async def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"message": "success"})
+
+        assert async_to_sync(test_view)(authenticated_request).status_code == 200
+        assert async_to_sync(test_view)(unauthenticated_request).status_code == 401
+
+
+@pytest.mark.django_db
+class TestRequireSuperuserDecorator:
+    @staticmethod
+    def _request(is_superuser: bool) -> HttpRequest:
+        request = HttpRequest()
+        request.user = User.objects.create_user(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="test_oauth_id",
+            email="test@example.com",
+            username="Test User",
+            is_superuser=is_superuser,
+        )
+        return request
+
+    def test_require_superuser_with_superuser(self) -> None:
+        @require_superuser
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"message": "success"})
+
+        response = test_view(self._request(is_superuser=True))
+
+        assert response.status_code == 200
+
+    def test_require_superuser_with_regular_user(self) -> None:
+        @require_superuser
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"message": "success"})
+
+        response = test_view(self._request(is_superuser=False))
+
+        assert response.status_code == 403
+        assert json.loads(response.content)["message"] == "Permission Denied"
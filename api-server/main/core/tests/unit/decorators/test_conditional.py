@@ -0,0 +1,95 @@
+from unittest.mock import Mock
+
+from asgiref.sync import async_to_sync
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+
+from main.core.decorators.conditional import etag
+from main.core.http import JsonResponse
+
+
+class TestEtagDecorator:
+    def test_sets_the_etag_of_full_responses(self) -> None:
+        @etag(lambda request: "abc")
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"data": []})
+
+        response = test_view(RequestFactory().get("/"))
+
+        assert response.status_code == 200
+        assert response["ETag"] == '"abc"'
+        assert "private" in response["Cache-Control"]
+        assert "no-cache" in response["Cache-Control"]
+
+    def test_not_modified_without_running_the_view(self) -> None:
+        view = Mock()
+
+        @etag(lambda request: "abc")
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return view(request)
+
+        response = test_view(RequestFactory().get("/", HTTP_IF_NONE_MATCH='"abc"'))
+
+        assert response.status_code == 304
+        assert response["ETag"] == '"abc"'
+        view.assert_not_called()
+
+    def test_modified(self) -> None:
+        @etag(lambda request: "def")
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"data": []})
+
+        response = test_view(RequestFactory().get("/", HTTP_IF_NONE_MATCH='"abc"'))
+
+        assert response.status_code == 200
+        assert response["ETag"] == '"def"'
+
+    def test_weak_etags_match(self) -> None:
+        @etag(lambda request: "abc")
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"data": []})
+
+        # e.g. after a proxy compressed the response
+        response = test_view(RequestFactory().get("/", HTTP_IF_NONE_MATCH='W/"abc"'))
+
+        assert response.status_code == 304
+
+    def test_other_methods_skip_the_etag(self) -> None:
+        etag_func = Mock(return_value="abc")
+
+        @etag(etag_func)
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"id": 1})
+
+        response = test_view(RequestFactory().post("/", HTTP_IF_NONE_MATCH='"abc"'))
+
+        assert response.status_code == 200
+        assert not response.has_header("ETag")
+        etag_func.assert_not_called()
+
+    def test_error_responses_have_no_etag(self) -> None:
+        @etag(lambda request: "abc")
+        def test_view(request: HttpRequest) -> HttpResponse:
+            return JsonResponse({"message": "Bad Request"}, status=400)
+
+        response = test_view(RequestFactory().get("/"))
+
+        assert response.status_code == 400
+        assert not response.has_header("ETag")
+
+    def test_async_view(self) -> None:
+        async def etag_func(request: HttpRequest) -> str:
+            return "abc"
+
+        @etag(etag_func)
+        async def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"data": []})
+
+        response = async_to_sync(test_view)(RequestFactory().get("/"))
+        assert response.status_code == 200
+        assert response["ETag"] == '"abc"'
+
+        response = async_to_sync(test_view)(
+            RequestFactory().get("/", HTTP_IF_NONE_MATCH='"abc"')
+        )
+        assert response.status_code == 304
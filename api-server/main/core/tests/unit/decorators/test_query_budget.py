@@ -0,0 +1,21 @@
+from django.http import HttpRequest, JsonResponse
+
+from main.core.decorators.auth import require_login
+from main.core.decorators.query_budget import query_budget
+from main.core.query_budget import get_query_budget
+
+
+class TestQueryBudgetDecorator:
+    def test_query_budget(self) -> None:
+        @query_budget(3)
+        @require_login
+        def view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({})
+
+        assert get_query_budget(view) == 3
+
+    def test_no_query_budget(self) -> None:
+        def view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({})
+
+        assert get_query_budget(view) is None
@@ -1,13 +1,16 @@
 # ruff: noqa: ANN401
 import json
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
 from django.http import HttpRequest, JsonResponse
+from pytest_django.fixtures import SettingsWrapper
 
 from main.account import OAuthOrganization
 from main.account.models import User
-from main.core.decorators.rate_limit import rate_limit
+from main.core.cache import get_redis_connection
+from main.core.decorators.rate_limit import async_lua_script, rate_limit
 
 
 @pytest.mark.django_db
@@ -245,3 +248,71 @@ class TestRateLimitDecorator:
         assert call1_key != call2_key
         assert f":{authenticated_user.id}" in call1_key
         assert f":{user2.id}" in call2_key
+
+    @patch("main.core.decorators.rate_limit.LUA_SCRIPT")
+    @patch("main.core.decorators.rate_limit.async_lua_script")
+    def test_rate_limit_async_view(
+        self,
+        mock_async_lua_script: AsyncMock,
+        mock_lua_script: Mock,
+        authenticated_request: HttpRequest,
+    ) -> None:
+        mock_async_lua_script.side_effect = [1, 0]
+
+        @rate_limit(rate=10.0, capacity=20)
+        async def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"message": "success"})
+
+        assert iscoroutinefunction(test_view)
+        assert async_to_sync(test_view)(authenticated_request).status_code == 200
+        assert async_to_sync(test_view)(authenticated_request).status_code == 429
+        expected_key = f"rate_limit:GET:/api/test:{authenticated_request.user.id}"
+        assert mock_async_lua_script.call_args.kwargs["keys"] == [expected_key]
+        mock_lua_script.assert_not_called()
+
+    @patch("main.core.decorators.rate_limit.LUA_SCRIPT")
+    def test_rate_limit_disabled(
+        self,
+        mock_lua_script: Mock,
+        authenticated_request: HttpRequest,
+        settings: SettingsWrapper,
+    ) -> None:
+        settings.RATE_LIMIT_ENABLED = False
+
+        @rate_limit(rate=10.0, capacity=20)
+        def test_view(request: HttpRequest) -> JsonResponse:
+            return JsonResponse({"message": "success"})
+
+        assert test_view(authenticated_request).status_code == 200
+        mock_lua_script.assert_not_called()
+
+
+class TestAsyncLuaScript:
+    def test_token_bucket(self) -> None:
+        key = "rate_limit:GET:/api/test:async"
+        get_redis_connection().delete(key)
+
+        results = [
+            async_to_sync(async_lua_script)(keys=[key], args=[0.001, 2])
+            for _ in range(3)
+        ]
+
+        assert results == [1, 1, 0]
+
+    @patch("main.core.decorators.rate_limit.get_async_redis_connection")
+    def test_registers_the_script_once_per_event_loop(
+        self, mock_get_async_redis_connection: Mock
+    ) -> None:
+        script = AsyncMock(return_value=1)
+        mock_get_async_redis_connection.return_value.register_script.return_value = (
+            script
+        )
+
+        async def call_twice() -> None:
+            await async_lua_script(keys=["key"], args=[1, 1])
+            await async_lua_script(keys=["key"], args=[1, 1])
+
+        async_to_sync(call_twice)()
+
+        mock_get_async_redis_connection.return_value.register_script.assert_called_once()
+        assert script.await_count == 2
@@ -0,0 +1,117 @@
+from datetime import date
+
+import pytest
+
+from main.core.bulk import BulkUpsertResult, bulk_upsert
+from main.market import Frequency
+from main.market.models import Company, History
+
+HISTORY_FIELDS = ["company_id", "frequency", "date", "quantity", "close_price"]
+HISTORY_UNIQUE_FIELDS = ["company_id", "frequency", "date"]
+
+
+@pytest.mark.django_db
+class TestBulkUpsert:
+    @pytest.fixture(autouse=True)
+    def company(self) -> Company:
+        return Company.objects.create(stock_id="1234", name="Test Company")
+
+    def test_bulk_upsert_inserts_rows(self) -> None:
+        result = bulk_upsert(
+            History,
+            HISTORY_FIELDS,
+            [
+                ("1234", Frequency.DAILY, date(2024, 1, 2), 1000, 100.0),
+                ("1234", Frequency.DAILY, date(2024, 1, 3), 2000, 101.5),
+            ],
+            unique_fields=HISTORY_UNIQUE_FIELDS,
+            update_fields=["quantity", "close_price"],
+        )
+
+        assert result == BulkUpsertResult(inserted=2, updated=0)
+        history = History.objects.get(date=date(2024, 1, 3))
+        assert history.quantity == 2000
+        assert history.close_price == 101.5
+        # auto_now and auto_now_add fields are filled by the database
+        assert history.created_at is not None
+        assert history.updated_at is not None
+
+    def test_bulk_upsert_updates_conflicting_rows(self) -> None:
+        history = History.objects.create(
+            company_id="1234",
+            frequency=Frequency.DAILY,
+            date=date(2024, 1, 2),
+            quantity=1000,
+            close_price=100.0,
+        )
+
+        result = bulk_upsert(
+            History,
+            HISTORY_FIELDS,
+            [("1234", Frequency.DAILY, date(2024, 1, 2), 3000, 99.0)],
+            unique_fields=HISTORY_UNIQUE_FIELDS,
+            update_fields=["quantity", "close_price"],
+        )
+
+        assert result == BulkUpsertResult(inserted=0, updated=1)
+        updated_history = History.objects.get(pk=history.pk)
+        assert updated_history.quantity == 3000
+        assert updated_history.close_price == 99.0
+        assert updated_history.created_at == history.created_at
+        assert updated_history.updated_at > history.updated_at
+
+    def test_bulk_upsert_ignores_conflicts_without_update_fields(self) -> None:
+        History.objects.create(
+            company_id="1234",
+            frequency=Frequency.DAILY,
+            date=date(2024, 1, 2),
+            quantity=1000,
+            close_price=100.0,
+        )
+
+        result = bulk_upsert(
+            History,
+            HISTORY_FIELDS,
+            [("1234", Frequency.DAILY, date(2024, 1, 2), 3000, 99.0)],
+            unique_fields=HISTORY_UNIQUE_FIELDS,
+        )
+
+        assert result == BulkUpsertResult(inserted=0, updated=0)
+        assert History.objects.get().quantity == 1000
+
+    def test_bulk_upsert_keeps_last_duplicated_row(self) -> None:
+        result = bulk_upsert(
+            History,
+            HISTORY_FIELDS,
+            [
+                ("1234", Frequency.DAILY, date(2024, 1, 2), 1000, 100.0),
+                ("1234", Frequency.DAILY, date(2024, 1, 2), 2000, 102.0),
+            ],
+            unique_fields=HISTORY_UNIQUE_FIELDS,
+            update_fields=["quantity", "close_price"],
+        )
+
+        assert result == BulkUpsertResult(inserted=1, updated=0)
+        assert History.objects.get().close_price == 102.0
+
+    def test_bulk_upsert_skips_unknown_references(self) -> None:
+        result = bulk_upsert(
+            History,
+            HISTORY_FIELDS,
+            [
+                ("1234", Frequency.DAILY, date(2024, 1, 2), 1000, 100.0),
+                ("9999", Frequency.DAILY, date(2024, 1, 2), 1000, 100.0),
+            ],
+            unique_fields=HISTORY_UNIQUE_FIELDS,
+            skip_unknown_references=True,
+        )
+
+        assert result == BulkUpsertResult(inserted=1, updated=0)
+        assert list(History.objects.values_list("company_id", flat=True)) == ["1234"]
+
+    def test_bulk_upsert_with_no_rows(self) -> None:
+        result = bulk_upsert(
+            History, HISTORY_FIELDS, [], unique_fields=HISTORY_UNIQUE_FIELDS
+        )
+
+        assert result == BulkUpsertResult(inserted=0, updated=0)
@@ -2,9 +2,11 @@ from typing import Self
 from unittest.mock import Mock, patch
 
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
 from pydantic import BaseModel, ValidationError
 
-from main.core.cache import BaseCacheManager
+from main.core.cache import BaseCacheManager, acache_get, acache_set
 
 
 class ValueModelForTesting(BaseModel):
@@ -124,3 +126,35 @@ class TestBaseCacheManager:
 
         # Verify cache.set was never called due to validation failure
         mock_cache.set.assert_not_called()
+
+
+class TestAsyncCache:
+    class ConcreteCacheManager(BaseCacheManager[ValueModelForTesting]):
+        pass
+
+    @pytest.fixture(autouse=True)
+    def clear_keys(self) -> None:
+        cache.delete_many(["ConcreteCacheManager:async", "async_version"])
+
+    def test_aget_reads_what_the_django_cache_wrote(self) -> None:
+        value = ValueModelForTesting(value="cached")
+        self.ConcreteCacheManager.set("async", value, 60)
+
+        assert async_to_sync(self.ConcreteCacheManager.aget)("async") == value
+
+    def test_django_cache_reads_what_aset_wrote(self) -> None:
+        value = ValueModelForTesting(value="cached")
+        async_to_sync(self.ConcreteCacheManager.aset)("async", value, 60)
+
+        assert self.ConcreteCacheManager.get("async") == value
+
+    def test_aget_miss(self) -> None:
+        assert async_to_sync(self.ConcreteCacheManager.aget)("async") is None
+        assert async_to_sync(acache_get)("async_version", 0) == 0
+
+    def test_integers_are_stored_as_is(self) -> None:
+        cache.set("async_version", 123, 60)
+        assert async_to_sync(acache_get)("async_version") == 123
+
+        async_to_sync(acache_set)("async_version", 456, 60)
+        assert cache.get("async_version") == 456
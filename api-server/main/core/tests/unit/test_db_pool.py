@@ -0,0 +1,19 @@
+import pytest
+from django.db import connection
+from psycopg_pool import ConnectionPool
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConnectionPool:
+    def test_queries_go_through_the_pool(self) -> None:
+        connection.close()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
+
+        assert isinstance(connection.pool, ConnectionPool)
+        assert connection.pool.get_stats()["requests_num"] >= 1
+
+    def test_connections_are_checked_on_checkout(self) -> None:
+        assert connection.pool._check == ConnectionPool.check_connection
@@ -0,0 +1,94 @@
+import json
+import uuid
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+import orjson
+import pytest
+from django.http import JsonResponse as DjangoJsonResponse
+from django.test import RequestFactory
+
+from main.core.http import JsonResponse, accepts_encoding
+
+
+class TestJsonResponse:
+    def test_is_a_django_json_response(self) -> None:
+        response = JsonResponse({"message": "OK"})
+
+        assert isinstance(response, DjangoJsonResponse)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert json.loads(response.content) == {"message": "OK"}
+
+    def test_serializes_dates_datetimes_and_uuids(self) -> None:
+        id = uuid.UUID("12345678-1234-5678-1234-567812345678")
+        response = JsonResponse(
+            {
+                "date": date(2024, 1, 2),
+                "date_time": datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC),
+                "id": id,
+            }
+        )
+
+        assert json.loads(response.content) == {
+            "date": "2024-01-02",
+            "date_time": "2024-01-02T03:04:05Z",
+            "id": str(id),
+        }
+
+    def test_falls_back_to_the_django_encoder(self) -> None:
+        response = JsonResponse({"price": Decimal("1.50")})
+
+        assert json.loads(response.content) == {"price": "1.50"}
+
+    def test_turns_non_string_keys_into_strings(self) -> None:
+        response = JsonResponse({1: 100.0, 2: 101.5})
+
+        assert json.loads(response.content) == {"1": 100.0, "2": 101.5}
+
+    def test_sends_bytes_as_is(self) -> None:
+        response = JsonResponse(b'{"data": []}', status=201)
+
+        assert response.content == b'{"data": []}'
+        assert response.status_code == 201
+
+    def test_embeds_fragments(self) -> None:
+        response = JsonResponse({"data": orjson.Fragment(b'[{"sid":"2330"}]')})
+
+        assert json.loads(response.content) == {"data": [{"sid": "2330"}]}
+
+    def test_rejects_non_dict_data_unless_unsafe(self) -> None:
+        with pytest.raises(TypeError):
+            JsonResponse([1, 2])
+
+        assert json.loads(JsonResponse([1, 2], safe=False).content) == [1, 2]
+
+    def test_rejects_unknown_types(self) -> None:
+        with pytest.raises(TypeError):
+            JsonResponse({"value": object()})
+
+
+class TestAcceptsEncoding:
+    @pytest.mark.parametrize(
+        ("accept_encoding", "expected"),
+        [
+            ("gzip, deflate, br", True),
+            ("GZIP", True),
+            ("br;q=1.0, gzip;q=0.5", True),
+            ("*", True),
+            ("gzip;q=0", False),
+            ("gzip; q=0.0, *", False),
+            ("*;q=0", False),
+            ("gzip;q=abc", False),
+            ("gzipped, br", False),
+            ("identity", False),
+            ("", False),
+        ],
+    )
+    def test_accepts_gzip(self, accept_encoding: str, expected: bool) -> None:
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+        assert accepts_encoding(request, "gzip") is expected
+
+    def test_without_accept_encoding(self) -> None:
+        assert accepts_encoding(RequestFactory().get("/"), "gzip") is False
@@ -0,0 +1,41 @@
+import pytest
+
+from main.core.import_profile import profile_job_startup
+
+# Only the web server needs these
+WEB_ONLY_MODULES = [
+    "google.oauth2",
+    "google_auth_oauthlib",
+    "oauthlib",
+    "jose",
+    "csp",
+    "numpy",
+    "main.urls",
+    "main.account.views",
+    "main.market.views",
+]
+# Only needed by some jobs, once they get to it
+LAZY_MODULES = ["lxml", "pypinyin"]
+
+
+@pytest.mark.parametrize("settings_module", ["main.settings", "main.job_settings"])
+def test_job_startup_imports_no_heavy_modules(settings_module: str) -> None:
+    profile = profile_job_startup(settings_module)
+
+    slowest = ", ".join(
+        f"{r.module} {r.cumulative_us / 1000:.1f}ms" for r in profile.slowest(10)
+    )
+    for module in [*WEB_ONLY_MODULES, *LAZY_MODULES]:
+        assert module not in profile.modules, (
+            f"{module} is imported at startup. Slowest imports: {slowest}"
+        )
+
+
+def test_job_settings_load_only_market_apps() -> None:
+    modules = profile_job_startup("main.job_settings").modules
+
+    assert "main.market.models" in modules
+    assert "main.stock_memo.models" not in modules
+    assert "main.trade_record.models" not in modules
+    assert "django.contrib.sessions.models" not in modules
+    assert "corsheaders" not in modules
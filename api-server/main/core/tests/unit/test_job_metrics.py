@@ -0,0 +1,89 @@
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from unittest.mock import Mock
+
+import pytest
+import requests
+from _pytest.monkeypatch import MonkeyPatch
+from django.db import connection
+
+from main.core import job_metrics
+from main.core.job_metrics import (
+    ContextThreadPoolExecutor,
+    collect_job_metrics,
+    install_job_instrumentation,
+    record_rows_written,
+)
+from main.core.models import JobRun
+
+
+class TestCollectJobMetrics:
+    def test_record_rows_written(self) -> None:
+        with collect_job_metrics() as metrics:
+            record_rows_written(2)
+            record_rows_written(3)
+
+        assert metrics.rows_written == 5
+
+    def test_record_rows_written_outside_a_job(self) -> None:
+        record_rows_written(2)  # Does nothing
+
+        with collect_job_metrics() as metrics:
+            pass
+
+        assert metrics.rows_written == 0
+
+    def test_context_thread_pool_executor_propagates_metrics(self) -> None:
+        with collect_job_metrics() as metrics:
+            with ContextThreadPoolExecutor(4) as executor:
+                for _ in range(10):
+                    executor.submit(record_rows_written, 1)
+
+        assert metrics.rows_written == 10
+
+
+class TestInstallJobInstrumentation:
+    @pytest.fixture
+    def mock_send(self, monkeypatch: MonkeyPatch) -> Iterator[Mock]:
+        # Both are restored after the test, so the instrumentation doesn't leak
+        send = Mock(return_value=requests.Response())
+        monkeypatch.setattr(requests.Session, "send", send)
+        monkeypatch.setattr(job_metrics, "_instrumented", False)
+        yield send
+
+    def test_counts_http_calls(self, mock_send: Mock) -> None:
+        install_job_instrumentation()
+        install_job_instrumentation()  # Idempotent
+        session = requests.Session()
+        request = requests.Request("GET", "https://example.com").prepare()
+
+        session.send(request)
+        with collect_job_metrics() as metrics:
+            session.send(request)
+            session.send(request)
+
+        assert metrics.http_calls == 2
+        assert mock_send.call_count == 3
+
+    @pytest.mark.django_db
+    def test_counts_written_rows(self, monkeypatch: MonkeyPatch) -> None:
+        monkeypatch.setattr(connection, "execute_wrappers", [])
+        job_metrics._add_statement_counter(type(connection), connection)
+        job_metrics._add_statement_counter(type(connection), connection)
+        assert connection.execute_wrappers == [job_metrics._count_written_rows]
+
+        now = datetime.now(UTC)
+        with collect_job_metrics() as metrics:
+            for i in range(2):
+                JobRun.objects.create(
+                    job_id=f"job{i}",
+                    name="update_material_facts",
+                    status=JobRun.Status.RUNNING,
+                    worker="worker",
+                    enqueued_at=now,
+                    started_at=now,
+                )
+            JobRun.objects.update(status=JobRun.Status.SUCCEEDED)
+            JobRun.objects.count()
+
+        assert metrics.rows_written == 4
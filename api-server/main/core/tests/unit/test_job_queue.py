@@ -0,0 +1,145 @@
+import json
+from datetime import UTC, datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from main.core.job_queue import (
+    JOB_QUEUE_KEY,
+    JobMessage,
+    enqueue_job,
+    get_job_stats,
+    record_job_event,
+    record_job_run,
+    recover_orphaned_jobs,
+)
+
+
+class TestJobMessage:
+    def test_round_trip(self) -> None:
+        message = JobMessage(
+            id="abc", name="update_material_facts", enqueued_at=datetime.now(UTC)
+        )
+
+        assert JobMessage.loads(message.dumps()) == message
+
+
+@patch("main.core.job_queue.get_redis_connection")
+class TestEnqueueJob:
+    def test_enqueue_job(self, mock_get_redis_connection: Mock) -> None:
+        message = enqueue_job("update_material_facts")
+
+        mock_redis = mock_get_redis_connection.return_value
+        key, raw = mock_redis.lpush.call_args.args
+        assert key == JOB_QUEUE_KEY
+        assert json.loads(raw)["name"] == "update_material_facts"
+        assert JobMessage.loads(raw) == message
+
+    def test_enqueue_unknown_job(self, mock_get_redis_connection: Mock) -> None:
+        with pytest.raises(ValueError, match="Unknown job: migrate"):
+            enqueue_job("migrate")
+
+        mock_get_redis_connection.return_value.lpush.assert_not_called()
+
+
+@patch("main.core.job_queue.get_redis_connection")
+class TestRecoverOrphanedJobs:
+    def test_requeues_jobs_of_dead_workers_only(
+        self, mock_get_redis_connection: Mock
+    ) -> None:
+        mock_redis = mock_get_redis_connection.return_value
+        mock_redis.scan_iter.return_value = [
+            "jobs:processing:alive",
+            "jobs:processing:dead",
+        ]
+        mock_redis.exists.side_effect = lambda key: key == "jobs:worker:alive"
+        messages = [
+            JobMessage(
+                id=f"job{i}", name="enrich_companies", enqueued_at=datetime.now(UTC)
+            )
+            for i in range(2)
+        ]
+        mock_redis.lmove.side_effect = [*(m.dumps() for m in messages), None]
+
+        assert recover_orphaned_jobs() == messages
+        mock_redis.lmove.assert_called_with(
+            "jobs:processing:dead", JOB_QUEUE_KEY, "RIGHT", "RIGHT"
+        )
+
+    def test_releases_the_concurrency_slots_of_requeued_jobs(
+        self, mock_get_redis_connection: Mock
+    ) -> None:
+        mock_redis = mock_get_redis_connection.return_value
+        mock_redis.scan_iter.return_value = ["jobs:processing:dead"]
+        mock_redis.exists.return_value = False
+        message = JobMessage(
+            id="job1", name="enrich_companies", enqueued_at=datetime.now(UTC)
+        )
+        mock_redis.lmove.side_effect = [message.dumps(), None]
+
+        recover_orphaned_jobs()
+
+        mock_redis.zrem.assert_called_once_with("jobs:running:enrich_companies", "job1")
+
+
+@patch("main.core.job_queue.get_redis_connection")
+class TestJobStats:
+    def test_record_job_event(self, mock_get_redis_connection: Mock) -> None:
+        record_job_event("update_material_facts", "scheduler_missed")
+
+        mock_get_redis_connection.return_value.hincrby.assert_called_once_with(
+            "jobs:stats:update_material_facts", "scheduler_missed", 1
+        )
+
+    def test_record_job_run(self, mock_get_redis_connection: Mock) -> None:
+        started_at = datetime(2026, 10, 19, 9, 0, tzinfo=UTC)
+
+        record_job_run(
+            "update_material_facts",
+            "succeeded",
+            started_at,
+            42.5,
+            rows_written=10,
+            http_calls=2,
+        )
+
+        pipeline = mock_get_redis_connection.return_value.pipeline.return_value
+        key = "jobs:stats:update_material_facts"
+        pipeline.hincrby.assert_any_call(key, "succeeded", 1)
+        pipeline.hincrby.assert_any_call(key, "rows_written", 10)
+        pipeline.hincrby.assert_any_call(key, "http_calls", 2)
+        pipeline.hincrby.assert_any_call(f"{key}:duration", "45", 1)
+        assert pipeline.hset.call_args.kwargs["mapping"] == {
+            "last_status": "succeeded",
+            "last_started_at": started_at.isoformat(),
+            "last_duration": 42.5,
+        }
+        pipeline.execute.assert_called_once()
+
+    def test_record_job_run_longer_than_every_bucket(
+        self, mock_get_redis_connection: Mock
+    ) -> None:
+        record_job_run("update_material_facts", "failed", datetime.now(UTC), 4000)
+
+        pipeline = mock_get_redis_connection.return_value.pipeline.return_value
+        pipeline.hincrby.assert_any_call(
+            "jobs:stats:update_material_facts:duration", "+Inf", 1
+        )
+
+    def test_get_job_stats(self, mock_get_redis_connection: Mock) -> None:
+        mock_redis = mock_get_redis_connection.return_value
+        mock_redis.hgetall.side_effect = lambda key: (
+            {"1": "2", "45": "1", "+Inf": "1"}
+            if key.endswith(":duration")
+            else {"succeeded": "3", "failed": "1"}
+        )
+
+        stats = get_job_stats("update_material_facts")
+
+        assert stats["counters"] == {"succeeded": "3", "failed": "1"}
+        histogram = stats["duration_histogram"]
+        assert histogram["1"] == 2
+        assert histogram["30"] == 2
+        assert histogram["45"] == 3
+        assert histogram["3600"] == 3
+        assert histogram["+Inf"] == 4
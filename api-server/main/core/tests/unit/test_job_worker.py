@@ -0,0 +1,278 @@
+import threading
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+
+from main.core.cache import get_redis_connection
+from main.core.job_metrics import record_rows_written
+from main.core.job_queue import (
+    JOB_QUEUE_KEY,
+    RUNNING_KEY_PREFIX,
+    JobMessage,
+    enqueue_job,
+)
+from main.core.job_worker import ACQUIRE_SLOT_SCRIPT, JobWorker
+from main.core.models import JobRun
+
+
+@pytest.mark.django_db
+class TestJobWorker:
+    @pytest.fixture(autouse=True)
+    def mock_redis(self) -> Iterator[Mock]:
+        with patch("main.core.job_worker.redis") as mock_redis:
+            yield mock_redis
+
+    @pytest.fixture(autouse=True)
+    def mock_record_job_run(self) -> Iterator[Mock]:
+        with patch("main.core.job_worker.record_job_run") as mock_record:
+            yield mock_record
+
+    @pytest.fixture
+    def mock_acquire_slot(self) -> Iterator[Mock]:
+        with patch("main.core.job_worker.ACQUIRE_SLOT_SCRIPT") as mock_script:
+            mock_script.return_value = 1
+            yield mock_script
+
+    @pytest.fixture
+    def message(self) -> JobMessage:
+        return JobMessage(
+            id="job1", name="update_material_facts", enqueued_at=datetime.now(UTC)
+        )
+
+    @patch("main.core.job_worker.call_command")
+    def test_execute_success(
+        self,
+        mock_call_command: Mock,
+        mock_redis: Mock,
+        mock_acquire_slot: Mock,
+        message: JobMessage,
+    ) -> None:
+        job_run = JobWorker(concurrency=1).execute(message)
+
+        mock_call_command.assert_called_once_with("update_material_facts")
+        mock_redis.zrem.assert_called_once_with(
+            "jobs:running:update_material_facts", "job1"
+        )
+        job_run.refresh_from_db()
+        assert job_run.status == JobRun.Status.SUCCEEDED
+        assert job_run.job_id == "job1"
+        assert job_run.finished_at is not None
+        assert job_run.duration is not None
+
+    @patch("main.core.job_worker.call_command")
+    def test_execute_records_metrics(
+        self,
+        mock_call_command: Mock,
+        mock_record_job_run: Mock,
+        mock_acquire_slot: Mock,
+        message: JobMessage,
+    ) -> None:
+        mock_call_command.side_effect = lambda name: record_rows_written(3)
+
+        job_run = JobWorker(concurrency=1).execute(message)
+
+        job_run.refresh_from_db()
+        assert job_run.rows_written == 3
+        assert job_run.http_calls == 0
+        mock_record_job_run.assert_called_once_with(
+            "update_material_facts",
+            JobRun.Status.SUCCEEDED,
+            job_run.started_at,
+            job_run.duration,
+            rows_written=3,
+            http_calls=0,
+        )
+
+    @patch("main.core.job_worker.perf_counter", side_effect=[0, 61])
+    @patch("main.core.job_worker.call_command")
+    def test_execute_warns_when_over_budget(
+        self,
+        mock_call_command: Mock,
+        mock_perf_counter: Mock,
+        mock_acquire_slot: Mock,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        message = JobMessage(
+            id="job3",
+            name="fetch_and_store_realtime_stock_info",
+            enqueued_at=datetime.now(UTC),
+        )
+
+        job_run = JobWorker(concurrency=1).execute(message)
+
+        assert job_run.status == JobRun.Status.SUCCEEDED
+        assert job_run.duration == 61
+        assert "over its 60s budget" in caplog.text
+
+    @patch("main.core.job_worker.call_command")
+    def test_execute_failure(
+        self,
+        mock_call_command: Mock,
+        mock_redis: Mock,
+        mock_acquire_slot: Mock,
+        message: JobMessage,
+    ) -> None:
+        mock_call_command.side_effect = RuntimeError("boom")
+
+        job_run = JobWorker(concurrency=1).execute(message)
+
+        job_run.refresh_from_db()
+        assert job_run.status == JobRun.Status.FAILED
+        assert job_run.error == "<RuntimeError>: boom"
+        mock_redis.zrem.assert_called_once()
+
+    @patch("main.core.job_worker.call_command")
+    def test_execute_skips_when_concurrency_limit_reached(
+        self, mock_call_command: Mock, mock_acquire_slot: Mock, message: JobMessage
+    ) -> None:
+        mock_acquire_slot.return_value = 0
+
+        job_run = JobWorker(concurrency=1).execute(message)
+
+        mock_call_command.assert_not_called()
+        assert job_run.status == JobRun.Status.SKIPPED
+
+    @patch("main.core.job_worker.call_command")
+    def test_execute_drops_runs_past_misfire_grace_time(
+        self,
+        mock_call_command: Mock,
+        mock_record_job_run: Mock,
+        mock_acquire_slot: Mock,
+    ) -> None:
+        message = JobMessage(
+            id="job4",
+            name="fetch_and_store_realtime_stock_info",
+            enqueued_at=datetime.now(UTC) - timedelta(seconds=60),
+        )
+
+        job_run = JobWorker(concurrency=1).execute(message)
+
+        mock_call_command.assert_not_called()
+        mock_acquire_slot.assert_not_called()
+        assert job_run.status == JobRun.Status.MISSED
+        assert mock_record_job_run.call_args.args[1] == JobRun.Status.MISSED
+
+    @patch("main.core.job_worker.call_command")
+    def test_execute_skips_unknown_job(
+        self, mock_call_command: Mock, mock_acquire_slot: Mock
+    ) -> None:
+        message = JobMessage(id="job2", name="migrate", enqueued_at=datetime.now(UTC))
+
+        job_run = JobWorker(concurrency=1).execute(message)
+
+        mock_call_command.assert_not_called()
+        mock_acquire_slot.assert_not_called()
+        assert job_run.status == JobRun.Status.SKIPPED
+        assert job_run.error == "Unknown job: migrate"
+
+    @patch("main.core.job_worker.recover_orphaned_jobs", return_value=[])
+    def test_run_processes_queue_until_stopped(
+        self, mock_recover: Mock, mock_redis: Mock, message: JobMessage
+    ) -> None:
+        worker = JobWorker(concurrency=2)
+        stop_event = threading.Event()
+        processed = []
+
+        def blmove(*args, **kwargs) -> str | None:  # noqa: ANN002, ANN003
+            if mock_redis.blmove.call_count > 1:
+                stop_event.set()
+                return None
+            return message.dumps()
+
+        mock_redis.blmove.side_effect = blmove
+        with patch.object(worker, "execute", side_effect=processed.append):
+            worker.run(stop_event)
+
+        assert processed == [message]
+        mock_redis.lrem.assert_called_once_with(
+            worker.processing_key, 1, message.dumps()
+        )
+        mock_redis.set.assert_called_with(worker.heartbeat_key, 1, ex=30)
+        mock_redis.delete.assert_called_once_with(worker.heartbeat_key)
+
+    @patch("main.core.job_worker.HEARTBEAT_INTERVAL", 0.01)
+    @patch("main.core.job_worker.recover_orphaned_jobs", return_value=[])
+    def test_run_beats_until_jobs_in_progress_are_over(
+        self, mock_recover: Mock, mock_redis: Mock, message: JobMessage
+    ) -> None:
+        worker = JobWorker(concurrency=1)
+        stop_event = threading.Event()
+        beats_after_stop = []
+
+        def execute(message: JobMessage) -> None:
+            stop_event.set()
+            beats = mock_redis.set.call_count
+            time.sleep(0.2)
+            beats_after_stop.append(mock_redis.set.call_count - beats)
+            mock_redis.delete.assert_not_called()
+
+        mock_redis.blmove.return_value = message.dumps()
+        with patch.object(worker, "execute", side_effect=execute):
+            worker.run(stop_event)
+
+        assert beats_after_stop[0] > 1
+        mock_redis.delete.assert_called_once_with(worker.heartbeat_key)
+
+
+class WorkerKilledError(BaseException):
+    """Stands for the worker process being killed, which no handler catches."""
+
+
+@pytest.mark.django_db
+class TestJobRecovery:
+    @pytest.fixture(autouse=True)
+    def clean_queue(self) -> Iterator[None]:
+        redis = get_redis_connection()
+        keys = [JOB_QUEUE_KEY, f"{RUNNING_KEY_PREFIX}enrich_companies"]
+        redis.delete(*keys)
+        with (
+            patch("main.core.job_worker.record_job_run"),
+            patch("main.core.job_worker.record_job_event"),
+        ):
+            yield
+        redis.delete(*keys, *redis.keys("jobs:processing:*"))
+
+    def _take(self, worker: JobWorker) -> str:
+        """What `JobWorker.run` does before it processes a message."""
+        return get_redis_connection().blmove(
+            JOB_QUEUE_KEY, worker.processing_key, 1, "RIGHT", "LEFT"
+        )
+
+    @patch("main.core.job_worker.call_command")
+    def test_job_of_a_killed_worker_runs_to_completion(
+        self, mock_call_command: Mock
+    ) -> None:
+        redis = get_redis_connection()
+        message = enqueue_job("enrich_companies")
+        killed_worker = JobWorker(concurrency=1)
+        raw = self._take(killed_worker)
+
+        mock_call_command.side_effect = WorkerKilledError
+        with pytest.raises(WorkerKilledError):
+            killed_worker._process(raw)
+        # A killed process doesn't run its `finally` blocks: the message stays in
+        # its processing list and the run keeps its concurrency slot
+        redis.lpush(killed_worker.processing_key, raw)
+        ACQUIRE_SLOT_SCRIPT(
+            keys=[f"{RUNNING_KEY_PREFIX}enrich_companies"],
+            args=[time.time(), 1, 60 * 60, message.id],
+        )
+
+        worker = JobWorker(concurrency=1)
+        mock_call_command.side_effect = None
+        worker.recover()
+        worker._process(self._take(worker))
+
+        abandoned, completed = JobRun.objects.filter(job_id=message.id).order_by(
+            "attempt"
+        )
+        assert abandoned.status == JobRun.Status.ABANDONED
+        assert abandoned.finished_at is not None
+        assert completed.attempt == 2
+        assert completed.status == JobRun.Status.SUCCEEDED
+        assert mock_call_command.call_count == 2
+        assert redis.llen(worker.processing_key) == 0
+        assert redis.llen(killed_worker.processing_key) == 0
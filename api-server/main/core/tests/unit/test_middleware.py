@@ -0,0 +1,137 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpRequest, JsonResponse
+from django.test import RequestFactory
+from django.urls import ResolverMatch
+from pytest_django.fixtures import SettingsWrapper
+
+from main.account.models import User
+from main.core.middleware import request_metrics_middleware
+
+
+def view(request: HttpRequest) -> JsonResponse:
+    request.resolver_match = ResolverMatch(view, (), {}, url_name="test_view")
+    return JsonResponse({"a": 1})
+
+
+async def async_view(request: HttpRequest) -> JsonResponse:
+    return view(request)
+
+
+class TestRequestMetricsMiddleware:
+    @pytest.fixture
+    def request_factory(self) -> RequestFactory:
+        return RequestFactory()
+
+    @pytest.fixture(autouse=True)
+    def no_profiling(self, settings: SettingsWrapper) -> None:
+        settings.REQUEST_METRICS_ENABLED = True
+        settings.REQUEST_PROFILE_SAMPLE_RATE = 0.0
+        settings.DEBUG = False
+
+    @patch("main.core.middleware.record_request_later")
+    def test_records_request(
+        self, mock_record_request_later: Mock, request_factory: RequestFactory
+    ) -> None:
+        response = request_metrics_middleware(view)(request_factory.get("/api/test"))
+
+        assert response.status_code == 200
+        route, metrics, duration, size, profile_text = (
+            mock_record_request_later.call_args.args[0]
+        )
+        assert route == "test_view"
+        assert metrics.db_queries == 0
+        assert duration > 0
+        assert size == len(response.content)
+        assert profile_text is None
+
+    @patch("main.core.middleware.record_request_later")
+    def test_profiles_sampled_requests(
+        self,
+        mock_record_request_later: Mock,
+        request_factory: RequestFactory,
+        settings: SettingsWrapper,
+    ) -> None:
+        settings.REQUEST_PROFILE_SAMPLE_RATE = 1.0
+
+        request_metrics_middleware(view)(request_factory.get("/api/test"))
+
+        profile_text = mock_record_request_later.call_args.args[0].profile_text
+        assert "function calls" in profile_text
+
+    @patch("main.core.middleware.record_request_later")
+    def test_skips_unresolved_requests(
+        self, mock_record_request_later: Mock, request_factory: RequestFactory
+    ) -> None:
+        response = request_metrics_middleware(
+            lambda request: JsonResponse({}, status=404)
+        )(request_factory.get("/api/unknown"))
+
+        assert response.status_code == 404
+        mock_record_request_later.assert_not_called()
+
+    @patch("main.core.middleware.record_request_later")
+    def test_hides_server_timing(
+        self, mock_record_request_later: Mock, request_factory: RequestFactory
+    ) -> None:
+        for user in (None, User(username="user")):
+            request = request_factory.get("/api/test")
+            request.user = user
+
+            response = request_metrics_middleware(view)(request)
+
+            assert "Server-Timing" not in response
+
+    @patch("main.core.middleware.record_request_later")
+    def test_shows_server_timing_to_superusers(
+        self, mock_record_request_later: Mock, request_factory: RequestFactory
+    ) -> None:
+        request = request_factory.get("/api/test")
+        request.user = User(username="admin", is_superuser=True)
+
+        response = request_metrics_middleware(view)(request)
+
+        assert response["Server-Timing"].startswith("total;dur=")
+
+    @patch("main.core.middleware.record_request_later")
+    def test_shows_server_timing_in_debug(
+        self,
+        mock_record_request_later: Mock,
+        request_factory: RequestFactory,
+        settings: SettingsWrapper,
+    ) -> None:
+        settings.DEBUG = True
+
+        response = request_metrics_middleware(view)(request_factory.get("/api/test"))
+
+        assert response["Server-Timing"].startswith("total;dur=")
+
+    @patch("main.core.middleware.record_request_later")
+    def test_disabled(
+        self,
+        mock_record_request_later: Mock,
+        request_factory: RequestFactory,
+        settings: SettingsWrapper,
+    ) -> None:
+        settings.REQUEST_METRICS_ENABLED = False
+
+        response = request_metrics_middleware(view)(request_factory.get("/api/test"))
+
+        assert "Server-Timing" not in response
+        mock_record_request_later.assert_not_called()
+
+    @patch("main.core.middleware.record_request_later")
+    def test_records_async_request(
+        self, mock_record_request_later: Mock, request_factory: RequestFactory
+    ) -> None:
+        middleware = request_metrics_middleware(async_view)
+        request = request_factory.get("/api/test")
+        request.user = User(username="admin", is_superuser=True)
+
+        response = async_to_sync(middleware)(request)
+
+        assert response.status_code == 200
+        assert response["Server-Timing"].startswith("total;dur=")
+        assert mock_record_request_later.call_args.args[0].route == "test_view"
@@ -0,0 +1,34 @@
+from unittest.mock import Mock, patch
+
+from main.core.pacing import HostRequestPacer, RequestPacer
+
+
+class TestRequestPacer:
+    @patch("main.core.pacing.sleep")
+    @patch("main.core.pacing.monotonic", return_value=100.0)
+    def test_wait_spaces_out_requests(
+        self, mock_monotonic: Mock, mock_sleep: Mock
+    ) -> None:
+        pacer = RequestPacer(interval=2)
+
+        pacer.wait()
+        pacer.wait()
+        pacer.wait()
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [2.0, 4.0]
+
+
+class TestHostRequestPacer:
+    @patch("main.core.pacing.sleep")
+    @patch("main.core.pacing.monotonic", return_value=100.0)
+    def test_wait_paces_each_host_separately(
+        self, mock_monotonic: Mock, mock_sleep: Mock
+    ) -> None:
+        pacer = HostRequestPacer(default_interval=2, intervals={"b.example.com": 5})
+
+        pacer.wait("https://a.example.com/x")
+        pacer.wait("https://b.example.com/x")
+        pacer.wait("https://b.example.com/y")
+        pacer.wait("https://a.example.com/y")
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [5.0, 2.0]
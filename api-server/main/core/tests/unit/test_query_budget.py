@@ -0,0 +1,367 @@
+import json
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from datetime import UTC, date, datetime
+from typing import NamedTuple
+from unittest.mock import Mock, patch
+from urllib.parse import urlencode, urlsplit
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from pytest_django.fixtures import SettingsWrapper
+
+from main.account import OAuthOrganization
+from main.account.models import User
+from main.account.views import TokenVerificationResult
+from main.cash_dividend.models import CashDividendRecord
+from main.core.models import JobRun
+from main.core.query_budget import (
+    QueryBudgetExceededError,
+    assert_query_budget,
+    find_repeated_queries,
+    get_query_budget,
+    normalize_sql,
+)
+from main.favorite.models import Favorite
+from main.handling_fee.models import HandlingFeeDiscountRecord
+from main.market import Frequency, TradeType
+from main.market.models import (
+    Company,
+    History,
+    MarketIndexPerMinute,
+    MaterialFact,
+    StockInfo,
+)
+from main.market.search import CompanyPrefixIndex, CompanySearchIndex
+from main.market.tokenizer import search_document
+from main.stock_memo.models import StockMemo
+from main.trade_plan.models import TradePlan
+from main.trade_record.models import TradeRecord
+
+
+def _views(patterns: list) -> Iterator[tuple[str, object]]:
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield str(pattern.pattern), pattern.callback
+
+
+class ViewCase(NamedTuple):
+    method: str
+    # Formatted with the IDs of the `records` of `TestViewQueryBudgets`
+    path: str
+    data: dict | None = None
+    # Sent as a form instead of JSON
+    form: bool = False
+
+
+TRADE_RECORD = {
+    "deal_time": "2024-01-02",
+    "sid": "2330",
+    "deal_price": 600,
+    "deal_quantity": 1000,
+    "handling_fee": 20,
+}
+CASH_DIVIDEND = {"deal_time": "2024-01-02", "sid": "2330", "cash_dividend": 3000}
+TRADE_PLAN = {
+    "sid": "2330",
+    "plan_type": "buy",
+    "target_price": 500,
+    "target_quantity": 1000,
+}
+GOOGLE_CODE = {"code": "code", "redirect_uri": "https://taigu.tw/login"}
+
+# A request to every route of every view, with each of its methods
+VIEW_CASES = [
+    ViewCase("GET", "/api/account/authorization-url?redirect_uri=https://taigu.tw"),
+    ViewCase("POST", "/api/account/google-login", GOOGLE_CODE, form=True),
+    ViewCase("POST", "/api/account/change-binding", GOOGLE_CODE, form=True),
+    ViewCase("GET", "/api/account/me"),
+    ViewCase("GET", "/api/account/logout"),
+    ViewCase("POST", "/api/account/update", {"username": "new name"}),
+    ViewCase("GET", "/api/cash-dividends/"),
+    ViewCase("POST", "/api/cash-dividends/", CASH_DIVIDEND),
+    ViewCase("POST", "/api/cash-dividends/{cash_dividend}", CASH_DIVIDEND),
+    ViewCase("DELETE", "/api/cash-dividends/{cash_dividend}"),
+    ViewCase("GET", "/api/admin/jobs/stats"),
+    ViewCase("GET", "/api/admin/db/pool"),
+    ViewCase("GET", "/api/favorites/"),
+    ViewCase("POST", "/api/favorites/2317"),
+    ViewCase("DELETE", "/api/favorites/2330"),
+    ViewCase("GET", "/api/handling-fee/discount"),
+    ViewCase("POST", "/api/handling-fee/discount", {"date": "2024-01-02", "amount": 5}),
+    ViewCase("PUT", "/api/handling-fee/discount/{discount}", {"amount": 10}),
+    ViewCase("DELETE", "/api/handling-fee/discount/{discount}"),
+    ViewCase("GET", "/api/market/market-index"),
+    ViewCase("GET", "/api/market/current-stock-info?sids=2330,2317"),
+    ViewCase("GET", "/api/market/historical-prices?sids=2330,2317"),
+    ViewCase("GET", "/api/market/historical-prices/2330"),
+    ViewCase("GET", "/api/market/search?keyword=23"),
+    ViewCase("GET", "/api/market/company-names?sids=2330,2317"),
+    ViewCase("GET", "/api/market/material-facts/search?keyword=股利"),
+    ViewCase("GET", "/api/stock-memo/company-info?sids=2330,2317"),
+    ViewCase("GET", "/api/stock-memo/company-info?sids=2330,2317&limit=1"),
+    ViewCase("GET", "/api/stock-memo/company-info/2330/material-facts?limit=1"),
+    ViewCase("POST", "/api/stock-memo/2330", {"note": "note"}),
+    ViewCase("GET", "/api/trade-plans/"),
+    ViewCase("POST", "/api/trade-plans/", TRADE_PLAN),
+    ViewCase("POST", "/api/trade-plans/{trade_plan}", TRADE_PLAN),
+    ViewCase("DELETE", "/api/trade-plans/{trade_plan}"),
+    ViewCase("GET", "/api/trade-records/"),
+    ViewCase("GET", "/api/trade-records/?since_revision=0"),
+    ViewCase("POST", "/api/trade-records/", TRADE_RECORD),
+    ViewCase("POST", "/api/trade-records/{trade_record}", TRADE_RECORD),
+    ViewCase("DELETE", "/api/trade-records/{trade_record}"),
+]
+
+
+class TestNormalizeSql:
+    def test_replaces_values(self) -> None:
+        assert normalize_sql(
+            """SELECT * FROM "t" WHERE "t"."id" = 12 AND "t"."name" = 'it''s' """
+        ) == normalize_sql(
+            """SELECT * FROM "t" WHERE "t"."id" = 3 AND "t"."name" = 'a' """
+        )
+
+    def test_collapses_value_lists(self) -> None:
+        assert normalize_sql('SELECT * FROM "t" WHERE "t"."id" IN (1, 2, 3)') == (
+            'SELECT * FROM "t" WHERE "t"."id" IN (...)'
+        )
+
+    def test_keeps_identifiers(self) -> None:
+        assert normalize_sql('SELECT "U0"."id" FROM "t" U0') == (
+            'SELECT "U0"."id" FROM "t" U0'
+        )
+
+
+class TestFindRepeatedQueries:
+    def test_find_repeated_queries(self) -> None:
+        queries = [
+            'SELECT * FROM "t" WHERE "t"."id" = 1',
+            'SELECT * FROM "t" WHERE "t"."id" = 2',
+            'SELECT * FROM "t" WHERE "t"."id" = 3',
+        ]
+
+        assert find_repeated_queries([*queries, 'SELECT * FROM "u"']) == {
+            'SELECT * FROM "t" WHERE "t"."id" = ?': 3
+        }
+        assert find_repeated_queries(queries, threshold=4) == {}
+
+
+@pytest.mark.django_db
+class TestAssertQueryBudget:
+    @pytest.fixture
+    def job_runs(self) -> list[JobRun]:
+        now = datetime.now(UTC)
+        return [
+            JobRun.objects.create(
+                job_id=f"job{i}",
+                name="update_material_facts",
+                status=JobRun.Status.SUCCEEDED,
+                worker="worker",
+                enqueued_at=now,
+                started_at=now,
+            )
+            for i in range(3)
+        ]
+
+    def test_within_budget(self, job_runs: list[JobRun]) -> None:
+        with assert_query_budget(2) as queries:
+            list(JobRun.objects.all())
+            JobRun.objects.count()
+
+        assert len(queries) == 2
+
+    def test_over_budget(self, job_runs: list[JobRun]) -> None:
+        with pytest.raises(QueryBudgetExceededError, match="3 queries were run"):
+            with assert_query_budget(2):
+                list(JobRun.objects.all())
+                JobRun.objects.count()
+                JobRun.objects.exists()
+
+    def test_detects_n_plus_one(self, job_runs: list[JobRun]) -> None:
+        with pytest.raises(QueryBudgetExceededError, match="Possible N\\+1"):
+            with assert_query_budget(10):
+                for job_run in job_runs:
+                    JobRun.objects.get(pk=job_run.pk)
+
+    def test_ignores_savepoints(self, job_runs: list[JobRun]) -> None:
+        with assert_query_budget(1) as queries:
+            with transaction.atomic():
+                JobRun.objects.count()
+
+        assert len(queries) == 1
+
+    @pytest.mark.query_budget(1)
+    def test_marker(self, job_runs: list[JobRun]) -> None:
+        JobRun.objects.count()
+
+
+class TestQueryBudgets:
+    def test_every_view_declares_a_query_budget(self) -> None:
+        views = [
+            (route, view)
+            for route, view in _views(get_resolver().url_patterns)
+            if view.__module__.startswith("main.")
+        ]
+
+        assert views
+        assert [route for route, view in views if get_query_budget(view) is None] == []
+
+    def test_every_view_has_a_case(self) -> None:
+        """Held to its budget by `TestViewQueryBudgets`."""
+        ids = defaultdict(lambda: 1)
+        covered = {
+            resolve(urlsplit(case.path.format_map(ids)).path).func
+            for case in VIEW_CASES
+        }
+
+        assert [
+            route
+            for route, view in _views(get_resolver().url_patterns)
+            if view.__module__.startswith("main.") and view not in covered
+        ] == []
+
+
+@pytest.mark.django_db
+class TestViewQueryBudgets:
+    @pytest.fixture(autouse=True)
+    def no_rate_limit(self, settings: SettingsWrapper) -> None:
+        settings.RATE_LIMIT_ENABLED = False
+
+    @pytest.fixture(autouse=True)
+    def reset_search_indexes(self, monkeypatch: MonkeyPatch) -> None:
+        # In-memory indexes must not outlive the rolled back test data
+        monkeypatch.setattr(CompanyPrefixIndex, "_current", None)
+        monkeypatch.setattr(CompanySearchIndex, "_current", None)
+
+    @pytest.fixture
+    def user(self) -> User:
+        return User.objects.create_user(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="test_oauth_id",
+            email="test@example.com",
+            username="testuser",
+            # For the admin views
+            is_superuser=True,
+        )
+
+    @pytest.fixture
+    def records(self, user: User) -> dict[str, int]:
+        """More than one row of everything, so that N+1 queries would show."""
+        now = datetime.now(UTC)
+        for sid, name in (("2330", "台積電"), ("2317", "鴻海")):
+            company = Company.objects.create(
+                stock_id=sid, name=name, trade_type=TradeType.TSE
+            )
+            StockInfo.objects.create(
+                company=company,
+                date=date(2024, 1, 2),
+                quantity=1000,
+                close_price=600,
+                fluct_price=5,
+            )
+            for day in range(1, 6):
+                History.objects.create(
+                    company=company,
+                    frequency=Frequency.DAILY,
+                    date=date(2024, 1, day),
+                    quantity=1000,
+                    close_price=600 + day,
+                )
+            for hour in (9, 10):
+                MaterialFact.objects.create(
+                    company=company,
+                    date_time=datetime(2024, 1, 2, hour, tzinfo=UTC),
+                    title="股利分派",
+                    description="董事會決議股利分派",
+                    search_tokens=search_document("股利分派", "董事會決議股利分派"),
+                )
+            StockMemo.objects.create(owner=user, company=company, note="note")
+            TradePlan.objects.create(
+                owner=user,
+                company=company,
+                plan_type="buy",
+                target_price=500,
+                target_quantity=1000,
+            )
+            CashDividendRecord.objects.create(
+                owner=user, company=company, deal_time=date(2024, 1, 2), cash_dividend=1
+            )
+            TradeRecord.objects.create(
+                owner=user,
+                company=company,
+                deal_time=date(2024, 1, 2),
+                deal_price=600,
+                deal_quantity=1000,
+                handling_fee=20,
+            )
+        for number in (1, 2):
+            MarketIndexPerMinute.objects.create(
+                market=TradeType.TSE,
+                date=date(2024, 1, 2),
+                number=number,
+                price=18000,
+                fluct_price=10,
+            )
+        Favorite.objects.create(owner=user, company_id="2330")
+        Favorite.objects.create(owner=user, company_id="2317")
+        for i in range(2):
+            HandlingFeeDiscountRecord.objects.create(
+                owner=user, date=date(2024, 1, 2), amount=5
+            )
+            JobRun.objects.create(
+                job_id=f"job{i}",
+                name="update_material_facts",
+                status=JobRun.Status.SUCCEEDED,
+                worker="worker",
+                enqueued_at=now,
+                started_at=now,
+                duration=1,
+            )
+        return {
+            "cash_dividend": CashDividendRecord.objects.filter(owner=user)[0].pk,
+            "discount": HandlingFeeDiscountRecord.objects.filter(owner=user)[0].pk,
+            "trade_plan": TradePlan.objects.filter(owner=user)[0].pk,
+            "trade_record": TradeRecord.objects.filter(owner=user)[0].pk,
+        }
+
+    @pytest.mark.parametrize(
+        "case", VIEW_CASES, ids=[f"{case.method} {case.path}" for case in VIEW_CASES]
+    )
+    @patch(
+        "main.account.views._verify_with_code_flow",
+        return_value=TokenVerificationResult(
+            sub="new_oauth_id", email="new@example.com", name="new", picture=""
+        ),
+    )
+    def test_view_stays_within_its_query_budget(
+        self,
+        mock_verify_with_code_flow: Mock,
+        case: ViewCase,
+        user: User,
+        records: dict[str, int],
+        assert_view_query_budget: Callable[..., HttpResponse],
+    ) -> None:
+        path = case.path.format(**records)
+        if case.form:
+            body, content_type = (
+                urlencode(case.data or {}),
+                "application/x-www-form-urlencoded",
+            )
+        else:
+            body, content_type = json.dumps(case.data or {}), "application/json"
+        request = RequestFactory().generic(
+            case.method, path, body, content_type=content_type
+        )
+        request.user = user
+        match = resolve(urlsplit(path).path)
+
+        response = assert_view_query_budget(match.func, request, **match.kwargs)
+
+        assert response.status_code == 200, response.content
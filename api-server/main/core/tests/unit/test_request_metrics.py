@@ -0,0 +1,262 @@
+from collections.abc import Iterator
+from queue import Queue
+from threading import Event
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+import redis
+import redis.asyncio
+import redis.asyncio.client
+import redis.client
+from _pytest.monkeypatch import MonkeyPatch
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from redis.exceptions import RedisError
+
+from main.core import request_metrics
+from main.core.cache import get_async_redis_connection, get_redis_connection
+from main.core.models import JobRun
+from main.core.request_metrics import (
+    RequestMetrics,
+    RequestRecord,
+    collect_request_metrics,
+    format_profile,
+    get_request_stats,
+    histogram_percentile,
+    profile,
+    record_request_later,
+    record_requests,
+    server_timing,
+)
+
+
+class TestCollectRequestMetrics:
+    @pytest.fixture
+    def mock_redis(self, monkeypatch: MonkeyPatch) -> Iterator[dict[str, Mock]]:
+        # The timed clients of `main.core.cache` call these
+        mocks = {
+            "execute_command": Mock(return_value="OK"),
+            "execute": Mock(return_value=[]),
+            "aexecute_command": AsyncMock(return_value="OK"),
+            "aexecute": AsyncMock(return_value=[]),
+        }
+        monkeypatch.setattr(redis.Redis, "execute_command", mocks["execute_command"])
+        monkeypatch.setattr(redis.client.Pipeline, "execute", mocks["execute"])
+        monkeypatch.setattr(
+            redis.asyncio.Redis, "execute_command", mocks["aexecute_command"]
+        )
+        monkeypatch.setattr(redis.asyncio.client.Pipeline, "execute", mocks["aexecute"])
+        yield mocks
+
+    def test_times_redis_calls(self, mock_redis: dict[str, Mock]) -> None:
+        client = get_redis_connection()
+
+        client.execute_command("GET", "a")
+        with collect_request_metrics() as metrics:
+            client.execute_command("GET", "a")
+            client.pipeline().execute()
+        client.execute_command("GET", "a")
+
+        assert metrics.redis_calls == 2
+        assert metrics.redis_time > 0
+        assert mock_redis["execute_command"].call_count == 3
+        mock_redis["execute"].assert_called_once()
+
+    def test_times_async_redis_calls(self, mock_redis: dict[str, Mock]) -> None:
+        async def call() -> RequestMetrics:
+            client = get_async_redis_connection()
+            with collect_request_metrics() as metrics:
+                await client.execute_command("GET", "a")
+                await client.pipeline().execute()
+            return metrics
+
+        metrics = async_to_sync(call)()
+
+        assert metrics.redis_calls == 2
+        mock_redis["aexecute_command"].assert_awaited_once()
+        mock_redis["aexecute"].assert_awaited_once()
+
+    def test_times_cache_calls(self, mock_redis: dict[str, Mock]) -> None:
+        with collect_request_metrics() as metrics:
+            cache._cache.get_client().execute_command("GET", "a")
+
+        assert metrics.redis_calls == 1
+
+    def test_leaves_other_clients_alone(self, mock_redis: dict[str, Mock]) -> None:
+        with collect_request_metrics() as metrics:
+            redis.Redis().execute_command("GET", "a")
+
+        assert metrics.redis_calls == 0
+        mock_redis["execute_command"].assert_called_once()
+
+
+class TestInstallRequestInstrumentation:
+    @pytest.mark.django_db
+    def test_times_queries(self, monkeypatch: MonkeyPatch) -> None:
+        monkeypatch.setattr(connection, "execute_wrappers", [])
+        request_metrics._add_query_timer(type(connection), connection)
+        request_metrics._add_query_timer(type(connection), connection)
+        assert connection.execute_wrappers == [request_metrics._time_query]
+
+        JobRun.objects.count()
+        with collect_request_metrics() as metrics:
+            JobRun.objects.count()
+            JobRun.objects.exists()
+
+        assert metrics.db_queries == 2
+        assert metrics.db_time > 0
+
+
+class TestServerTiming:
+    def test_server_timing(self) -> None:
+        metrics = RequestMetrics(
+            db_queries=3, db_time=0.0045, redis_calls=2, redis_time=0.001
+        )
+
+        assert server_timing(metrics, 0.0123) == (
+            'total;dur=12.3, db;dur=4.5;desc="3 queries", redis;dur=1.0;desc="2 calls"'
+        )
+
+
+class TestProfile:
+    def test_profile(self) -> None:
+        with profile() as profiler:
+            sorted(range(1000))
+
+        assert profiler is not None
+        assert "sorted" in format_profile(profiler)
+
+    def test_nested_profile(self) -> None:
+        with profile() as outer, profile() as inner:
+            pass
+
+        assert outer is not None
+        assert inner is None
+
+
+@patch("main.core.request_metrics.get_redis_connection")
+class TestRequestStats:
+    def test_record_requests(self, mock_get_redis_connection: Mock) -> None:
+        metrics = RequestMetrics(
+            db_queries=3, db_time=0.004, redis_calls=2, redis_time=0.001
+        )
+
+        record_requests(
+            [RequestRecord("main.market.views.search", metrics, 0.03, 512, "profile")]
+        )
+
+        pipeline = mock_get_redis_connection.return_value.pipeline.return_value
+        key = "requests:stats:main.market.views.search"
+        pipeline.sadd.assert_called_once_with(
+            "requests:routes", "main.market.views.search"
+        )
+        pipeline.hincrby.assert_any_call(key, "requests", 1)
+        pipeline.hincrby.assert_any_call(key, "db_queries", 3)
+        pipeline.hincrby.assert_any_call(key, "response_bytes", 512)
+        pipeline.hincrby.assert_any_call(f"{key}:duration", "50", 1)
+        pipeline.hincrbyfloat.assert_any_call(key, "duration_ms", 30)
+        pipeline.lpush.assert_called_once_with(
+            "requests:profiles:main.market.views.search", "profile"
+        )
+        pipeline.execute.assert_called_once()
+
+    def test_record_requests_without_profile(
+        self, mock_get_redis_connection: Mock
+    ) -> None:
+        record_requests(
+            [
+                RequestRecord("main.market.views.search", RequestMetrics(), 20, 0),
+                RequestRecord("main.market.views.search", RequestMetrics(), 0.001, 0),
+            ]
+        )
+
+        pipeline = mock_get_redis_connection.return_value.pipeline.return_value
+        key = "requests:stats:main.market.views.search"
+        pipeline.hincrby.assert_any_call(f"{key}:duration", "+Inf", 1)
+        pipeline.hincrby.assert_any_call(f"{key}:duration", "5", 1)
+        pipeline.lpush.assert_not_called()
+        pipeline.execute.assert_called_once()
+
+    def test_record_request_later(
+        self, mock_get_redis_connection: Mock, monkeypatch: MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(request_metrics, "_recorder", None)
+        monkeypatch.setattr(request_metrics, "_record_queue", Queue())
+        pipeline = mock_get_redis_connection.return_value.pipeline.return_value
+        failed, executed = Event(), Event()
+
+        def execute() -> None:
+            if not failed.is_set():
+                failed.set()
+                raise RedisError("down")
+            executed.set()
+
+        pipeline.execute.side_effect = execute
+
+        record_request_later(RequestRecord("a", RequestMetrics(), 0.01, 0))
+        assert failed.wait(timeout=5)
+        # The thread survives the error
+        record_request_later(RequestRecord("b", RequestMetrics(), 0.01, 0))
+        assert executed.wait(timeout=5)
+
+        pipeline.sadd.assert_any_call("requests:routes", "b")
+
+    def test_record_request_later_drops_when_full(
+        self, mock_get_redis_connection: Mock, monkeypatch: MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(request_metrics, "_recorder", Mock())
+        monkeypatch.setattr(request_metrics, "_record_queue", Queue(maxsize=1))
+
+        record_request_later(RequestRecord("a", RequestMetrics(), 0.01, 0))
+        record_request_later(RequestRecord("b", RequestMetrics(), 0.01, 0))
+
+        assert request_metrics._record_queue.get_nowait().route == "a"
+
+    def test_get_request_stats(self, mock_get_redis_connection: Mock) -> None:
+        mock_redis = mock_get_redis_connection.return_value
+        mock_redis.hgetall.side_effect = [
+            {
+                "requests": "4",
+                "duration_ms": "100",
+                "db_queries": "8",
+                "db_ms": "20",
+                "redis_calls": "4",
+                "redis_ms": "2",
+                "response_bytes": "4096",
+            },
+            {"10": "1", "50": "3"},
+        ]
+
+        stats = get_request_stats("main.market.views.search")
+
+        assert stats["requests"] == 4
+        assert stats["avg_duration_ms"] == 25
+        assert stats["avg_db_queries"] == 2
+        assert stats["avg_response_bytes"] == 1024
+        assert stats["duration_histogram"]["5"] == 0
+        assert stats["duration_histogram"]["10"] == 1
+        assert stats["duration_histogram"]["50"] == 4
+        assert stats["duration_histogram"]["+Inf"] == 4
+
+    def test_get_request_stats_of_unknown_route(
+        self, mock_get_redis_connection: Mock
+    ) -> None:
+        mock_get_redis_connection.return_value.hgetall.return_value = {}
+
+        stats = get_request_stats("unknown")
+
+        assert stats["requests"] == 0
+        assert stats["avg_duration_ms"] == 0
+
+
+class TestHistogramPercentile:
+    def test_histogram_percentile(self) -> None:
+        histogram = {"5": 50, "10": 90, "25": 99, "+Inf": 100}
+
+        assert histogram_percentile(histogram, 0.5) == "5"
+        assert histogram_percentile(histogram, 0.95) == "25"
+        assert histogram_percentile(histogram, 1) == "+Inf"
+
+    def test_empty_histogram(self) -> None:
+        assert histogram_percentile({"5": 0, "+Inf": 0}, 0.5) is None
@@ -0,0 +1,17 @@
+from django.urls import resolve
+
+from main.core import views
+
+
+class TestCoreUrls:
+    def test_all_url_patterns_resolve_correctly(self) -> None:
+        url_patterns = [
+            ("/api/admin/jobs/stats/", views.job_stats),
+            ("/api/admin/jobs/stats", views.job_stats),
+            ("/api/admin/db/pool/", views.db_pool_stats),
+            ("/api/admin/db/pool", views.db_pool_stats),
+        ]
+
+        for url, expected_view in url_patterns:
+            resolver = resolve(url)
+            assert resolver.func == expected_view
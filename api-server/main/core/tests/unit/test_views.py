@@ -0,0 +1,199 @@
+import json
+from datetime import UTC, datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from django.test import RequestFactory
+
+from main.account import OAuthOrganization
+from main.account.models import User
+from main.core.models import JobRun
+from main.core.views import db_pool_stats, job_stats
+
+
+@pytest.mark.django_db
+class TestJobStatsView:
+    @pytest.fixture(autouse=True)
+    def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
+        mock_lua_script = Mock(return_value=1)  # Allow all requests
+        monkeypatch.setattr(
+            "main.core.decorators.rate_limit.LUA_SCRIPT", mock_lua_script
+        )
+
+    @pytest.fixture
+    def request_factory(self) -> RequestFactory:
+        return RequestFactory()
+
+    @pytest.fixture
+    def superuser(self) -> User:
+        return User.objects.create_superuser(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="admin_oauth_id",
+            email="admin@example.com",
+            username="Admin",
+        )
+
+    @pytest.fixture
+    def user(self) -> User:
+        return User.objects.create_user(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="test_oauth_id",
+            email="test@example.com",
+            username="Test User",
+        )
+
+    @patch("main.core.views.get_job_stats")
+    def test_job_stats(
+        self,
+        mock_get_job_stats: Mock,
+        request_factory: RequestFactory,
+        superuser: User,
+    ) -> None:
+        mock_get_job_stats.return_value = {
+            "counters": {"succeeded": "4"},
+            "duration_histogram": {},
+        }
+        now = datetime.now(UTC)
+        runs = [
+            (JobRun.Status.SUCCEEDED, 10),
+            (JobRun.Status.SUCCEEDED, 20),
+            (JobRun.Status.FAILED, 30),
+            (JobRun.Status.SUCCEEDED, 90),
+            (JobRun.Status.MISSED, 0),
+        ]
+        for i, (status, duration) in enumerate(runs):
+            JobRun.objects.create(
+                job_id=f"job{i}",
+                name="fetch_and_store_realtime_stock_info",
+                status=status,
+                worker="worker",
+                enqueued_at=now,
+                started_at=now - timedelta(hours=i),
+                duration=duration,
+            )
+        JobRun.objects.create(
+            job_id="old",
+            name="fetch_and_store_realtime_stock_info",
+            status=JobRun.Status.SUCCEEDED,
+            worker="worker",
+            enqueued_at=now,
+            started_at=now - timedelta(days=2),
+            duration=1000,
+        )
+        request = request_factory.get("/api/admin/jobs/stats")
+        request.user = superuser
+
+        response = job_stats(request)
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        realtime = data["fetch_and_store_realtime_stock_info"]
+        assert realtime["budget"] == 60
+        assert realtime["counters"] == {"succeeded": "4"}
+        assert realtime["last_24_hours"] == {
+            "runs": {"succeeded": 3, "failed": 1, "missed": 1},
+            "p50": 20,
+            "p95": 90,
+            "max": 90,
+            "p95_budget_usage": 1.5,
+        }
+        assert data["update_material_facts"]["last_24_hours"]["p95"] is None
+
+    @patch("main.core.views.get_job_stats")
+    def test_job_stats_requires_superuser(
+        self,
+        mock_get_job_stats: Mock,
+        request_factory: RequestFactory,
+        user: User,
+    ) -> None:
+        request = request_factory.get("/api/admin/jobs/stats")
+        request.user = user
+
+        response = job_stats(request)
+
+        assert response.status_code == 403
+        mock_get_job_stats.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestDbPoolStatsView:
+    @pytest.fixture(autouse=True)
+    def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
+        mock_lua_script = Mock(return_value=1)  # Allow all requests
+        monkeypatch.setattr(
+            "main.core.decorators.rate_limit.LUA_SCRIPT", mock_lua_script
+        )
+
+    @pytest.fixture
+    def request_factory(self) -> RequestFactory:
+        return RequestFactory()
+
+    @pytest.fixture
+    def superuser(self) -> User:
+        return User.objects.create_superuser(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="admin_oauth_id",
+            email="admin@example.com",
+            username="Admin",
+        )
+
+    @patch("main.core.views.connection")
+    def test_db_pool_stats(
+        self,
+        mock_connection: Mock,
+        request_factory: RequestFactory,
+        superuser: User,
+    ) -> None:
+        mock_connection.pool.get_stats.return_value = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 3,
+            "requests_num": 40,
+            "requests_wait_ms": 100,
+            "connections_num": 3,
+            "connections_ms": 30,
+        }
+        request = request_factory.get("/api/admin/db/pool")
+        request.user = superuser
+
+        response = db_pool_stats(request)
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        assert data["pool_max"] == 10
+        assert data["avg_acquisition_wait_ms"] == 2.5
+        assert data["avg_connect_ms"] == 10
+
+    @patch("main.core.views.connection")
+    def test_db_pool_stats_before_any_request(
+        self,
+        mock_connection: Mock,
+        request_factory: RequestFactory,
+        superuser: User,
+    ) -> None:
+        mock_connection.pool.get_stats.return_value = {"pool_min": 2, "pool_max": 10}
+        request = request_factory.get("/api/admin/db/pool")
+        request.user = superuser
+
+        response = db_pool_stats(request)
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        assert data["avg_acquisition_wait_ms"] is None
+        assert data["avg_connect_ms"] is None
+
+    @patch("main.core.views.connection")
+    def test_db_pool_stats_without_pool(
+        self,
+        mock_connection: Mock,
+        request_factory: RequestFactory,
+        superuser: User,
+    ) -> None:
+        mock_connection.pool = None
+        request = request_factory.get("/api/admin/db/pool")
+        request.user = superuser
+
+        response = db_pool_stats(request)
+
+        assert response.status_code == 404
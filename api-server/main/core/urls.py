@@ -0,0 +1,8 @@
+from django.urls import re_path
+
+from main.core import views
+
+urlpatterns = [
+    re_path(r"^jobs/stats[/]?$", views.job_stats),
+    re_path(r"^db/pool[/]?$", views.db_pool_stats),
+]
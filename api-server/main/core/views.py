@@ -0,0 +1,103 @@
+import math
+import os
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+from django.db import connection
+from django.db.models import Count
+from django.http import HttpRequest
+from django.views.decorators.http import require_GET
+
+from main.core.decorators.auth import require_login, require_superuser
+from main.core.decorators.query_budget import query_budget
+from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse
+from main.core.job_queue import JOBS, get_job_stats
+from main.core.models import JobRun
+
+RECENT_JOB_RUNS_WINDOW = timedelta(hours=24)
+
+
+@query_budget(2)
+@rate_limit(rate=1)
+@require_GET
+@require_login
+@require_superuser
+def job_stats(request: HttpRequest) -> JsonResponse:
+    """
+    Per job: the all-time counters and duration histogram kept in Redis, plus the
+    duration percentiles of the last 24 hours compared with the job's budget.
+    """
+    since = datetime.now(UTC) - RECENT_JOB_RUNS_WINDOW
+    recent_runs = JobRun.objects.filter(started_at__gte=since)
+    durations = defaultdict(list)
+    for name, duration in recent_runs.filter(
+        status__in=[JobRun.Status.SUCCEEDED, JobRun.Status.FAILED]
+    ).values_list("name", "duration"):
+        durations[name].append(duration)
+    status_counts = defaultdict(dict)
+    for row in recent_runs.values("name", "status").annotate(count=Count("id")):
+        status_counts[row["name"]][row["status"]] = row["count"]
+
+    result = {}
+    for name, spec in JOBS.items():
+        job_durations = sorted(durations[name])
+        p95 = _percentile(job_durations, 0.95)
+        result[name] = {
+            "budget": spec.budget,
+            **get_job_stats(name),
+            "last_24_hours": {
+                "runs": status_counts[name],
+                "p50": _percentile(job_durations, 0.5),
+                "p95": p95,
+                "max": job_durations[-1] if job_durations else None,
+                "p95_budget_usage": (
+                    p95 / spec.budget if p95 is not None and spec.budget else None
+                ),
+            },
+        }
+    return JsonResponse(result)
+
+
+@query_budget(0)
+@rate_limit(rate=1)
+@require_GET
+@require_login
+@require_superuser
+def db_pool_stats(request: HttpRequest) -> JsonResponse:
+    """
+    The counters of the database connection pool of the worker process that
+    serves the request. Every process has its own pool.
+    """
+    pool = connection.pool
+    if pool is None:
+        return JsonResponse({"message": "Connection pooling is disabled."}, status=404)
+    stats = pool.get_stats()
+    # The counters are only there once they are non-zero
+    requests_num = stats.get("requests_num", 0)
+    connections_num = stats.get("connections_num", 0)
+    return JsonResponse(
+        {
+            "pid": os.getpid(),
+            **stats,
+            # Time spent waiting for a connection when none was available
+            "avg_acquisition_wait_ms": (
+                stats.get("requests_wait_ms", 0) / requests_num
+                if requests_num
+                else None
+            ),
+            # Time spent opening new connections to the database
+            "avg_connect_ms": (
+                stats.get("connections_ms", 0) / connections_num
+                if connections_num
+                else None
+            ),
+        }
+    )
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
@@ -106,3 +106,29 @@ class TestFavoriteViews:
 
         assert response.status_code == 200
         assert data["data"] == [company.pk]
+
+    def test_list_favorites_not_modified(self, user: User, company: Company) -> None:
+        request = RequestFactory().get("/")
+        request.user = user  # type: ignore
+        etag = list_favorites(request)["ETag"]
+
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=etag)
+        request.user = user  # type: ignore
+        response = list_favorites(request)
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_list_favorites_etag_changes_with_favorites(
+        self, user: User, company: Company
+    ) -> None:
+        request = RequestFactory().get("/")
+        request.user = user  # type: ignore
+
+        empty_etag = list_favorites(request)["ETag"]
+        favorite = Favorite.objects.create(owner=user, company=company)
+        one_favorite_etag = list_favorites(request)["ETag"]
+        favorite.delete()
+
+        assert len({empty_etag, one_favorite_etag}) == 2
+        assert list_favorites(request)["ETag"] != one_favorite_etag
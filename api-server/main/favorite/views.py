@@ -1,12 +1,16 @@
-from django.http import HttpRequest, JsonResponse
+from django.http import HttpRequest
 from django.views.decorators.http import require_GET, require_http_methods
 
 from main.core.decorators.auth import require_login
+from main.core.decorators.conditional import etag
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse, aggregate_etag
 from main.favorite.models import Favorite
 from main.market.models import Company
 
 
+@query_budget(3)
 @rate_limit(rate=1)
 @require_login
 @require_http_methods(["POST", "DELETE"])
@@ -31,9 +35,15 @@ def _delete_favorite(request: HttpRequest, sid: str) -> JsonResponse:
     return JsonResponse({"sid": sid})
 
 
+@query_budget(2)
 @rate_limit(rate=2)
 @require_GET
 @require_login
+@etag(
+    lambda request: aggregate_etag(
+        Favorite.objects.filter(owner=request.user), request.user.pk
+    )
+)
 def list_favorites(request: HttpRequest) -> JsonResponse:
     query_set = Favorite.objects.filter(owner=request.user).select_related("company")
     return JsonResponse({"data": [favorite.company.pk for favorite in query_set]})
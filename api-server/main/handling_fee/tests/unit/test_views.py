@@ -87,6 +87,29 @@ class TestCreateOrListDiscountView:
         assert "data" in data
         assert len(data["data"]) == 2
 
+    def test_create_or_list_discount_get_not_modified(
+        self, request_factory: RequestFactory, user: User
+    ) -> None:
+        """Test that GET answers 304 until a discount is updated."""
+        discount = HandlingFeeDiscountRecord.objects.create(
+            owner=user, date=date(2023, 12, 1), amount=100, memo="First"
+        )
+        request = request_factory.get("/api/handling-fee/discount/")
+        request.user = user
+        etag = create_or_list_discount(request)["ETag"]
+
+        request = request_factory.get(
+            "/api/handling-fee/discount/", HTTP_IF_NONE_MATCH=etag
+        )
+        request.user = user
+        assert create_or_list_discount(request).status_code == 304
+
+        discount.amount = 200
+        discount.save()
+        response = create_or_list_discount(request)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
     def test_create_or_list_discount_invalid_method(
         self, request_factory: RequestFactory, user: User
     ) -> None:
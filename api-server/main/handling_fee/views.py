@@ -2,19 +2,28 @@ import json
 import logging
 from datetime import datetime
 
-from django.http import HttpRequest, JsonResponse
+from django.http import HttpRequest
 from django.views.decorators.http import require_http_methods
 
 from main.core.decorators.auth import require_login
+from main.core.decorators.conditional import etag
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse, aggregate_etag
 from main.handling_fee.models import HandlingFeeDiscountRecord
 
 logger = logging.getLogger(__name__)
 
 
+@query_budget(2)
 @rate_limit(rate=2)
 @require_http_methods(["POST", "GET"])
 @require_login
+@etag(
+    lambda request: aggregate_etag(
+        HandlingFeeDiscountRecord.objects.filter(owner=request.user), request.user.pk
+    )
+)
 def create_or_list_discount(request: HttpRequest) -> JsonResponse:
     if request.method == "POST":
         return _create_discount(request)
@@ -24,6 +33,7 @@ def create_or_list_discount(request: HttpRequest) -> JsonResponse:
         return JsonResponse({"message": "Method Not Allowed"}, status=405)
 
 
+@query_budget(2)
 @rate_limit(rate=1)
 @require_http_methods(["PUT", "DELETE"])
 @require_login
@@ -0,0 +1,21 @@
+"""
+Settings for the job worker and the job commands, which only need the market
+data apps. Use them with `DJANGO_SETTINGS_MODULE=main.job_settings`.
+
+Nothing here serves HTTP, so the URLconf is never loaded, and the job commands
+skip the system checks, which would load it.
+"""
+
+from main.settings import *  # noqa: F403
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.postgres",
+    # `account` only because `core.DataChangeLog` refers to users
+    "main.core",
+    "main.account",
+    "main.market",
+]
+
+MIDDLEWARE = []
@@ -14,6 +14,13 @@ class TradeType:
     TRADE_TYPE_ZH_ENG_MAP = {"上市": TSE, "上櫃": OTC}
 
 
+class EnrichmentStatus:
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    CHOICES = [(PENDING, PENDING), (DONE, DONE), (FAILED, FAILED)]
+
+
 class ThirdPartyApi:
     company_info = "https://isin.twse.com.tw/isin/single_main.jsp?owncode="
     company_business = "https://mopsov.twse.com.tw/mops/web/ajax_t05st03"
@@ -28,6 +35,10 @@ class ThirdPartyApi:
         TradeType.TSE: "https://openapi.twse.com.tw/v1/exchangeReport/STOCK_DAY_ALL",
         TradeType.OTC: "https://www.tpex.org.tw/openapi/v1/tpex_mainboard_quotes",
     }
+    historical_single_day = {  # Daily Close Info of a Given Date
+        TradeType.TSE: "https://www.twse.com.tw/rwd/zh/afterTrading/MI_INDEX?type=ALLBUT0999&response=json&date=",
+        TradeType.OTC: "https://www.tpex.org.tw/web/stock/aftertrading/daily_close_quotes/stk_quote_result.php?l=zh-tw&o=json&d=",
+    }
     multiple_days = "https://query1.finance.yahoo.com/v7/finance/download/"
     material_fact = {
         TradeType.TSE: "https://openapi.twse.com.tw/v1/opendata/t187ap04_L",
@@ -35,4 +46,7 @@ class ThirdPartyApi:
     }
 
 
+HISTORY_RETENTION_YEARS = 5
+
+
 class UnknownStockIdError(Exception): ...
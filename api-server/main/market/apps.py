@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MarketConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "main.market"
+
+    def ready(self) -> None:
+        import main.market.signals  # noqa: F401
@@ -1,8 +1,10 @@
 from datetime import date
+from time import time_ns
 
+from django.core.cache import cache
 from pydantic import BaseModel, ConfigDict
 
-from main.core.cache import BaseCacheManager
+from main.core.cache import BaseCacheManager, acache_get
 
 
 class TimeSeriesStockInfoPointData(BaseModel):
@@ -20,3 +22,70 @@ class TimeSeriesStockInfo(BaseModel):
 
 
 class TimeSeriesStockInfoCacheManager(BaseCacheManager[TimeSeriesStockInfo]): ...
+
+
+class PriceSeries(BaseModel):
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    dates: list[date]
+    prices: list[float]
+
+
+class DownsampledPriceSeriesCacheManager(BaseCacheManager[PriceSeries]): ...
+
+
+class ResponseBody(BaseModel):
+    """A serialized response shared by every user, and its gzip-compressed copy."""
+
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    body: bytes
+    gzipped_body: bytes
+
+
+class ResponseBodyCacheManager(BaseCacheManager[ResponseBody]): ...
+
+
+class ParsedPage(BaseModel):
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    values: list[str]
+
+
+class ParsedPageCacheManager(BaseCacheManager[ParsedPage]): ...
+
+
+class MaterialFactWatermark(BaseModel):
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    digest: str
+    row_hashes: dict[str, str]
+
+
+class MaterialFactWatermarkCacheManager(BaseCacheManager[MaterialFactWatermark]): ...
+
+
+HISTORY_VERSION_CACHE_KEY = "history_version"
+COMPANY_LIST_VERSION_CACHE_KEY = "company_list_version"
+
+
+def get_history_version() -> int:
+    return cache.get(HISTORY_VERSION_CACHE_KEY, 0)
+
+
+def bump_history_version() -> None:
+    """Invalidate everything derived from the history table, e.g. downsampled series."""
+    cache.set(HISTORY_VERSION_CACHE_KEY, time_ns(), None)
+
+
+def get_company_list_version() -> int:
+    return cache.get(COMPANY_LIST_VERSION_CACHE_KEY, 0)
+
+
+async def aget_company_list_version() -> int:
+    return await acache_get(COMPANY_LIST_VERSION_CACHE_KEY, 0)
+
+
+def bump_company_list_version() -> None:
+    """Make every worker rebuild its in-memory company search index."""
+    cache.set(COMPANY_LIST_VERSION_CACHE_KEY, time_ns(), None)
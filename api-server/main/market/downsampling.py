@@ -0,0 +1,44 @@
+from datetime import date
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: keep the first and the last points, split the
+    others into `max_points - 2` buckets and pick from each bucket the point that
+    forms the largest triangle with the previously picked point and the average
+    point of the next bucket. Returns the indices of the picked points.
+    """
+    size = len(x)
+    if max_points >= size or max_points < 3:
+        return np.arange(size)
+
+    # Bucket i covers [edges[i], edges[i + 1]), the last point has its own bucket
+    edges = np.linspace(1, size - 1, max_points - 1).astype(np.int64)
+    edges = np.append(edges, size)
+    picked = np.empty(max_points, dtype=np.int64)
+    picked[0], picked[-1] = 0, size - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2]
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        picked[i + 1] = previous
+    return picked
+
+
+def downsample_price_rows(
+    rows: list[tuple[date, float]], max_points: int
+) -> list[tuple[date, float]]:
+    """Downsample (date, price) rows sorted by date into at most `max_points`."""
+    if len(rows) <= max_points:
+        return rows
+    x = np.fromiter((d.toordinal() for d, _ in rows), dtype=np.float64, count=len(rows))
+    y = np.fromiter((p for _, p in rows), dtype=np.float64, count=len(rows))
+    return [rows[i] for i in lttb_indices(x, y, max_points)]
@@ -0,0 +1,70 @@
+import hashlib
+import re
+from collections.abc import Callable
+from html import unescape
+from io import BytesIO
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from main.market.cache import ParsedPage, ParsedPageCacheManager
+
+PARSE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+_BUSINESS_PATTERN = re.compile(
+    r"<th[^>]*>\s*主要經營業務\s*</th>\s*<td[^>]*>(?P<business>.*?)</td>",
+    re.DOTALL | re.IGNORECASE,
+)
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def extract_company_basic_info(text: str) -> list[str]:
+    """
+    [name, market] of the isin.twse.com.tw single_main page, i.e. the 4th and 5th
+    cells of the first row that is the second child of its table. Parsing stops at
+    that row, and both are empty if there is no such row.
+    """
+    rows = etree.iterparse(
+        BytesIO(text.encode()), events=("end",), tag="tr", html=True, encoding="utf-8"
+    )
+    try:
+        for _, row in rows:
+            if (parent := row.getparent()) is not None and parent.index(row) == 1:
+                cells = [
+                    " ".join("".join(td.itertext()).split()) for td in row.iter("td")
+                ]
+                return [*cells[3:5], "", ""][:2]
+    except etree.XMLSyntaxError:  # e.g. an empty page
+        pass
+    return ["", ""]
+
+
+def extract_company_business(text: str) -> list[str]:
+    """
+    [business] of the mopsov.twse.com.tw t05st03 page: the text of the cell next to
+    the "主要經營業務" header. A regex finds it without parsing the page, and XPath
+    over the parsed page is the fallback for unexpected markup.
+    """
+    if match := _BUSINESS_PATTERN.search(text):
+        return [unescape(_TAG_PATTERN.sub(" ", match["business"])).strip()]
+    if not text.strip():
+        return [""]
+    cells = lxml_html.fromstring(text).xpath(
+        '(//tr[th[normalize-space()="主要經營業務"]]/td)[1]'
+    )
+    return [cells[0].text_content().strip() if cells else ""]
+
+
+def parse_with_cache(
+    sid: str, text: str, extract: Callable[[str], list[str]]
+) -> list[str]:
+    """Reuse what `extract` got out of the same page of `sid` last time."""
+    digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    identifier = f"{extract.__name__}:{sid}:{digest}"
+    if (cached := ParsedPageCacheManager.get(identifier)) is not None:
+        return cached.values
+    values = extract(text)
+    ParsedPageCacheManager.set(
+        identifier, ParsedPage(values=values), PARSE_CACHE_TIMEOUT
+    )
+    return values
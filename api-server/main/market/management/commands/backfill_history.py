@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.market import HISTORY_RETENTION_YEARS
+from main.market.services import backfill_history
+
+
+class Command(BaseCommand):
+    help = "Backfill daily history from the whole-market daily close files."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--years", type=int, default=HISTORY_RETENTION_YEARS)
+        parser.add_argument("--concurrency", type=int, default=2)
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and backfill every day again.",
+        )
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if not 0 < options["years"] <= HISTORY_RETENTION_YEARS:
+            raise CommandError(
+                f"--years must be between 1 and {HISTORY_RETENTION_YEARS}, history "
+                "older than that is purged daily."
+            )
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        backfill_history(
+            years=options["years"],
+            concurrency=options["concurrency"],
+            restart=options["restart"],
+        )
@@ -0,0 +1,95 @@
+from collections.abc import Callable
+from datetime import date, timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from main.core.bulk import bulk_upsert
+from main.env import Env, env
+from main.market import Frequency
+from main.market.models import Company, History
+
+COMPANY_COUNT = 2_000
+
+
+class Command(BaseCommand):
+    help = "Compare bulk_create(update_conflicts=True) with bulk_upsert on history."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[2_000, 20_000, 200_000]
+        )
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if env.ENV == Env.PROD:
+            raise CommandError("Benchmarks must not be run in production.")
+
+        for size in options["sizes"]:
+            bulk_create_seconds, bulk_upsert_seconds = self._benchmark(size)
+            self.stdout.write(
+                f"{size:>8} rows | "
+                f"bulk_create: insert {bulk_create_seconds[0]:.3f}s, "
+                f"update {bulk_create_seconds[1]:.3f}s | "
+                f"bulk_upsert: insert {bulk_upsert_seconds[0]:.3f}s, "
+                f"update {bulk_upsert_seconds[1]:.3f}s"
+            )
+
+    def _benchmark(self, size: int) -> tuple[tuple[float, float], tuple[float, float]]:
+        # Everything written by the benchmark is rolled back
+        with transaction.atomic():
+            Company.objects.bulk_create(
+                [
+                    Company(stock_id=f"BENCH{i:04}", name=f"Benchmark {i}")
+                    for i in range(COMPANY_COUNT)
+                ]
+            )
+            rows = [
+                (
+                    f"BENCH{i % COMPANY_COUNT:04}",
+                    Frequency.DAILY,
+                    date(2000, 1, 1) + timedelta(days=i // COMPANY_COUNT),
+                    i,
+                    float(i % 1000),
+                )
+                for i in range(size)
+            ]
+            bulk_create_seconds = self._measure_insert_and_update(
+                lambda: History.objects.bulk_create(
+                    [
+                        History(
+                            company_id=sid,
+                            frequency=frequency,
+                            date=date_,
+                            quantity=quantity,
+                            close_price=close_price,
+                        )
+                        for sid, frequency, date_, quantity, close_price in rows
+                    ],
+                    update_conflicts=True,
+                    update_fields=["quantity", "close_price"],
+                    unique_fields=["company_id", "frequency", "date"],
+                )
+            )
+            History.objects.filter(company_id__startswith="BENCH").delete()
+            bulk_upsert_seconds = self._measure_insert_and_update(
+                lambda: bulk_upsert(
+                    History,
+                    ["company_id", "frequency", "date", "quantity", "close_price"],
+                    rows,
+                    unique_fields=["company_id", "frequency", "date"],
+                    update_fields=["quantity", "close_price"],
+                )
+            )
+            transaction.set_rollback(True)
+        return bulk_create_seconds, bulk_upsert_seconds
+
+    @staticmethod
+    def _measure_insert_and_update(upsert: Callable) -> tuple[float, float]:
+        # The first run inserts every row and the second one hits every conflict
+        seconds = []
+        for _ in range(2):
+            start = perf_counter()
+            upsert()
+            seconds.append(perf_counter() - start)
+        return seconds[0], seconds[1]
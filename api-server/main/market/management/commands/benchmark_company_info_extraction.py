@@ -0,0 +1,52 @@
+from collections.abc import Callable
+from pathlib import Path
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.market.extractors import (
+    extract_company_basic_info,
+    extract_company_business,
+)
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / "tests" / "fixtures"
+EXTRACTORS: dict[str, Callable[[str], list[str]]] = {
+    "isin_single_main": extract_company_basic_info,
+    "mops_t05st03": extract_company_business,
+}
+
+
+class Command(BaseCommand):
+    help = "Measure how long extracting company info from saved pages takes."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--pages-dir", type=Path, default=FIXTURES_DIR)
+        parser.add_argument("--iterations", type=int, default=1_000)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if options["iterations"] < 2:
+            raise CommandError("--iterations must be at least 2.")
+
+        pages = sorted(options["pages_dir"].glob("*.html"))
+        if not pages:
+            raise CommandError(f"No saved pages in {options['pages_dir']}.")
+
+        for path in pages:
+            extract = next(
+                (e for prefix, e in EXTRACTORS.items() if path.name.startswith(prefix)),
+                None,
+            )
+            if extract is None:
+                continue
+            text = path.read_text(encoding="utf-8")
+            latencies = []
+            for _ in range(options["iterations"]):
+                start = perf_counter()
+                extract(text)
+                latencies.append(perf_counter() - start)
+            self.stdout.write(
+                f"{path.name:<40} | {len(text) / 1024:>7.1f}KiB | "
+                f"p50 {median(latencies) * 1000:.3f}ms, "
+                f"p95 {quantiles(latencies, n=20)[-1] * 1000:.3f}ms"
+            )
@@ -0,0 +1,115 @@
+import asyncio
+from statistics import median, quantiles
+from time import perf_counter
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.account import AUTH_COOKIE_NAME
+from main.env import Env, env
+
+PATHS = [
+    "/api/market/market-index/",
+    "/api/market/current-stock-info/?sids=2330,2317,2454,0050",
+    f"/api/market/search/?keyword={quote('台積')}",
+    "/api/market/company-names/?sids=2330,2317,2454,0050",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the market endpoints of a running API server with many "
+        "concurrent keep-alive clients. Run it against the sync (WSGI) and the "
+        "async (ASGI) deployments to compare them, with RATE_LIMIT_ENABLED = False "
+        "in their settings."
+    )
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--token", required=True, help="A valid auth cookie.")
+        parser.add_argument("--concurrency", type=int, default=500)
+        parser.add_argument("--duration", type=float, default=30)
+        parser.add_argument("--paths", nargs="+", default=PATHS)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if env.ENV == Env.PROD:
+            raise CommandError("Benchmarks must not be run in production.")
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+
+        url = urlsplit(options["base_url"])
+        if url.scheme != "http" or url.hostname is None:
+            raise CommandError("--base-url must be a plain http:// URL.")
+        for path in options["paths"]:
+            latencies, errors = asyncio.run(
+                _load_test(
+                    url.hostname,
+                    url.port or 80,
+                    path,
+                    options["token"],
+                    options["concurrency"],
+                    options["duration"],
+                )
+            )
+            if len(latencies) < 2:
+                raise CommandError(f"Too few responses from {path}.")
+            self.stdout.write(
+                f"{path:<60} | {len(latencies) / options['duration']:>8.1f} req/s | "
+                f"p50 {median(latencies) * 1000:.1f}ms, "
+                f"p99 {quantiles(latencies, n=100)[-1] * 1000:.1f}ms | "
+                f"{errors} errors"
+            )
+
+
+async def _load_test(
+    host: str, port: int, path: str, token: str, concurrency: int, duration: float
+) -> tuple[list[float], int]:
+    """Latencies of the successful responses, and the number of failed ones."""
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Cookie: {AUTH_COOKIE_NAME}={token}\r\n\r\n"
+    ).encode()
+    deadline = perf_counter() + duration
+    latencies: list[float] = []
+    errors = 0
+
+    async def client() -> None:
+        nonlocal errors
+        connection = None
+        while perf_counter() < deadline:
+            start = perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection(host, port)
+                reader, writer = connection
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await _read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+                errors += 1
+                connection = None
+                continue
+            if status == 200:
+                latencies.append(perf_counter() - start)
+            else:
+                errors += 1
+            # Sync workers close the connection after every response
+            if not keep_alive:
+                writer.close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    """Read a response whose length is given by Content-Length."""
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("connection") != "close"
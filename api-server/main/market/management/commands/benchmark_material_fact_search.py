@@ -0,0 +1,90 @@
+import random
+from datetime import UTC, datetime, timedelta
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from main.core.bulk import bulk_upsert
+from main.env import Env, env
+from main.market.models import Company, MaterialFact
+from main.market.search import search_material_facts
+from main.market.tokenizer import search_document
+
+PHRASES = [
+    "董事會決議",
+    "分派現金股利",
+    "股票股利",
+    "辦理現金減資",
+    "取得機器設備",
+    "代子公司公告",
+    "背書保證",
+    "資金貸與",
+    "更換會計師",
+    "召開法人說明會",
+    "公司債發行",
+    "庫藏股買回",
+]
+KEYWORDS = ["股利", "現金股利", "減資", "董事會", "法人說明會", "庫藏股", "設備"]
+COMPANY_COUNT = 1_000
+QUERY_COUNT = 200
+
+
+class Command(BaseCommand):
+    help = "Measure the latency of the material fact full-text search."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--sizes", type=int, nargs="+", default=[300_000])
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if env.ENV == Env.PROD:
+            raise CommandError("Benchmarks must not be run in production.")
+
+        for size in options["sizes"]:
+            latencies = self._benchmark(size)
+            self.stdout.write(
+                f"{size:>7} facts | p50 {median(latencies) * 1000:.2f}ms, "
+                f"p95 {quantiles(latencies, n=20)[-1] * 1000:.2f}ms"
+            )
+
+    def _benchmark(self, size: int) -> list[float]:
+        rng = random.Random(size)  # noqa: S311
+        start = datetime(2024, 1, 1, tzinfo=UTC)
+
+        # Everything written by the benchmark is rolled back
+        with transaction.atomic():
+            Company.objects.bulk_create(
+                Company(stock_id=f"B{i:05}", name=f"Benchmark {i}")
+                for i in range(COMPANY_COUNT)
+            )
+            rows = []
+            for i in range(size):
+                title = "".join(rng.sample(PHRASES, k=2))
+                description = "，".join(rng.choices(PHRASES, k=rng.randint(3, 12)))
+                rows.append(
+                    (
+                        f"B{i % COMPANY_COUNT:05}",
+                        start + timedelta(minutes=i),
+                        title,
+                        description,
+                        search_document(title, description),
+                    )
+                )
+            bulk_upsert(
+                MaterialFact,
+                ["company_id", "date_time", "title", "description", "search_tokens"],
+                rows,
+                unique_fields=["company_id", "date_time"],
+            )
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE material_fact")
+
+            latencies = []
+            for _ in range(QUERY_COUNT):
+                keyword = rng.choice(KEYWORDS)
+                query_start = perf_counter()
+                search_material_facts(keyword, offset=rng.choice([0, 20, 40]))
+                latencies.append(perf_counter() - query_start)
+            transaction.set_rollback(True)
+        return latencies
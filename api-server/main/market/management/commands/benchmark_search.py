@@ -0,0 +1,115 @@
+import random
+from collections.abc import Callable
+from datetime import date
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from main.env import Env, env
+from main.market.models import Company, StockInfo
+from main.market.search import (
+    CompanyPrefixIndex,
+    CompanySearchIndex,
+    search_companies,
+)
+
+NAME_CHARACTERS = "台積電聯發鴻海富邦國泰中華信金控光寶統一大立南亞塑化鋼鐵航運"
+NAME_WORDS = ["Taiwan", "Semiconductor", "Holdings", "Electronics", "Financial"]
+QUERY_COUNT = 200
+
+
+class Command(BaseCommand):
+    help = "Measure the latency of the market search backends."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--sizes", type=int, nargs="+", default=[2_000, 50_000])
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if env.ENV == Env.PROD:
+            raise CommandError("Benchmarks must not be run in production.")
+
+        for size in options["sizes"]:
+            for backend, latencies in self._benchmark(size).items():
+                self.stdout.write(
+                    f"{size:>6} symbols | {backend:<8} | "
+                    f"p50 {median(latencies) * 1000:.2f}ms, "
+                    f"p95 {quantiles(latencies, n=20)[-1] * 1000:.2f}ms"
+                )
+
+    def _benchmark(self, size: int) -> dict[str, list[float]]:
+        rng = random.Random(size)  # noqa: S311
+        companies = [
+            Company(stock_id=f"B{i:05}", name=self._fake_name(rng)) for i in range(size)
+        ]
+        keywords = [
+            rng.choice(
+                [
+                    company.stock_id,  # Exact
+                    company.stock_id[:4],  # Prefix
+                    company.name[:2],  # Name prefix
+                    company.name[1:3],  # Substring
+                ]
+            )
+            for company in rng.sample(companies, QUERY_COUNT)
+        ]
+
+        # Everything written by the benchmark is rolled back
+        with transaction.atomic():
+            Company.objects.bulk_create(companies)
+            StockInfo.objects.bulk_create(
+                StockInfo(
+                    company=company,
+                    date=date.today(),
+                    quantity=0,
+                    close_price=0,
+                    fluct_price=0,
+                )
+                for company in companies
+            )
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE company")
+
+            start = perf_counter()
+            prefix_index = CompanyPrefixIndex(
+                Company.objects.filter(stock_info__isnull=False).values_list(
+                    "stock_id", "name"
+                )
+            )
+            self.stdout.write(
+                f"{size:>6} symbols | trie built in {perf_counter() - start:.3f}s"
+            )
+            start = perf_counter()
+            search_index = CompanySearchIndex()
+            for sid, name, business in Company.objects.filter(
+                stock_info__isnull=False
+            ).values_list("stock_id", "name", "business"):
+                search_index.add(sid, name, business)
+            self.stdout.write(
+                f"{size:>6} symbols | tokens built in {perf_counter() - start:.3f}s"
+            )
+            latencies = {
+                "postgres": self._measure(
+                    lambda keyword: list(search_companies(keyword)), keywords
+                ),
+                "trie": self._measure(prefix_index.search, keywords),
+                "tokens": self._measure(search_index.search, keywords),
+            }
+            transaction.set_rollback(True)
+        return latencies
+
+    @staticmethod
+    def _fake_name(rng: random.Random) -> str:
+        if rng.random() < 0.8:
+            return "".join(rng.choices(NAME_CHARACTERS, k=rng.randint(2, 6)))
+        return " ".join(rng.sample(NAME_WORDS, k=2))
+
+    @staticmethod
+    def _measure(search: Callable, keywords: list[str]) -> list[float]:
+        latencies = []
+        for keyword in keywords:
+            start = perf_counter()
+            search(keyword)
+            latencies.append(perf_counter() - start)
+        return latencies
@@ -0,0 +1,19 @@
+from django.core.management.base import CommandError
+
+from main.core.management.base import JobCommand
+from main.market.services import ENRICHMENT_BATCH_SIZE, enrich_companies
+
+
+class Command(JobCommand):
+    help = "Fetch the name and business of the queued placeholder companies."
+
+    def add_arguments(self, parser) -> None:  # noqa: ANN001
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--limit", type=int, default=ENRICHMENT_BATCH_SIZE)
+
+    def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        if options["limit"] < 1:
+            raise CommandError("--limit must be at least 1.")
+        enrich_companies(options["concurrency"], options["limit"])
@@ -1,8 +1,7 @@
-from django.core.management.base import BaseCommand
-
+from main.core.management.base import JobCommand
 from main.market.services import update_all_stocks_history
 
 
-class Command(BaseCommand):
+class Command(JobCommand):
     def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
         update_all_stocks_history()
@@ -1,9 +1,8 @@
-from django.core.management.base import BaseCommand
-
+from main.core.management.base import JobCommand
 from main.market.services import update_company_list
 
 
-class Command(BaseCommand):
+class Command(JobCommand):
     """This command is currently not used."""
 
     def handle(self, *args, **options) -> None:  # noqa: ANN002, ANN003
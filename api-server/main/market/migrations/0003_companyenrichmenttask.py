@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-19 14:00
+
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0002_company_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyEnrichmentTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('done', 'done'), ('failed', 'failed')], db_default='pending', max_length=8)),
+                ('attempts', models.PositiveSmallIntegerField(db_default=0)),
+                ('next_attempt_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+                ('last_error', models.TextField(db_default='')),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='enrichment_task', to='market.company')),
+            ],
+            options={
+                'db_table': 'company_enrichment_task',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='enrichment_task_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:00
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+# A frozen copy of `main.market.tokenizer.search_document` as of this migration,
+# so that later changes to the tokenizer don't change what it does
+TOKEN_RUN_PATTERN = re.compile(
+    r"(?P<cjk>[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)"
+    r"|(?P<word>[0-9A-Z\u3100-\u312f\u31a0-\u31bf]+)"
+)
+
+
+def search_document(*texts):
+    tokens = []
+    for text in texts:
+        for match in TOKEN_RUN_PATTERN.finditer(unicodedata.normalize("NFKC", text).upper()):
+            if cjk := match["cjk"]:
+                tokens.extend(cjk)
+                tokens.extend(cjk[i : i + 2] for i in range(len(cjk) - 1))
+            else:
+                tokens.append(match["word"])
+    return " ".join(tokens)
+
+
+def fill_search_tokens(apps, schema_editor):
+    MaterialFact = apps.get_model('market', 'MaterialFact')
+    batch = []
+    for fact in MaterialFact.objects.only('title', 'description').iterator(chunk_size=BATCH_SIZE):
+        fact.search_tokens = search_document(fact.title, fact.description)
+        batch.append(fact)
+        if len(batch) == BATCH_SIZE:
+            MaterialFact.objects.bulk_update(batch, ['search_tokens'])
+            batch = []
+    MaterialFact.objects.bulk_update(batch, ['search_tokens'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0003_companyenrichmenttask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialfact',
+            name='search_tokens',
+            field=models.TextField(db_default=''),
+        ),
+        migrations.RunPython(fill_search_tokens, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='materialfact',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('search_tokens', config='simple'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='materialfact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='material_fact_search_idx'),
+        ),
+    ]
@@ -1,10 +1,13 @@
 import logging
 import re
 from collections.abc import MutableMapping
+from datetime import datetime
 from typing import Any
 
 import requests
 import urllib3
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db.models import (
     CASCADE,
     CharField,
@@ -12,6 +15,8 @@ from django.db.models import (
     DateTimeField,
     FloatField,
     ForeignKey,
+    GeneratedField,
+    Index,
     Manager,
     Model,
     OneToOneField,
@@ -19,10 +24,17 @@ from django.db.models import (
     PositiveSmallIntegerField,
     TextField,
 )
-from pyquery import PyQuery
+from django.db.models.functions import Now, Upper
 
 from main.core.models import CreateUpdateDateModel
-from main.market import Frequency, ThirdPartyApi, TradeType, UnknownStockIdError
+from main.core.pacing import HostRequestPacer
+from main.market import (
+    EnrichmentStatus,
+    Frequency,
+    ThirdPartyApi,
+    TradeType,
+    UnknownStockIdError,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -47,22 +59,33 @@ class CompanyManager(Manager):
             return (super().create(pk=primary_key, **defaults), True)
 
     @classmethod
-    def fetch_company_info(cls, sid: str) -> dict:
+    def fetch_company_info(
+        cls, sid: str, pacer: HostRequestPacer | None = None
+    ) -> dict:
+        # Imported here so that loading the models doesn't import lxml
+        from main.market.extractors import (
+            extract_company_basic_info,
+            extract_company_business,
+            parse_with_cache,
+        )
+
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        if pacer is not None:
+            pacer.wait(ThirdPartyApi.company_info)
         basic_info_response = requests.post(
             f"{ThirdPartyApi.company_info}{sid}",
             timeout=5,
             verify=False,  # noqa: S501
         )
-        basic_info_document = PyQuery(basic_info_response.text)
-        company_name = basic_info_document.find(
-            "tr:nth-child(2)>td:nth-child(4)"
-        ).text()
-        trade_type = basic_info_document.find("tr:nth-child(2)>td:nth-child(5)").text()
-        trade_type = TradeType.TRADE_TYPE_ZH_ENG_MAP.get(str(trade_type))
+        company_name, market = parse_with_cache(
+            sid, basic_info_response.text, extract_company_basic_info
+        )
+        trade_type = TradeType.TRADE_TYPE_ZH_ENG_MAP.get(market)
         if company_name and trade_type:
             business = ""
             try:
+                if pacer is not None:
+                    pacer.wait(ThirdPartyApi.company_business)
                 business_response = requests.post(
                     ThirdPartyApi.company_business,
                     data={  # please refer to https://mopsov.twse.com.tw/mops/web/t05st03
@@ -78,20 +101,16 @@ class CompanyManager(Manager):
                     timeout=8,
                     verify=False,  # noqa: S501
                 )
-                business = (
-                    PyQuery(business_response.text)("tr")
-                    .filter(
-                        lambda _, this: PyQuery(this)("th").text() == "主要經營業務"
-                    )("td")
-                    .text()
+                (business,) = parse_with_cache(
+                    sid, business_response.text, extract_company_business
                 )
             except Exception:
                 logger.error(f"Failed to fetch business for {sid}")
 
             return {
-                "name": str(company_name),
+                "name": company_name,
                 "trade_type": trade_type,
-                "business": re.sub(r"\s+", "", str(business)),
+                "business": re.sub(r"\s+", "", business),
             }
         else:
             raise UnknownStockIdError(f"Unknown Stock ID: {sid}")
@@ -107,6 +126,19 @@ class Company(Model):
 
     class Meta:
         db_table = "company"
+        indexes = [
+            # Serve `stock_id__contains`/`startswith` and the trigram lookups on
+            # `Upper("name")` (which is also what `name__icontains` compiles to)
+            GinIndex(
+                fields=["stock_id"],
+                opclasses=["gin_trgm_ops"],
+                name="company_stock_id_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="company_name_trgm_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name}({self.stock_id})"
@@ -157,6 +189,37 @@ class History(CreateUpdateDateModel):
         return f"{self.company.pk}({self.date}-{self.frequency})"
 
 
+class MaterialFactManager(Manager):
+    def latest_per_company(
+        self, sids: list[str], limit: int | None, before: datetime | None = None
+    ) -> dict[str, list["MaterialFact"]]:
+        """
+        The latest `limit` facts (all of them if `limit` is None, before `before`
+        if given) of each company in `sids`, newest first. A lateral join reads
+        each company's facts backwards from the unique (company, date_time) index
+        and stops after `limit` rows.
+        """
+        before_condition = "AND date_time < %s" if before is not None else ""
+        facts = self.raw(
+            f"""
+            SELECT f.id, f.company_id, f.date_time, f.title, f.description
+            FROM unnest(%s::varchar[]) AS c (company_id)
+            CROSS JOIN LATERAL (
+                SELECT id, company_id, date_time, title, description
+                FROM {self.model._meta.db_table}
+                WHERE company_id = c.company_id {before_condition}
+                ORDER BY date_time DESC
+                LIMIT %s  -- No limit if NULL
+            ) AS f
+            """,  # noqa: S608
+            [sids, *([before] if before is not None else []), limit],
+        )
+        result: dict[str, list[MaterialFact]] = {sid: [] for sid in sids}
+        for fact in facts:
+            result[fact.company_id].append(fact)  # type: ignore
+        return result
+
+
 class MaterialFact(CreateUpdateDateModel):
     company: Company = ForeignKey(  # type: ignore
         Company, on_delete=CASCADE, related_name="material_facts", db_index=False
@@ -164,10 +227,49 @@ class MaterialFact(CreateUpdateDateModel):
     date_time = DateTimeField()
     title = TextField(db_default="")
     description = TextField(db_default="")
+    # Tokens of the title and description (see `tokenizer.search_document`) since
+    # Postgres' parsers can't split CJK text into words
+    search_tokens = TextField(db_default="")
+    search_vector = GeneratedField(
+        expression=SearchVector("search_tokens", config="simple"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = MaterialFactManager()
 
     class Meta:
         db_table = "material_fact"
         unique_together = [["company", "date_time"]]
+        indexes = [GinIndex(fields=["search_vector"], name="material_fact_search_idx")]
 
     def __str__(self) -> str:
         return f"{self.company.pk}({self.date_time})"
+
+
+class CompanyEnrichmentTask(CreateUpdateDateModel):
+    """Backlog of placeholder companies whose name and business are to be fetched."""
+
+    company: Company = OneToOneField(  # type: ignore
+        Company, on_delete=CASCADE, related_name="enrichment_task", db_index=True
+    )
+    status = CharField(
+        max_length=8,
+        choices=EnrichmentStatus.CHOICES,
+        db_default=EnrichmentStatus.PENDING,
+    )
+    attempts = PositiveSmallIntegerField(db_default=0)
+    next_attempt_at = DateTimeField(db_default=Now())
+    last_error = TextField(db_default="")
+
+    class Meta:
+        db_table = "company_enrichment_task"
+        indexes = [
+            Index(
+                fields=["status", "next_attempt_at"],
+                name="enrichment_task_due_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.company_id}({self.status})"  # type: ignore
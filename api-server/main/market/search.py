@@ -0,0 +1,353 @@
+import heapq
+import re
+import threading
+from array import array
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from html import escape
+from time import monotonic
+
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import Case, F, Q, QuerySet, Value, When
+from django.db.models.functions import Upper
+
+from main.core.cache import get_async_redis_connection, get_redis_connection
+from main.market.cache import aget_company_list_version, get_company_list_version
+from main.market.models import Company, MaterialFact
+from main.market.tokenizer import (
+    infixes,
+    normalize,
+    query_tokens,
+    romanize,
+    tokenize,
+)
+
+SEARCH_RESULT_LIMIT = 30
+MAX_RECORDED_CHANGES = 10_000
+SNIPPET_LENGTH = 80
+
+
+def search_companies(keyword: str, limit: int = SEARCH_RESULT_LIMIT) -> QuerySet:
+    """
+    Listed companies whose stock ID or name matches `keyword`, ranked by:
+    exact stock ID, stock ID prefix, name prefix, substring, then the trigram
+    similarity of the name (which also catches typos). The filters are served by
+    the trigram GIN indexes of `Company`.
+    """
+    keyword = keyword.upper()
+    return (
+        Company.objects.alias(upper_name=Upper("name"))
+        .filter(
+            Q(stock_id__contains=keyword)
+            | Q(upper_name__contains=keyword)
+            | Q(upper_name__trigram_similar=keyword),
+            stock_info__isnull=False,
+        )
+        .annotate(
+            rank=Case(
+                When(stock_id=keyword, then=Value(0)),
+                When(stock_id__startswith=keyword, then=Value(1)),
+                When(upper_name__startswith=keyword, then=Value(2)),
+                When(
+                    Q(stock_id__contains=keyword) | Q(upper_name__contains=keyword),
+                    then=Value(3),
+                ),
+                default=Value(4),
+            ),
+            similarity=TrigramSimilarity(Upper("name"), keyword),
+        )
+        .select_related("stock_info")
+        .order_by("rank", "-similarity", "stock_id")[:limit]
+    )
+
+
+class PrefixTrie:
+    _TERMINAL = ""  # Never collides with a child since keys are single characters
+
+    def __init__(self) -> None:
+        self._root: dict = {}
+
+    def insert(self, key: str, value: str) -> None:
+        node = self._root
+        for char in key.upper():
+            node = node.setdefault(char, {})
+        node.setdefault(self._TERMINAL, []).append(value)
+
+    def search(self, prefix: str, limit: int) -> list[str]:
+        """Values of the keys starting with `prefix`, shorter keys first."""
+        node = self._root
+        for char in prefix.upper():
+            if (node := node.get(char)) is None:
+                return []
+
+        result: dict[str, None] = {}
+        queue = deque([node])
+        while queue and len(result) < limit:
+            node = queue.popleft()
+            for char, child in node.items():
+                if char == self._TERMINAL:
+                    result.update(dict.fromkeys(child))
+                else:
+                    queue.append(child)
+        return list(result)[:limit]
+
+
+class CompanyPrefixIndex:
+    """
+    Per-worker prefix tries of stock IDs and names (and every word of a name). The
+    index is rebuilt lazily once `update_company_list` bumps the company list
+    version.
+    """
+
+    _current: "CompanyPrefixIndex | None" = None
+    _lock = threading.Lock()
+
+    def __init__(self, companies: Iterable[tuple[str, str]], version: int = 0) -> None:
+        self.version = version
+        self._sid_trie = PrefixTrie()
+        self._name_trie = PrefixTrie()
+        for sid, name in companies:
+            self._sid_trie.insert(sid, sid)
+            self._name_trie.insert(name, sid)
+            for word in name.split()[1:]:
+                self._name_trie.insert(word, sid)
+
+    @classmethod
+    def get_current(cls) -> "CompanyPrefixIndex":
+        version = get_company_list_version()
+        with cls._lock:
+            if cls._current is None or cls._current.version != version:
+                cls._current = cls(
+                    Company.objects.filter(stock_info__isnull=False).values_list(
+                        "stock_id", "name"
+                    ),
+                    version=version,
+                )
+            return cls._current
+
+    @classmethod
+    async def aget_current(cls) -> "CompanyPrefixIndex":
+        """`get_current` that only leaves the event loop to rebuild the index."""
+        index = cls._current
+        if index is not None and index.version == await aget_company_list_version():
+            return index
+        return await sync_to_async(cls.get_current)()
+
+    def search(self, keyword: str, limit: int = SEARCH_RESULT_LIMIT) -> list[str]:
+        """Stock IDs ranked by stock ID matches first, then name matches."""
+        result = dict.fromkeys(self._sid_trie.search(keyword, limit))
+        if len(result) < limit:
+            result.update(dict.fromkeys(self._name_trie.search(keyword, limit)))
+        return list(result)[:limit]
+
+
+class CompanySearchIndex:
+    """
+    Per-worker inverted index over stock IDs, names (plus their romanization and the
+    infixes of both) and businesses. Postings are arrays of document IDs. Removed companies are only
+    tombstoned until the next full rebuild.
+
+    Saved and deleted companies are recorded in a Redis sorted set scored by a
+    sequence number, see `record_company_changes`. Each worker applies the changes
+    after the sequence number it has seen, and rebuilds from scratch once the index
+    is older than `FULL_REBUILD_INTERVAL`.
+    """
+
+    # Infixes rank below prefixes, like substring matches did in `search_companies`
+    FIELD_WEIGHTS = {
+        "stock_id": 8.0,
+        "name": 4.0,
+        "infix": 3.0,
+        "romanization": 2.0,
+        "business": 1.0,
+    }
+    EXACT_STOCK_ID_BONUS = 100.0
+    FULL_REBUILD_INTERVAL = 60 * 60 * 24
+    CHANGES_KEY = "company_search_index:changes"
+    CHANGE_SEQUENCE_KEY = "company_search_index:change_sequence"
+
+    _current: "CompanySearchIndex | None" = None
+    _lock = threading.Lock()
+
+    def __init__(self, romanization: bool = True) -> None:
+        self.romanization = romanization
+        self.sequence = 0
+        self.built_at = monotonic()
+        self._sids: list[str | None] = []
+        self._doc_ids: dict[str, int] = {}
+        self._postings: dict[str, dict[str, array]] = {
+            field: {} for field in self.FIELD_WEIGHTS
+        }
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    @classmethod
+    def get_current(cls) -> "CompanySearchIndex":
+        redis = get_redis_connection()
+        with cls._lock:
+            index = cls._current
+            if (
+                index is None
+                or monotonic() - index.built_at > cls.FULL_REBUILD_INTERVAL
+            ):
+                # Changes made while loading are applied again on the next call
+                sequence = int(redis.get(cls.CHANGE_SEQUENCE_KEY) or 0)
+                index = cls()
+                for sid, name, business in (
+                    Company.objects.filter(stock_info__isnull=False)
+                    .order_by("stock_id")
+                    .values_list("stock_id", "name", "business")
+                ):
+                    index.add(sid, name, business)
+                index.sequence = sequence
+                cls._current = index
+            elif changes := redis.zrangebyscore(
+                cls.CHANGES_KEY, f"({index.sequence}", "+inf", withscores=True
+            ):
+                index.apply_changes(
+                    [sid for sid, _ in changes], int(max(s for _, s in changes))
+                )
+            return index
+
+    @classmethod
+    async def aget_current(cls) -> "CompanySearchIndex":
+        """`get_current` that only leaves the event loop to load companies."""
+        index = cls._current
+        if (
+            index is not None
+            and monotonic() - index.built_at <= cls.FULL_REBUILD_INTERVAL
+            and not await get_async_redis_connection().zrangebyscore(
+                cls.CHANGES_KEY, f"({index.sequence}", "+inf", start=0, num=1
+            )
+        ):
+            return index
+        return await sync_to_async(cls.get_current)()
+
+    def apply_changes(self, sids: list[str], sequence: int) -> None:
+        for sid in sids:
+            self.remove(sid)
+        for sid, name, business in Company.objects.filter(
+            stock_id__in=sids, stock_info__isnull=False
+        ).values_list("stock_id", "name", "business"):
+            self.add(sid, name, business)
+        self.sequence = sequence
+
+    def add(self, sid: str, name: str, business: str) -> None:
+        self.remove(sid)
+        doc_id = len(self._sids)
+        self._sids.append(sid)
+        self._doc_ids[sid] = doc_id
+        field_tokens = {
+            "stock_id": tokenize(sid, prefixes=True),
+            "name": tokenize(name, prefixes=True),
+            "infix": infixes(sid) + infixes(name),
+            "romanization": [
+                token
+                for key in (romanize(name) if self.romanization else [])
+                for token in tokenize(key, prefixes=True)
+            ],
+            "business": tokenize(business),
+        }
+        for field, tokens in field_tokens.items():
+            postings = self._postings[field]
+            for token in set(tokens):
+                postings.setdefault(token, array("I")).append(doc_id)
+
+    def remove(self, sid: str) -> None:
+        if (doc_id := self._doc_ids.pop(sid, None)) is not None:
+            self._sids[doc_id] = None
+
+    def search(self, keyword: str, limit: int = SEARCH_RESULT_LIMIT) -> list[str]:
+        """
+        Stock IDs of the companies matching every token of `keyword`, ranked by the
+        weights of the fields the tokens are found in.
+        """
+        scores: dict[int, float] | None = None
+        for token in query_tokens(keyword):
+            token_scores: dict[int, float] = defaultdict(float)
+            for field, weight in self.FIELD_WEIGHTS.items():
+                for doc_id in self._postings[field].get(token, ()):
+                    token_scores[doc_id] += weight
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    doc_id: score + token_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in token_scores
+                }
+        if not scores:
+            return []
+
+        if (doc_id := self._doc_ids.get(normalize(keyword).strip())) in scores:
+            scores[doc_id] += self.EXACT_STOCK_ID_BONUS
+        top = heapq.nlargest(
+            limit,
+            (item for item in scores.items() if self._sids[item[0]] is not None),
+            # Ties go to the companies loaded first, i.e. smaller stock IDs
+            key=lambda item: (item[1], -item[0]),
+        )
+        return [self._sids[doc_id] for doc_id, _ in top]  # type: ignore
+
+
+def record_company_changes(sids: Iterable[str]) -> None:
+    """Let every worker's `CompanySearchIndex` pick up the changes of `sids`."""
+    redis = get_redis_connection()
+    sequence = redis.incr(CompanySearchIndex.CHANGE_SEQUENCE_KEY)
+    redis.zadd(CompanySearchIndex.CHANGES_KEY, dict.fromkeys(sids, sequence))
+    # Workers lagging further behind than this catch up with their full rebuild
+    redis.zremrangebyrank(CompanySearchIndex.CHANGES_KEY, 0, -MAX_RECORDED_CHANGES - 1)
+
+
+def search_material_facts(
+    keyword: str, offset: int = 0, limit: int = SEARCH_RESULT_LIMIT
+) -> list[MaterialFact]:
+    """
+    Material facts containing every token of `keyword` in their title or
+    description, ranked by how often the tokens occur, then newest first. Matches
+    are looked up in the GIN index of `MaterialFact.search_vector`.
+    """
+    if not (tokens := list(dict.fromkeys(query_tokens(keyword)))):
+        return []
+    query = SearchQuery(" ".join(tokens), config="simple")
+    return list(
+        MaterialFact.objects.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .select_related("company")
+        .defer("search_tokens", "search_vector")
+        .order_by("-rank", "-date_time", "company_id")[offset : offset + limit]
+    )
+
+
+def highlight(text: str, keyword: str, length: int = SNIPPET_LENGTH) -> str:
+    """
+    HTML-escaped excerpt of about `length` characters of `text` around the first
+    occurrence of the tokens of `keyword`, each occurrence wrapped in `<mark>`.
+    """
+    spans = sorted(
+        (match.start(), match.end())
+        for token in set(query_tokens(keyword))
+        for match in re.finditer(re.escape(token), text, re.IGNORECASE)
+    )
+    # Merge overlapping tokens, e.g. the bigrams 現金, 金股 and 股利 of 現金股利
+    merged: list[list[int]] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    begin = max(0, merged[0][0] - length // 4) if merged else 0
+    end = min(len(text), begin + length)
+    parts, cursor = [], begin
+    for start, stop in merged:
+        if stop <= begin or start >= end:
+            continue
+        start, stop = max(start, begin), min(stop, end)
+        parts.append(escape(text[cursor:start]))
+        parts.append(f"<mark>{escape(text[start:stop])}</mark>")
+        cursor = stop
+    parts.append(escape(text[cursor:end]))
+    return "".join(["…" if begin > 0 else "", *parts, "…" if end < len(text) else ""])
@@ -1,33 +1,69 @@
 import csv
+import hashlib
 import logging
 import math
+from concurrent.futures import as_completed
 from datetime import UTC, date, datetime, time, timedelta, timezone
 from io import StringIO
-from time import sleep
+from time import perf_counter, sleep
 from typing import Literal
 
 import requests
 import urllib3
 from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.functions import Now
 from requests import ConnectTimeout, JSONDecodeError, ReadTimeout
 
-from main.market import Frequency, ThirdPartyApi, TradeType
+from main.core.bulk import BulkUpsertResult, bulk_upsert
+from main.core.cache import get_redis_connection
+from main.core.job_metrics import ContextThreadPoolExecutor
+from main.core.pacing import HostRequestPacer, RequestPacer
+from main.market import (
+    HISTORY_RETENTION_YEARS,
+    EnrichmentStatus,
+    Frequency,
+    ThirdPartyApi,
+    TradeType,
+    UnknownStockIdError,
+)
 from main.market.cache import (
+    MaterialFactWatermark,
+    MaterialFactWatermarkCacheManager,
+    ResponseBodyCacheManager,
     TimeSeriesStockInfo,
     TimeSeriesStockInfoCacheManager,
     TimeSeriesStockInfoPointData,
+    bump_company_list_version,
+    bump_history_version,
 )
 from main.market.models import (
     Company,
+    CompanyEnrichmentTask,
+    CompanyManager,
     History,
     MarketIndexPerMinute,
     MaterialFact,
     StockInfo,
 )
+from main.market.search import record_company_changes
+from main.market.tokenizer import search_document
 
 logger = logging.getLogger(__name__)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+HISTORY_PURGE_BATCH_SIZE = 10_000
+ENRICHMENT_BATCH_SIZE = 200
+ENRICHMENT_MAX_ATTEMPTS = 5
+# Seconds between two requests to the same host (isin.twse.com.tw, mopsov.twse.com.tw)
+ENRICHMENT_REQUEST_INTERVAL = 1.5
+MATERIAL_FACT_RETENTION_DAYS = 30
+MATERIAL_FACT_WATERMARK_TIMEOUT = 60 * 60 * 24 * 7
+REALTIME_BATCH_SIZE = 145
+# Seconds between the starts of two realtime requests (rate limit: 3 per 5 seconds)
+REALTIME_REQUEST_INTERVAL = 2
+
 
 def fetch_and_store_realtime_stock_info() -> None:
     logger.info("Start fetching realtime sotck info.")
@@ -38,11 +74,10 @@ def fetch_and_store_realtime_stock_info() -> None:
     all = [f"tse_{market_indices[0]}.tw", f"otc_{market_indices[1]}.tw"] + [
         f"{x['trade_type']}_{x['pk']}.tw" for x in query_set
     ]
-    batch_size = 145
-    logger.info(f"Expected request count: {math.ceil(len(all) / batch_size)}")
+    logger.info(f"Expected request count: {math.ceil(len(all) / REALTIME_BATCH_SIZE)}")
     while len(all) > 0:
         start = datetime.now()
-        url = f"{ThirdPartyApi.realtime['stock']}{'|'.join(all[:batch_size])}"
+        url = f"{ThirdPartyApi.realtime['stock']}{'|'.join(all[:REALTIME_BATCH_SIZE])}"
         try:
             json_data = requests.get(url, timeout=4, verify=False).json()  # noqa: S501
             to_update_batch = []
@@ -130,23 +165,18 @@ def fetch_and_store_realtime_stock_info() -> None:
                             )
                         else:
                             to_update_batch.append(
-                                StockInfo(
-                                    company_id=company_id,
-                                    date=date_,
-                                    quantity=quantity,
-                                    close_price=price,
-                                    fluct_price=fluct_price,
-                                )
+                                (company_id, date_, quantity, price, fluct_price)
                             )
                 except Exception as e:
                     logger.error(f"<{type(e).__name__}>: {e}")
                     logger.error(f"Row: {row}")
                     continue
-            StockInfo.objects.bulk_create(
+            bulk_upsert(
+                StockInfo,
+                ["company_id", "date", "quantity", "close_price", "fluct_price"],
                 to_update_batch,
-                update_conflicts=True,
-                update_fields=["date", "quantity", "close_price", "fluct_price"],
                 unique_fields=["company_id"],
+                update_fields=["date", "quantity", "close_price", "fluct_price"],
             )
         except ReadTimeout:
             logger.warning("ReadTimeout")
@@ -158,11 +188,15 @@ def fetch_and_store_realtime_stock_info() -> None:
             logger.error(f"<{type(e).__name__}>: {e}")
             logger.error(f"URL: {url}")
         finally:
-            all = all[batch_size:]
-
-            # API rate limit: 3 requests per 5 seconds
+            all = all[REALTIME_BATCH_SIZE:]
             if all:
-                sleep(max(0, 2 - (datetime.now() - start).total_seconds()))
+                sleep(
+                    max(
+                        0,
+                        REALTIME_REQUEST_INTERVAL
+                        - (datetime.now() - start).total_seconds(),
+                    )
+                )
     logger.info("All realtime stock info updated!")
 
 
@@ -208,6 +242,7 @@ def _store_market_per_minute_info(
         number=minutes_after_opening,
         defaults={"price": price, "fluct_price": fluct_price},
     )
+    ResponseBodyCacheManager.delete("market_index")
 
 
 def update_company_list() -> None:
@@ -224,31 +259,30 @@ def update_company_list() -> None:
                 verify=False,  # noqa: S501
                 timeout=10,
             ).json()
-            incoming_sids = {
-                (row.get("SecuritiesCompanyCode") or row.get("Code"))
+            names = {
+                (row.get("SecuritiesCompanyCode") or row.get("Code")): (
+                    row.get("CompanyName") or row.get("Name") or ""
+                )
                 for row in response
             }
-            existing_sids = {
-                c.pk for c in Company.objects.filter(trade_type=trade_type)
-            }
-            for sid in incoming_sids - existing_sids:
-                try:
-                    _c, created = Company.objects.get_or_create(pk=sid)
-                    if created:
-                        to_create_stock_info.append(
-                            StockInfo(
-                                company_id=sid,
-                                date=today,
-                                quantity=0,
-                                close_price=0,
-                                fluct_price=0,
-                            )
-                        )
-                        new_sids.append(sid)
-                except Exception as e:
-                    logger.error(f"<{type(e).__name__}>: {e}")
-                finally:
-                    sleep(1.5)
+            existing_sids = set(
+                Company.objects.filter(pk__in=names).values_list("pk", flat=True)
+            )
+            created_sids = create_placeholder_companies(
+                trade_type,
+                {sid: name for sid, name in names.items() if sid not in existing_sids},
+            )
+            to_create_stock_info.extend(
+                StockInfo(
+                    company_id=sid,
+                    date=today,
+                    quantity=0,
+                    close_price=0,
+                    fluct_price=0,
+                )
+                for sid in created_sids
+            )
+            new_sids.extend(created_sids)
         except Exception as e:
             logger.error(f"<{type(e).__name__}>: {e}")
 
@@ -263,6 +297,89 @@ def update_company_list() -> None:
     logger.info("Company list updated!")
 
 
+def create_placeholder_companies(trade_type: str, names: dict[str, str]) -> list[str]:
+    """
+    Store new companies right away with their listed names (`names` maps stock IDs
+    to names), and queue them for `enrich_companies` to fetch the rest of their
+    info. The company list version is bumped, since some IDs may never be
+    enriched.
+    """
+    if not names:
+        return []
+    with transaction.atomic():
+        Company.objects.bulk_create(
+            [
+                Company(stock_id=sid, name=(name or sid)[:32], trade_type=trade_type)
+                for sid, name in names.items()
+            ],
+            ignore_conflicts=True,
+        )
+        CompanyEnrichmentTask.objects.bulk_create(
+            [CompanyEnrichmentTask(company_id=sid) for sid in names],
+            ignore_conflicts=True,
+        )
+    sids = list(names)
+    bump_company_list_version()
+    record_company_changes(sids)
+    return sids
+
+
+def enrich_companies(concurrency: int, limit: int = ENRICHMENT_BATCH_SIZE) -> None:
+    """
+    Fetch the info of the queued placeholder companies with a bounded thread pool.
+    Requests are paced per host, and failed tasks are retried with exponential
+    backoff until `ENRICHMENT_MAX_ATTEMPTS` is reached.
+    """
+    logger.info("Start enriching companies.")
+    tasks = list(
+        CompanyEnrichmentTask.objects.filter(
+            status=EnrichmentStatus.PENDING, next_attempt_at__lte=Now()
+        ).order_by("next_attempt_at")[:limit]
+    )
+    logger.info(f"Companies to enrich: {len(tasks)}")
+
+    pacer = HostRequestPacer(default_interval=ENRICHMENT_REQUEST_INTERVAL)
+    enriched_sids = []
+    failed_count = 0
+    with ContextThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Workers only send requests, the database is written from this thread
+        futures = {
+            executor.submit(
+                CompanyManager.fetch_company_info, task.company_id, pacer
+            ): task
+            for task in tasks
+        }
+        for future in as_completed(futures):
+            task = futures[future]
+            task.attempts += 1
+            try:
+                Company.objects.filter(pk=task.company_id).update(**future.result())
+                task.status = EnrichmentStatus.DONE
+                task.last_error = ""
+                enriched_sids.append(task.company_id)
+            except Exception as e:
+                failed_count += 1
+                task.last_error = f"<{type(e).__name__}>: {e}"
+                if (
+                    isinstance(e, UnknownStockIdError)
+                    or task.attempts >= ENRICHMENT_MAX_ATTEMPTS
+                ):
+                    task.status = EnrichmentStatus.FAILED
+                else:
+                    task.next_attempt_at = datetime.now(UTC) + timedelta(
+                        minutes=2**task.attempts
+                    )
+                logger.error(f"{task.last_error} ({task.company_id})")
+            task.save()
+
+    if enriched_sids:
+        bump_company_list_version()
+        record_company_changes(enriched_sids)
+    logger.info(
+        f"Companies enriched! Succeeded: {len(enriched_sids)}, failed: {failed_count}"
+    )
+
+
 def _fetch_and_store_historical_info_from_yahoo(
     company: Company, frequency: str
 ) -> None:
@@ -322,25 +439,181 @@ def _fetch_and_store_historical_info_from_yahoo(
 
 
 def update_all_stocks_history() -> None:
-    to_create_batch = [
-        History(
-            company_id=stock_info.company.pk,
-            frequency=Frequency.DAILY,
-            date=stock_info.date,
-            quantity=stock_info.quantity,
-            close_price=stock_info.close_price,
-        )
-        for stock_info in StockInfo.objects.filter(date=date.today()).select_related(
-            "company"
+    logger.info("Start updating all stocks history.")
+    today = date.today()
+
+    # Snapshot today's close info without moving the rows out of the database
+    start = perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO history (
+                company_id, frequency, date, quantity, close_price, created_at,
+                updated_at
+            )
+            SELECT
+                company_id, %s, date, quantity, close_price, statement_timestamp(),
+                statement_timestamp()
+            FROM stock_info
+            WHERE date = %s
+            ON CONFLICT (company_id, frequency, date) DO UPDATE SET
+                quantity = EXCLUDED.quantity,
+                close_price = EXCLUDED.close_price,
+                updated_at = EXCLUDED.updated_at
+            """,
+            [Frequency.DAILY, today],
         )
-    ]
-    History.objects.bulk_create(
-        to_create_batch,
-        update_conflicts=True,
-        update_fields=["quantity", "close_price"],
-        unique_fields=["company_id", "frequency", "date"],
+        snapshot_count = cursor.rowcount
+    logger.info(
+        f"Stored {snapshot_count} daily close rows in {perf_counter() - start:.3f}s."
+    )
+
+    # Purge in batches to keep each transaction (and its locks) short
+    start = perf_counter()
+    purged_count = 0
+    expired_query_set = History.objects.filter(
+        date__lt=today - relativedelta(years=HISTORY_RETENTION_YEARS)
+    )
+    while True:
+        batch_count, _ = History.objects.filter(
+            pk__in=expired_query_set.values("pk")[:HISTORY_PURGE_BATCH_SIZE]
+        ).delete()
+        purged_count += batch_count
+        if batch_count < HISTORY_PURGE_BATCH_SIZE:
+            break
+    logger.info(
+        f"Purged {purged_count} expired history rows in {perf_counter() - start:.3f}s."
+    )
+    bump_history_version()
+    logger.info("All stocks history updated!")
+
+
+def backfill_history(years: int, concurrency: int, restart: bool = False) -> None:
+    """
+    Backfill daily history with the whole-market daily close file of each trading
+    day. Finished days are checkpointed in Redis so that an interrupted run can be
+    resumed by running it again.
+    """
+    logger.info(f"Start backfilling history of the last {years} year(s).")
+    redis = get_redis_connection()
+    if restart:
+        redis.delete(*(_backfill_checkpoint_key(t) for t in TradeType.ALL))
+
+    end = date.today() - timedelta(days=1)
+    start = end - relativedelta(years=years)
+    tasks = []
+    for trade_type in TradeType.ALL:
+        finished = redis.smembers(_backfill_checkpoint_key(trade_type))
+        day = start
+        while day <= end:
+            # Markets are closed on weekends
+            if day.weekday() < 5 and day.isoformat() not in finished:
+                tasks.append((trade_type, day))
+            day += timedelta(days=1)
+    logger.info(f"Trading days to backfill: {len(tasks)}")
+
+    # API rate limit: 3 requests per 5 seconds (per host)
+    pacers = {trade_type: RequestPacer(interval=2) for trade_type in TradeType.ALL}
+    stored_count = failed_count = 0
+    with ContextThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(
+                _backfill_single_day, trade_type, day, pacers[trade_type]
+            ): (trade_type, day)
+            for trade_type, day in tasks
+        }
+        for future in as_completed(futures):
+            trade_type, day = futures[future]
+            try:
+                stored_count += future.result()
+                redis.sadd(_backfill_checkpoint_key(trade_type), day.isoformat())
+            except Exception as e:
+                failed_count += 1
+                logger.error(f"<{type(e).__name__}>: {e} ({trade_type} {day})")
+    bump_history_version()
+    logger.info(
+        f"History backfilled! Rows stored: {stored_count}, failed days: {failed_count}"
     )
-    History.objects.filter(date__lt=date.today() - timedelta(days=80)).delete()
+
+
+def _backfill_checkpoint_key(trade_type: str) -> str:
+    return f"history_backfill:{trade_type}"
+
+
+def _backfill_single_day(trade_type: str, day: date, pacer: RequestPacer) -> int:
+    try:
+        pacer.wait()
+        rows = _fetch_daily_close_rows(trade_type, day)
+        if not rows:
+            return 0
+        inserted, updated = bulk_upsert(
+            History,
+            ["company_id", "frequency", "date", "quantity", "close_price"],
+            [(sid, Frequency.DAILY, day, q, price) for sid, q, price in rows],
+            unique_fields=["company_id", "frequency", "date"],
+            update_fields=["quantity", "close_price"],
+            # The files also list warrants, ETNs, etc. which are not tracked
+            skip_unknown_references=True,
+        )
+        return inserted + updated
+    finally:
+        # Each worker thread owns its database connection
+        connection.close()
+
+
+def _fetch_daily_close_rows(trade_type: str, day: date) -> list[tuple[str, int, float]]:
+    """Return (stock_id, quantity, close_price) of every stock traded on `day`."""
+    if trade_type == TradeType.TSE:
+        date_param = day.strftime("%Y%m%d")
+    else:
+        date_param = f"{day.year - 1911}/{day:%m/%d}"
+    payload: dict = requests.get(
+        f"{ThirdPartyApi.historical_single_day[trade_type]}{date_param}",
+        verify=False,  # noqa: S501
+        timeout=10,
+    ).json()
+
+    # Column indices of stock ID, quantity (shares) and close price
+    if trade_type == TradeType.TSE:
+        if payload.get("stat") != "OK":  # market was closed on that day
+            return []
+        table = next(
+            (
+                t
+                for t in payload.get("tables", [])
+                if "證券代號" in t.get("fields", []) and "收盤價" in t["fields"]
+            ),
+            None,
+        )
+        if table is None:
+            return []
+        raw_rows = table.get("data", [])
+        fields = table["fields"]
+        columns = (
+            fields.index("證券代號"),
+            fields.index("成交股數"),
+            fields.index("收盤價"),
+        )
+    else:
+        raw_rows = payload.get("aaData") or next(
+            iter(t.get("data", []) for t in payload.get("tables", [])), []
+        )
+        columns = (0, 7, 2)
+
+    rows = []
+    sid_column, quantity_column, close_column = columns
+    for raw_row in raw_rows:
+        try:
+            rows.append(
+                (
+                    str(raw_row[sid_column]).strip(),
+                    int(str(raw_row[quantity_column]).replace(",", "")),
+                    round(float(str(raw_row[close_column]).replace(",", "")), 2),
+                )
+            )
+        except (ValueError, IndexError):
+            continue  # not traded on that day, e.g. close price is "--"
+    return rows
 
 
 def update_material_facts() -> None:
@@ -352,53 +625,113 @@ def update_material_facts() -> None:
                 verify=False,  # noqa: S501
                 timeout=10,
             ).json()
-
-            # Fill the data of missed companies
-            stock_id_key = (
-                "公司代號" if trade_type == TradeType.TSE else "SecuritiesCompanyCode"
-            )
-            stock_id_set = {row[stock_id_key] for row in response}
-            for stock_id in stock_id_set - {
-                row["pk"]
-                for row in Company.objects.filter(pk__in=stock_id_set).values("pk")
-            }:
-                # Do not use bulk_create because only get_or_create will automatically
-                # fetch company info.
-                Company.objects.get_or_create(pk=stock_id)
-                sleep(0.5)
-
-            MaterialFact.objects.bulk_create(
-                [
-                    MaterialFact(
-                        company_id=row[stock_id_key],
-                        date_time=datetime.combine(
-                            roc_date_string_to_date(row["發言日期"]),
-                            time(
-                                int(row["發言時間"][-6:-4] or 0),
-                                int(row["發言時間"][-4:-2] or 0),
-                                int(row["發言時間"][-2:] or 0),
-                            ),
-                            tzinfo=timezone(timedelta(hours=8)),
-                        ),
-                        title=row["主旨 " if trade_type == TradeType.TSE else "主旨"],
-                        description=row["說明"],
-                    )
-                    for row in response
-                ],
-                update_conflicts=True,
-                update_fields=["title", "description"],
-                unique_fields=["company_id", "date_time"],
+            inserted, updated, skipped = _ingest_material_facts(trade_type, response)
+            logger.info(
+                f"{trade_type} material facts: {inserted} inserted, "
+                f"{updated} updated, {skipped} skipped."
             )
         except Exception as e:
             logger.error(f"<{type(e).__name__}>: {e}")
 
-    # Delete data that is too old
-    MaterialFact.objects.filter(
-        date_time__lt=(datetime.now(UTC) + timedelta(hours=8)) - timedelta(days=30)
-    ).delete()
+    # Delete data that is too old, once a day is enough
+    if cache.add(
+        f"material_fact_purged:{date.today().isoformat()}", True, 60 * 60 * 24
+    ):
+        MaterialFact.objects.filter(
+            date_time__lt=(datetime.now(UTC) + timedelta(hours=8))
+            - timedelta(days=MATERIAL_FACT_RETENTION_DAYS)
+        ).delete()
     logger.info("Material facts updated!")
 
 
+def _ingest_material_facts(
+    trade_type: str, response: list[dict[str, str]]
+) -> tuple[int, int, int]:
+    """
+    Write the announcements of `response` that are new or changed since the last
+    run, according to the market's watermark: a digest of the whole feed and a
+    content hash of each of its announcements.
+    Returns the numbers of inserted, updated and skipped announcements.
+    """
+    stock_id_key = (
+        "公司代號" if trade_type == TradeType.TSE else "SecuritiesCompanyCode"
+    )
+    name_key = "公司名稱" if trade_type == TradeType.TSE else "CompanyName"
+    title_key = "主旨 " if trade_type == TradeType.TSE else "主旨"
+
+    keyed_hashes = [
+        (
+            f"{row[stock_id_key]}:{row['發言日期']}:{row['發言時間']}",
+            hashlib.blake2b(
+                f"{row[title_key]}\0{row['說明']}".encode(), digest_size=8
+            ).hexdigest(),
+        )
+        for row in response
+    ]
+    row_hashes = dict(keyed_hashes)
+    digest = hashlib.blake2b(
+        "".join(sorted(f"{k}={v};" for k, v in row_hashes.items())).encode(),
+        digest_size=16,
+    ).hexdigest()
+    watermark = MaterialFactWatermarkCacheManager.get(trade_type)
+    if watermark is not None and watermark.digest == digest:
+        return 0, 0, len(response)
+
+    seen_hashes = watermark.row_hashes if watermark is not None else {}
+    changed_rows = [
+        row
+        for row, (key, row_hash) in zip(response, keyed_hashes, strict=True)
+        if seen_hashes.get(key) != row_hash
+    ]
+
+    # Fill the data of missed companies
+    names = {row[stock_id_key]: row.get(name_key, "") for row in changed_rows}
+    existing_sids = {
+        row["pk"] for row in Company.objects.filter(pk__in=names).values("pk")
+    }
+    create_placeholder_companies(
+        trade_type,
+        {sid: name for sid, name in names.items() if sid not in existing_sids},
+    )
+
+    facts = [
+        (
+            row[stock_id_key],
+            datetime.combine(
+                roc_date_string_to_date(row["發言日期"]),
+                time(
+                    int(row["發言時間"][-6:-4] or 0),
+                    int(row["發言時間"][-4:-2] or 0),
+                    int(row["發言時間"][-2:] or 0),
+                ),
+                tzinfo=timezone(timedelta(hours=8)),
+            ),
+            row[title_key],
+            row["說明"],
+            search_document(row[title_key], row["說明"]),
+        )
+        for row in changed_rows
+    ]
+    result = (
+        bulk_upsert(
+            MaterialFact,
+            ["company_id", "date_time", "title", "description", "search_tokens"],
+            facts,
+            unique_fields=["company_id", "date_time"],
+            update_fields=["title", "description", "search_tokens"],
+        )
+        if facts
+        else BulkUpsertResult(inserted=0, updated=0)
+    )
+
+    MaterialFactWatermarkCacheManager.set(
+        trade_type,
+        MaterialFactWatermark(digest=digest, row_hashes=row_hashes),
+        MATERIAL_FACT_WATERMARK_TIMEOUT,
+    )
+    return result.inserted, result.updated, len(response) - len(changed_rows)
+
+
 def roc_date_string_to_date(roc_date_string: str) -> date:
     return datetime(
         int(roc_date_string[:3]) + 1911,
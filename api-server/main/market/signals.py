@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from main.market.models import Company
+from main.market.search import record_company_changes
+
+
+@receiver([post_save, post_delete], sender=Company)
+def update_company_search_index(
+    sender: type[Company],
+    instance: Company,
+    **kwargs,  # noqa: ANN003
+) -> None:
+    transaction.on_commit(lambda: record_company_changes([instance.pk]))
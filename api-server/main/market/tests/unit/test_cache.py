@@ -8,6 +8,8 @@ from main.market.cache import (
     TimeSeriesStockInfo,
     TimeSeriesStockInfoCacheManager,
     TimeSeriesStockInfoPointData,
+    bump_history_version,
+    get_history_version,
 )
 
 
@@ -237,3 +239,17 @@ class TestTimeSeriesStockInfoCacheManager:
         mock_cache.delete.assert_called_once_with(
             f"TimeSeriesStockInfoCacheManager:{stock_id}"
         )
+
+
+class TestHistoryVersion:
+    @patch("main.market.cache.cache")
+    def test_bump_history_version(self, mock_cache: Mock) -> None:
+        mock_cache.get.return_value = 0
+        assert get_history_version() == 0
+
+        bump_history_version()
+
+        key, version, timeout = mock_cache.set.call_args.args
+        assert key == "history_version"
+        assert version > 0
+        assert timeout is None
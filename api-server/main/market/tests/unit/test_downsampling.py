@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from main.market.downsampling import downsample_price_rows, lttb_indices
+
+
+class TestLttbIndices:
+    def test_lttb_indices_keeps_first_and_last_points(self) -> None:
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 50)
+
+        indices = lttb_indices(x, y, 100)
+
+        assert len(indices) == 100
+        assert indices[0] == 0
+        assert indices[-1] == 999
+        assert np.all(np.diff(indices) > 0)
+
+    def test_lttb_indices_keeps_extremes(self) -> None:
+        x = np.arange(1000, dtype=np.float64)
+        y = np.full(1000, 10.0)
+        y[300], y[700] = 99.0, -99.0
+
+        indices = lttb_indices(x, y, 20)
+
+        assert 300 in indices
+        assert 700 in indices
+
+    def test_lttb_indices_with_fewer_points_than_max_points(self) -> None:
+        x = np.arange(5, dtype=np.float64)
+
+        assert list(lttb_indices(x, x, 10)) == [0, 1, 2, 3, 4]
+
+
+class TestDownsamplePriceRows:
+    def test_downsample_price_rows(self) -> None:
+        rows = [
+            (date(2024, 1, 1) + timedelta(days=i), 100.0 + i % 7) for i in range(500)
+        ]
+
+        result = downsample_price_rows(rows, 50)
+
+        assert len(result) == 50
+        assert result[0] == rows[0]
+        assert result[-1] == rows[-1]
+        assert set(result) <= set(rows)
+
+    def test_downsample_price_rows_returns_short_series_as_is(self) -> None:
+        rows = [(date(2024, 1, 1), 100.0), (date(2024, 1, 2), 101.0)]
+
+        assert downsample_price_rows(rows, 10) == rows
@@ -0,0 +1,112 @@
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from main.market.cache import ParsedPage
+from main.market.extractors import (
+    PARSE_CACHE_TIMEOUT,
+    extract_company_basic_info,
+    extract_company_business,
+    parse_with_cache,
+)
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+
+@pytest.fixture
+def pages() -> dict[str, str]:
+    return {
+        path.stem: path.read_text(encoding="utf-8")
+        for path in FIXTURES_DIR.glob("*.html")
+    }
+
+
+class TestExtractCompanyBasicInfo:
+    def test_saved_page(self, pages: dict[str, str]) -> None:
+        assert extract_company_basic_info(pages["isin_single_main_2330"]) == [
+            "台積電",
+            "上市",
+        ]
+
+    def test_unknown_stock_id(self, pages: dict[str, str]) -> None:
+        assert extract_company_basic_info(pages["isin_single_main_unknown"]) == [
+            "",
+            "",
+        ]
+
+    def test_only_the_second_row_is_read(self) -> None:
+        text = (
+            "<table><tr><td>1</td><td>2</td><td>3</td><td>名稱</td><td>市場</td></tr>"
+            "<tr><td>1</td><td>2</td><td>3</td><td>力積電</td><td>上櫃</td></tr>"
+            "<tr><td>1</td><td>2</td><td>3</td><td>其他</td><td>上市</td></tr></table>"
+        )
+
+        assert extract_company_basic_info(text) == ["力積電", "上櫃"]
+
+    def test_empty_page(self) -> None:
+        assert extract_company_basic_info("") == ["", ""]
+
+
+class TestExtractCompanyBusiness:
+    def test_saved_page(self, pages: dict[str, str]) -> None:
+        (business,) = extract_company_business(pages["mops_t05st03_2330"])
+
+        assert business.startswith("1.依客戶之訂單")
+        assert "2.提供前述產品之封裝與測試服務" in business
+        assert business.endswith("相關應用產品與系統。")
+        assert "<br>" not in business
+
+    def test_xpath_fallback(self) -> None:
+        # The header is split by a nested tag, which the regex doesn't expect
+        text = (
+            "<table><tr><th><span>主要</span>經營業務</th>"
+            "<td>晶圓代工 &amp; 封裝</td></tr></table>"
+        )
+
+        assert extract_company_business(text) == ["晶圓代工 & 封裝"]
+
+    def test_missing_row(self) -> None:
+        assert extract_company_business("<table><tr><th>本公司</th></tr></table>") == [
+            ""
+        ]
+
+    def test_empty_page(self) -> None:
+        assert extract_company_business("") == [""]
+
+
+@patch("main.market.extractors.ParsedPageCacheManager")
+class TestParseWithCache:
+    def test_cache_miss(self, mock_cache: Mock) -> None:
+        mock_cache.get.return_value = None
+        extract = Mock(__name__="extract", return_value=["a", "b"])
+
+        assert parse_with_cache("2330", "<html></html>", extract) == ["a", "b"]
+
+        extract.assert_called_once_with("<html></html>")
+        identifier = mock_cache.get.call_args.args[0]
+        assert identifier.startswith("extract:2330:")
+        mock_cache.set.assert_called_once_with(
+            identifier, ParsedPage(values=["a", "b"]), PARSE_CACHE_TIMEOUT
+        )
+
+    def test_cache_hit(self, mock_cache: Mock) -> None:
+        mock_cache.get.return_value = ParsedPage(values=["cached"])
+        extract = Mock(__name__="extract")
+
+        assert parse_with_cache("2330", "<html></html>", extract) == ["cached"]
+
+        extract.assert_not_called()
+        mock_cache.set.assert_not_called()
+
+    def test_identifier_follows_page_content(self, mock_cache: Mock) -> None:
+        mock_cache.get.return_value = None
+        extract = Mock(__name__="extract", return_value=[""])
+
+        parse_with_cache("2330", "<html>a</html>", extract)
+        parse_with_cache("2330", "<html>b</html>", extract)
+        parse_with_cache("2330", "<html>a</html>", extract)
+
+        first, second, third = (c.args[0] for c in mock_cache.get.call_args_list)
+        assert first != second
+        assert first == third
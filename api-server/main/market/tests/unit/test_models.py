@@ -1,4 +1,6 @@
+from collections.abc import Iterator
 from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
 from typing import Any
 from unittest.mock import Mock, patch
 
@@ -19,6 +21,8 @@ from main.market.models import (
 )
 from main.trade_record.models import TradeRecord
 
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
 
 @pytest.mark.django_db
 class TestCompanyManager:
@@ -91,85 +95,63 @@ class TestCompanyManager:
         assert company.business == "Custom business"
         mock_fetch.assert_not_called()
 
+    @pytest.fixture
+    def pages(self) -> dict[str, str]:
+        return {
+            path.stem: path.read_text(encoding="utf-8")
+            for path in FIXTURES_DIR.glob("*.html")
+        }
+
+    @pytest.fixture(autouse=True)
+    def mock_parsed_page_cache(self) -> Iterator[Mock]:
+        with patch("main.market.extractors.ParsedPageCacheManager") as mock_cache:
+            mock_cache.get.return_value = None
+            yield mock_cache
+
     @patch("requests.post")
-    @patch("main.market.models.PyQuery")
     def test_fetch_company_info_success(
-        self, mock_pyquery: Mock, mock_post: Mock
+        self, mock_post: Mock, pages: dict[str, str]
     ) -> None:
-        # Mock the basic info response
-        mock_basic_response = Mock()
-        mock_basic_response.text = "<html>basic info</html>"
-
-        # Mock the business response
-        mock_business_response = Mock()
-        mock_business_response.text = "<html>business info</html>"
-
-        mock_post.side_effect = [mock_basic_response, mock_business_response]
-
-        # Mock PyQuery responses
-        mock_basic_doc = Mock()
-        mock_basic_doc.find.side_effect = [
-            Mock(text=Mock(return_value="Test Company")),  # company name
-            Mock(text=Mock(return_value="上市")),  # trade type
+        mock_post.side_effect = [
+            Mock(text=pages["isin_single_main_2330"]),
+            Mock(text=pages["mops_t05st03_2330"]),
         ]
 
-        mock_business_doc = Mock()
-        mock_business_doc.return_value.filter.return_value.return_value.text.return_value = "  Main Business  "
-
-        mock_pyquery.side_effect = [mock_basic_doc, mock_business_doc]
-
-        result = CompanyManager.fetch_company_info("1234")
+        result = CompanyManager.fetch_company_info("2330")
 
         assert result == {
-            "name": "Test Company",
+            "name": "台積電",
             "trade_type": TradeType.TSE,
-            "business": "MainBusiness",
+            "business": (
+                "1.依客戶之訂單與其提供之產品設計說明，以從事製造與銷售積體電路以及其他晶圓半導體裝置。"
+                "2.提供前述產品之封裝與測試服務、光罩製作及設計服務。"
+                "3.研究、開發、設計、製造、銷售、封裝、測試LED照明裝置及相關應用產品與系統。"
+            ),
         }
 
     @patch("requests.post")
-    @patch("main.market.models.PyQuery")
     def test_fetch_company_info_unknown_stock_id(
-        self, mock_pyquery: Mock, mock_post: Mock
+        self, mock_post: Mock, pages: dict[str, str]
     ) -> None:
-        mock_response = Mock()
-        mock_response.text = "<html></html>"
-        mock_post.return_value = mock_response
-
-        mock_doc = Mock()
-        mock_doc.find.side_effect = [
-            Mock(text=Mock(return_value="")),  # empty company name
-            Mock(text=Mock(return_value="上市")),  # trade type
-        ]
-        mock_pyquery.return_value = mock_doc
+        mock_post.return_value = Mock(text=pages["isin_single_main_unknown"])
 
         with pytest.raises(UnknownStockIdError, match="Unknown Stock ID: 1234"):
             CompanyManager.fetch_company_info("1234")
 
     @patch("requests.post")
-    @patch("main.market.models.PyQuery")
     @patch("main.market.models.logger")
     def test_fetch_company_info_business_request_fails(
-        self, mock_logger: Mock, mock_pyquery: Mock, mock_post: Mock
+        self, mock_logger: Mock, mock_post: Mock, pages: dict[str, str]
     ) -> None:
-        # Mock successful basic info request
-        mock_basic_response = Mock()
-        mock_basic_response.text = "<html>basic info</html>"
-
-        # Mock failed business request
-        mock_post.side_effect = [mock_basic_response, Exception("Network error")]
-
-        # Mock PyQuery for basic info
-        mock_basic_doc = Mock()
-        mock_basic_doc.find.side_effect = [
-            Mock(text=Mock(return_value="Test Company")),
-            Mock(text=Mock(return_value="上市")),
+        mock_post.side_effect = [
+            Mock(text=pages["isin_single_main_2330"]),
+            Exception("Network error"),
         ]
-        mock_pyquery.return_value = mock_basic_doc
 
         result = CompanyManager.fetch_company_info("1234")
 
         assert result == {
-            "name": "Test Company",
+            "name": "台積電",
             "trade_type": TradeType.TSE,
             "business": "",
         }
@@ -0,0 +1,205 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from asgiref.sync import async_to_sync
+from pytest_django import DjangoCaptureOnCommitCallbacks
+
+from main.market.models import Company
+from main.market.search import (
+    CompanyPrefixIndex,
+    CompanySearchIndex,
+    PrefixTrie,
+    highlight,
+)
+
+
+class TestPrefixTrie:
+    def test_search_returns_shorter_keys_first(self) -> None:
+        trie = PrefixTrie()
+        for sid in ("23301", "2330", "233"):
+            trie.insert(sid, sid)
+
+        assert trie.search("233", 10) == ["233", "2330", "23301"]
+        assert trie.search("233", 2) == ["233", "2330"]
+
+    def test_search_is_case_insensitive(self) -> None:
+        trie = PrefixTrie()
+        trie.insert("TSMC", "2330")
+
+        assert trie.search("tsm", 10) == ["2330"]
+
+    def test_search_without_match(self) -> None:
+        trie = PrefixTrie()
+        trie.insert("2330", "2330")
+
+        assert trie.search("9", 10) == []
+
+
+class TestCompanyPrefixIndex:
+    def test_search_ranks_stock_id_matches_before_name_matches(self) -> None:
+        index = CompanyPrefixIndex(
+            [("2330", "TSMC Limited"), ("1234", "2330 Fund"), ("5678", "Taiwan Cement")]
+        )
+
+        assert index.search("2330") == ["2330", "1234"]
+
+    def test_search_by_any_word_of_name(self) -> None:
+        index = CompanyPrefixIndex([("5678", "Taiwan Cement"), ("1101", "台泥")])
+
+        assert index.search("cem") == ["5678"]
+        assert index.search("台") == ["1101"]
+
+
+class TestCompanySearchIndex:
+    @pytest.fixture
+    def index(self) -> CompanySearchIndex:
+        index = CompanySearchIndex()
+        for sid, name, business in (
+            ("2330", "台積電", "積體電路製造"),
+            ("2303", "聯電", "積體電路"),
+            ("2317", "鴻海", "電子代工"),
+            ("00878", "國泰永續高股息", ""),
+        ):
+            index.add(sid, name, business)
+        return index
+
+    def test_search_by_stock_id(self, index: CompanySearchIndex) -> None:
+        assert index.search("2330") == ["2330"]
+        assert index.search("23") == ["2330", "2303", "2317"]
+
+    def test_search_inside_stock_ids(self, index: CompanySearchIndex) -> None:
+        assert index.search("330") == ["2330"]
+        assert index.search("878") == ["00878"]
+        # Prefixes first
+        assert index.search("0") == ["00878", "2330", "2303"]
+
+    def test_search_by_name(self, index: CompanySearchIndex) -> None:
+        assert index.search("台積") == ["2330"]
+        assert index.search("國泰 高股息") == ["00878"]
+
+    def test_search_by_romanization(self, index: CompanySearchIndex) -> None:
+        assert index.search("tjd") == ["2330"]
+        assert index.search("taiji") == ["2330"]
+        assert index.search("ㄊㄐ") == ["2330"]
+
+    def test_search_ranks_name_matches_before_business_matches(
+        self, index: CompanySearchIndex
+    ) -> None:
+        assert index.search("電") == ["2330", "2303", "2317"]
+        assert index.search("積體電路") == ["2330", "2303"]
+
+    def test_search_without_romanization(self) -> None:
+        index = CompanySearchIndex(romanization=False)
+        index.add("2330", "台積電", "")
+
+        assert index.search("tjd") == []
+
+    def test_remove_and_add_again(self, index: CompanySearchIndex) -> None:
+        index.remove("2330")
+
+        assert index.search("台積") == []
+        assert len(index) == 3
+
+        index.add("2330", "台灣積體電路", "")
+
+        assert index.search("台積") == []
+        assert index.search("積體") == ["2330", "2303"]
+
+
+@pytest.mark.django_db
+class TestRecordCompanyChanges:
+    @patch("main.market.signals.record_company_changes")
+    def test_saving_company_records_change_on_commit(
+        self,
+        mock_record_company_changes: Mock,
+        django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+    ) -> None:
+        with django_capture_on_commit_callbacks(execute=True):
+            Company.objects.create(stock_id="2330", name="台積電")
+
+        mock_record_company_changes.assert_called_once_with(["2330"])
+
+    @patch("main.market.search.CompanySearchIndex.apply_changes")
+    @patch("main.market.search.get_redis_connection")
+    def test_get_current_applies_recorded_changes(
+        self,
+        mock_get_redis_connection: Mock,
+        mock_apply_changes: Mock,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        index = CompanySearchIndex()
+        index.sequence = 3
+        monkeypatch.setattr(CompanySearchIndex, "_current", index)
+        mock_get_redis_connection.return_value.zrangebyscore.return_value = [
+            ("2330", 4.0),
+            ("2303", 5.0),
+        ]
+
+        assert CompanySearchIndex.get_current() is index
+
+        mock_get_redis_connection.return_value.zrangebyscore.assert_called_once_with(
+            CompanySearchIndex.CHANGES_KEY, "(3", "+inf", withscores=True
+        )
+        mock_apply_changes.assert_called_once_with(["2330", "2303"], 5)
+
+    @patch("main.market.search.CompanySearchIndex.get_current")
+    @patch("main.market.search.get_async_redis_connection")
+    def test_aget_current_without_changes_stays_on_the_event_loop(
+        self,
+        mock_get_async_redis_connection: Mock,
+        mock_get_current: Mock,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        index = CompanySearchIndex()
+        index.sequence = 3
+        monkeypatch.setattr(CompanySearchIndex, "_current", index)
+        zrangebyscore = mock_get_async_redis_connection.return_value.zrangebyscore
+        zrangebyscore.side_effect = AsyncMock(return_value=[])
+
+        assert async_to_sync(CompanySearchIndex.aget_current)() is index
+
+        zrangebyscore.assert_called_once_with(
+            CompanySearchIndex.CHANGES_KEY, "(3", "+inf", start=0, num=1
+        )
+        mock_get_current.assert_not_called()
+
+    @patch("main.market.search.CompanySearchIndex.get_current")
+    @patch("main.market.search.get_async_redis_connection")
+    def test_aget_current_with_changes_falls_back_to_get_current(
+        self,
+        mock_get_async_redis_connection: Mock,
+        mock_get_current: Mock,
+        monkeypatch: MonkeyPatch,
+    ) -> None:
+        index = CompanySearchIndex()
+        monkeypatch.setattr(CompanySearchIndex, "_current", index)
+        mock_get_async_redis_connection.return_value.zrangebyscore.side_effect = (
+            AsyncMock(return_value=["2330"])
+        )
+
+        result = async_to_sync(CompanySearchIndex.aget_current)()
+
+        assert result is mock_get_current.return_value
+
+
+class TestHighlight:
+    def test_highlight_merges_overlapping_tokens(self) -> None:
+        assert (
+            highlight("決議發放現金股利", "現金股利") == "決議發放<mark>現金股利</mark>"
+        )
+
+    def test_highlight_escapes_html(self) -> None:
+        assert highlight("<b>Dividend</b> dividend", "DIVIDEND") == (
+            "&lt;b&gt;<mark>Dividend</mark>&lt;/b&gt; <mark>dividend</mark>"
+        )
+
+    def test_highlight_cuts_around_first_match(self) -> None:
+        text = "甲" * 100 + "減資" + "乙" * 100
+
+        snippet = highlight(text, "減資", length=40)
+
+        assert snippet == "…" + "甲" * 10 + "<mark>減資</mark>" + "乙" * 28 + "…"
+
+    def test_highlight_without_match(self) -> None:
+        assert highlight("取得機器設備", "股利") == "取得機器設備"
@@ -1,15 +1,38 @@
-from datetime import date, time
+from collections.abc import Iterator
+from datetime import date, time, timedelta
 from typing import Any
 from unittest.mock import Mock, patch
 
 import pytest
+from dateutil.relativedelta import relativedelta
+from django.utils import timezone
 from requests import ConnectTimeout, JSONDecodeError, ReadTimeout
 
-from main.market import Frequency, TradeType
-from main.market.models import Company, StockInfo
+from main.core.bulk import BulkUpsertResult
+from main.market import (
+    HISTORY_RETENTION_YEARS,
+    EnrichmentStatus,
+    Frequency,
+    TradeType,
+    UnknownStockIdError,
+)
+from main.market.cache import MaterialFactWatermark
+from main.market.models import (
+    Company,
+    CompanyEnrichmentTask,
+    History,
+    MaterialFact,
+    StockInfo,
+)
 from main.market.services import (
+    ENRICHMENT_MAX_ATTEMPTS,
     _fetch_and_store_historical_info_from_yahoo,
+    _fetch_daily_close_rows,
+    _ingest_material_facts,
     _store_market_per_minute_info,
+    backfill_history,
+    create_placeholder_companies,
+    enrich_companies,
     fetch_and_store_realtime_stock_info,
     roc_date_string_to_date,
     update_all_stocks_history,
@@ -64,14 +87,14 @@ class TestFetchAndStoreRealtimeStockInfo:
 
     @patch("main.market.services.requests.get")
     @patch("main.market.services._store_market_per_minute_info")
-    @patch("main.market.services.StockInfo.objects.bulk_create")
+    @patch("main.market.services.bulk_upsert")
     @patch("main.market.services.Company.objects.filter")
     @patch("main.market.services.logger")
     def test_fetch_and_store_realtime_stock_info_success(
         self,
         mock_logger: Mock,
         mock_filter: Mock,
-        mock_bulk_create: Mock,
+        mock_bulk_upsert: Mock,
         mock_store_market: Mock,
         mock_get: Mock,
         mock_companies: list[Company],
@@ -101,8 +124,12 @@ class TestFetchAndStoreRealtimeStockInfo:
             id="t00", date_=date(2023, 12, 1), price=15050.0, fluct_price=50.0
         )
 
-        # Verify bulk create was called
-        mock_bulk_create.assert_called_once()
+        # Verify the stock info was upserted
+        mock_bulk_upsert.assert_called_once()
+        assert mock_bulk_upsert.call_args.args[0] is StockInfo
+        assert mock_bulk_upsert.call_args.args[2] == [
+            ("1234", date(2023, 12, 1), 1000000, 102.5, 2.5)
+        ]
 
     @patch("main.market.services.requests.get")
     @patch("main.market.services.Company.objects.filter")
@@ -154,6 +181,7 @@ class TestFetchAndStoreRealtimeStockInfo:
 
 @pytest.mark.django_db
 class TestStoreMarketPerMinuteInfo:
+    @patch("main.market.services.ResponseBodyCacheManager")
     @patch("main.market.services.TimeSeriesStockInfoCacheManager")
     @patch("main.market.services.MarketIndexPerMinute.objects.get_or_create")
     @patch("main.market.services.MarketIndexPerMinute.objects.filter")
@@ -162,6 +190,7 @@ class TestStoreMarketPerMinuteInfo:
         mock_filter: Mock,
         mock_get_or_create: Mock,
         mock_cache_manager_class: Mock,
+        mock_response_body_cache_manager: Mock,
     ) -> None:
         mock_delete = Mock()
         mock_delete.delete.return_value = (0, {})
@@ -187,7 +216,10 @@ class TestStoreMarketPerMinuteInfo:
             number=90,  # (10-9)*60 + 30
             defaults={"price": 15000.0, "fluct_price": 50.0},
         )
+        # The cached body of the market index is out of date
+        mock_response_body_cache_manager.delete.assert_called_once_with("market_index")
 
+    @patch("main.market.services.ResponseBodyCacheManager")
     @patch("main.market.services.TimeSeriesStockInfoCacheManager")
     @patch("main.market.services.MarketIndexPerMinute.objects.get_or_create")
     @patch("main.market.services.MarketIndexPerMinute.objects.filter")
@@ -196,6 +228,7 @@ class TestStoreMarketPerMinuteInfo:
         mock_filter: Mock,
         mock_get_or_create: Mock,
         mock_cache_manager_class: Mock,
+        mock_response_body_cache_manager: Mock,
     ) -> None:
         mock_delete = Mock()
         mock_delete.delete.return_value = (0, {})
@@ -226,49 +259,43 @@ class TestStoreMarketPerMinuteInfo:
 @pytest.mark.django_db
 class TestUpdateCompanyList:
     @patch("main.market.services.requests.get")
-    @patch("main.market.services.Company.objects.get_or_create")
-    @patch("main.market.services.Company.objects.filter")
-    @patch("main.market.services.StockInfo.objects.bulk_create")
+    @patch("main.market.services.record_company_changes")
     @patch("main.market.services.logger")
-    @patch("main.market.services.sleep")
     def test_update_company_list_success(
-        self,
-        mock_sleep: Mock,
-        mock_logger: Mock,
-        mock_bulk_create: Mock,
-        mock_filter: Mock,
-        mock_get_or_create: Mock,
-        mock_get: Mock,
+        self, mock_logger: Mock, mock_record_company_changes: Mock, mock_get: Mock
     ) -> None:
+        Company.objects.create(stock_id="1234", name="Existing", trade_type="tse")
         # Mock API responses
         tse_response = [
-            {"SecuritiesCompanyCode": "1234"},
-            {"SecuritiesCompanyCode": "5678"},
+            {"Code": "1234", "Name": "Existing"},
+            {"Code": "5678", "Name": "New TSE Company"},
         ]
-        otc_response = [{"Code": "9999"}, {"Code": "8888"}]
+        otc_response = [{"SecuritiesCompanyCode": "9999", "CompanyName": "New OTC"}]
 
         mock_get.side_effect = [
             Mock(json=Mock(return_value=tse_response)),
             Mock(json=Mock(return_value=otc_response)),
         ]
 
-        # Mock existing companies
-        mock_filter.return_value = []  # No existing companies
-
-        # Mock company creation
-        mock_get_or_create.side_effect = [
-            (Mock(pk="1234"), True),
-            (Mock(pk="5678"), True),
-            (Mock(pk="9999"), True),
-            (Mock(pk="8888"), True),
-        ]
-
         update_company_list()
 
-        # Verify API calls
+        # New companies are stored right away as placeholders to be enriched
         assert mock_get.call_count == 2
-        assert mock_get_or_create.call_count == 4
-        mock_bulk_create.assert_called_once()
+        assert Company.objects.get(pk="5678").name == "New TSE Company"
+        assert Company.objects.get(pk="9999").trade_type == TradeType.OTC
+        assert set(
+            CompanyEnrichmentTask.objects.filter(
+                status=EnrichmentStatus.PENDING
+            ).values_list("company_id", flat=True)
+        ) == {"5678", "9999"}
+        assert set(StockInfo.objects.values_list("company_id", flat=True)) == {
+            "5678",
+            "9999",
+        }
+        assert [call.args for call in mock_record_company_changes.call_args_list] == [
+            (["5678"],),
+            (["9999"],),
+        ]
         mock_logger.info.assert_any_call("Start updating company list.")
         mock_logger.info.assert_any_call("Company list updated!")
 
@@ -285,6 +312,87 @@ class TestUpdateCompanyList:
         assert mock_logger.error.called
 
 
+@pytest.mark.django_db
+class TestEnrichCompanies:
+    @pytest.fixture(autouse=True)
+    def mock_record_company_changes(self) -> Iterator[Mock]:
+        with patch("main.market.services.record_company_changes") as mock:
+            yield mock
+
+    @pytest.fixture
+    def task(self) -> CompanyEnrichmentTask:
+        create_placeholder_companies(TradeType.TSE, {"2330": "台積電"})
+        return CompanyEnrichmentTask.objects.get(company_id="2330")
+
+    @patch("main.market.services.CompanyManager.fetch_company_info")
+    def test_enrich_companies_success(
+        self,
+        mock_fetch_company_info: Mock,
+        mock_record_company_changes: Mock,
+        task: CompanyEnrichmentTask,
+    ) -> None:
+        mock_fetch_company_info.return_value = {
+            "name": "台積電",
+            "trade_type": TradeType.TSE,
+            "business": "積體電路",
+        }
+
+        enrich_companies(concurrency=2)
+
+        assert Company.objects.get(pk="2330").business == "積體電路"
+        task.refresh_from_db()
+        assert task.status == EnrichmentStatus.DONE
+        assert task.attempts == 1
+        mock_record_company_changes.assert_called_once_with(["2330"])
+
+    @patch("main.market.services.CompanyManager.fetch_company_info")
+    def test_enrich_companies_retries_later(
+        self, mock_fetch_company_info: Mock, task: CompanyEnrichmentTask
+    ) -> None:
+        mock_fetch_company_info.side_effect = ReadTimeout("timeout")
+
+        enrich_companies(concurrency=2)
+
+        task.refresh_from_db()
+        assert task.status == EnrichmentStatus.PENDING
+        assert task.attempts == 1
+        assert task.next_attempt_at > timezone.now()
+        assert "ReadTimeout" in task.last_error
+
+        # Not due yet
+        enrich_companies(concurrency=2)
+
+        assert mock_fetch_company_info.call_count == 1
+
+    @patch("main.market.services.CompanyManager.fetch_company_info")
+    def test_enrich_companies_gives_up(
+        self, mock_fetch_company_info: Mock, task: CompanyEnrichmentTask
+    ) -> None:
+        mock_fetch_company_info.side_effect = ReadTimeout("timeout")
+        CompanyEnrichmentTask.objects.filter(pk=task.pk).update(
+            attempts=ENRICHMENT_MAX_ATTEMPTS - 1
+        )
+
+        enrich_companies(concurrency=2)
+
+        task.refresh_from_db()
+        assert task.status == EnrichmentStatus.FAILED
+        assert task.attempts == ENRICHMENT_MAX_ATTEMPTS
+
+    @patch("main.market.services.CompanyManager.fetch_company_info")
+    def test_enrich_companies_unknown_stock_id(
+        self, mock_fetch_company_info: Mock, task: CompanyEnrichmentTask
+    ) -> None:
+        mock_fetch_company_info.side_effect = UnknownStockIdError("Unknown Stock ID")
+
+        enrich_companies(concurrency=2)
+
+        task.refresh_from_db()
+        assert task.status == EnrichmentStatus.FAILED
+        # The placeholder is kept
+        assert Company.objects.get(pk="2330").name == "台積電"
+
+
 @pytest.mark.django_db
 class TestFetchAndStoreHistoricalInfoFromYahoo:
     @pytest.fixture
@@ -366,31 +474,191 @@ class TestUpdateAllStocksHistory:
             fluct_price=2.3,
         )
 
-    @patch("main.market.services.History.objects.bulk_create")
-    @patch("main.market.services.History.objects.filter")
-    @patch("main.market.services.StockInfo.objects.filter")
+    @patch("main.market.services.bump_history_version")
     def test_update_all_stocks_history(
-        self,
-        mock_stock_filter: Mock,
-        mock_history_filter: Mock,
-        mock_bulk_create: Mock,
-        stock_info: StockInfo,
+        self, mock_bump_history_version: Mock, stock_info: StockInfo
     ) -> None:
-        mock_stock_filter.return_value.select_related.return_value = [stock_info]
-        mock_history_filter.return_value.delete.return_value = None
+        update_all_stocks_history()
 
+        history = History.objects.get(company=stock_info.company)
+        assert history.frequency == Frequency.DAILY
+        assert history.date == date.today()
+        assert history.quantity == 1000000
+        assert history.close_price == 100.5
+        mock_bump_history_version.assert_called_once()
+
+    @patch("main.market.services.bump_history_version")
+    def test_update_all_stocks_history_overwrites_today(
+        self, mock_bump_history_version: Mock, stock_info: StockInfo
+    ) -> None:
         update_all_stocks_history()
+        stock_info.close_price = 101.0
+        stock_info.save()
 
-        mock_bulk_create.assert_called_once()
-        mock_history_filter.assert_called_once()
+        update_all_stocks_history()
+
+        assert History.objects.get(company=stock_info.company).close_price == 101.0
+
+    @patch("main.market.services.bump_history_version")
+    @patch("main.market.services.HISTORY_PURGE_BATCH_SIZE", 2)
+    def test_update_all_stocks_history_purges_expired_rows(
+        self, mock_bump_history_version: Mock, stock_info: StockInfo
+    ) -> None:
+        History.objects.bulk_create(
+            [
+                History(
+                    company=stock_info.company,
+                    frequency=Frequency.DAILY,
+                    date=date.today()
+                    - relativedelta(years=HISTORY_RETENTION_YEARS, days=i),
+                    quantity=1000,
+                    close_price=100.0,
+                )
+                for i in range(1, 6)
+            ]
+        )
+
+        update_all_stocks_history()
+
+        assert list(History.objects.values_list("date", flat=True)) == [date.today()]
+
+
+class TestFetchDailyCloseRows:
+    @patch("main.market.services.requests.get")
+    def test_fetch_daily_close_rows_tse(self, mock_get: Mock) -> None:
+        mock_get.return_value.json.return_value = {
+            "stat": "OK",
+            "tables": [
+                {"title": "價格指數", "fields": ["指數", "收盤指數"], "data": []},
+                {
+                    "fields": ["證券代號", "證券名稱", "成交股數", "收盤價"],
+                    "data": [
+                        ["1234", "Test Company", "1,234,000", "102.50"],
+                        ["5678", "Not Traded", "0", "--"],
+                    ],
+                },
+            ],
+        }
+
+        rows = _fetch_daily_close_rows(TradeType.TSE, date(2024, 1, 2))
+
+        assert rows == [("1234", 1234000, 102.5)]
+        assert mock_get.call_args[0][0].endswith("date=20240102")
+
+    @patch("main.market.services.requests.get")
+    def test_fetch_daily_close_rows_tse_market_closed(self, mock_get: Mock) -> None:
+        mock_get.return_value.json.return_value = {
+            "stat": "很抱歉，沒有符合條件的資料!"
+        }
+
+        assert _fetch_daily_close_rows(TradeType.TSE, date(2024, 1, 1)) == []
+
+    @patch("main.market.services.requests.get")
+    def test_fetch_daily_close_rows_otc(self, mock_get: Mock) -> None:
+        mock_get.return_value.json.return_value = {
+            "aaData": [
+                ["5678", "OTC Company", "45.10", "+0.10", "45", "46", "44", "12,000"]
+            ]
+        }
+
+        rows = _fetch_daily_close_rows(TradeType.OTC, date(2024, 1, 2))
+
+        assert rows == [("5678", 12000, 45.1)]
+        assert mock_get.call_args[0][0].endswith("d=113/01/02")
+
+
+class TestBackfillHistory:
+    @patch("main.market.services.bump_history_version")
+    @patch("main.market.services._backfill_single_day")
+    @patch("main.market.services.get_redis_connection")
+    def test_backfill_history_skips_checkpointed_days(
+        self,
+        mock_get_redis_connection: Mock,
+        mock_backfill_single_day: Mock,
+        mock_bump_history_version: Mock,
+    ) -> None:
+        yesterday = date.today() - timedelta(days=1)
+        finished = {(yesterday - timedelta(days=i)).isoformat() for i in range(0, 400)}
+        mock_redis = mock_get_redis_connection.return_value
+        mock_redis.smembers.return_value = finished
+        mock_backfill_single_day.return_value = 10
+
+        backfill_history(years=1, concurrency=2)
+
+        # Every day of the last year has been checkpointed
+        mock_backfill_single_day.assert_not_called()
+        mock_redis.delete.assert_not_called()
+
+    @patch("main.market.services.bump_history_version")
+    @patch("main.market.services._backfill_single_day")
+    @patch("main.market.services.get_redis_connection")
+    def test_backfill_history_checkpoints_finished_days(
+        self,
+        mock_get_redis_connection: Mock,
+        mock_backfill_single_day: Mock,
+        mock_bump_history_version: Mock,
+    ) -> None:
+        mock_redis = mock_get_redis_connection.return_value
+        mock_redis.smembers.return_value = set()
+
+        def backfill_single_day(trade_type: str, day: date, pacer: Mock) -> int:
+            if trade_type == TradeType.OTC:
+                raise ReadTimeout()
+            return 1
+
+        mock_backfill_single_day.side_effect = backfill_single_day
+
+        backfill_history(years=1, concurrency=4, restart=True)
+
+        mock_redis.delete.assert_called_once()
+        checkpointed_keys = {c.args[0] for c in mock_redis.sadd.call_args_list}
+        assert checkpointed_keys == {f"history_backfill:{TradeType.TSE}"}
+        assert all(
+            date.fromisoformat(c.args[1]).weekday() < 5
+            for c in mock_redis.sadd.call_args_list
+        )
+        mock_bump_history_version.assert_called_once()
 
 
 @pytest.mark.django_db
 class TestUpdateMaterialFacts:
+    @pytest.fixture(autouse=True)
+    def watermarks(self) -> Iterator[dict[str, MaterialFactWatermark]]:
+        store: dict[str, MaterialFactWatermark] = {}
+        with (
+            patch("main.market.services.MaterialFactWatermarkCacheManager") as manager,
+            patch("main.market.services.cache") as mock_cache,
+        ):
+            manager.get.side_effect = store.get
+            manager.set.side_effect = lambda key, value, _: store.update({key: value})
+            mock_cache.add.return_value = True
+            yield store
+
+    @pytest.fixture
+    def feed(self) -> list[dict[str, str]]:
+        return [
+            {
+                "公司代號": "1234",
+                "公司名稱": "Test Company",
+                "發言日期": "1121130",
+                "發言時間": "143000",
+                "主旨 ": "First announcement",
+                "說明": "First description",
+            },
+            {
+                "公司代號": "1234",
+                "公司名稱": "Test Company",
+                "發言日期": "1121130",
+                "發言時間": "150000",
+                "主旨 ": "Second announcement",
+                "說明": "Second description",
+            },
+        ]
+
     @patch("main.market.services.requests.get")
     @patch("main.market.services.Company.objects.get_or_create")
     @patch("main.market.services.Company.objects.filter")
-    @patch("main.market.services.MaterialFact.objects.bulk_create")
+    @patch("main.market.services.bulk_upsert")
     @patch("main.market.services.MaterialFact.objects.filter")
     @patch("main.market.services.logger")
     @patch("main.market.services.sleep")
@@ -399,7 +667,7 @@ class TestUpdateMaterialFacts:
         mock_sleep: Mock,
         mock_logger: Mock,
         mock_fact_filter: Mock,
-        mock_bulk_create: Mock,
+        mock_bulk_upsert: Mock,
         mock_company_filter: Mock,
         mock_get_or_create: Mock,
         mock_get: Mock,
@@ -437,12 +705,17 @@ class TestUpdateMaterialFacts:
 
         # Mock delete old records
         mock_fact_filter.return_value.delete.return_value = None
+        mock_bulk_upsert.return_value = BulkUpsertResult(inserted=1, updated=0)
 
         update_material_facts()
 
-        # Verify bulk_create was called
-        assert mock_bulk_create.call_count == 2
+        # Verify the material facts of both markets were upserted
+        assert mock_bulk_upsert.call_count == 2
+        mock_fact_filter.return_value.delete.assert_called_once()
         mock_logger.info.assert_any_call("Start fetching material facts.")
+        mock_logger.info.assert_any_call(
+            "tse material facts: 1 inserted, 0 updated, 0 skipped."
+        )
         mock_logger.info.assert_any_call("Material facts updated!")
 
     @patch("main.market.services.requests.get")
@@ -457,6 +730,61 @@ class TestUpdateMaterialFacts:
         # Should log the error
         assert mock_logger.error.called
 
+    def test_ingest_material_facts_stores_watermark(
+        self, watermarks: dict[str, MaterialFactWatermark], feed: list[dict[str, str]]
+    ) -> None:
+        assert _ingest_material_facts(TradeType.TSE, feed) == (2, 0, 0)
+
+        assert MaterialFact.objects.filter(company_id="1234").count() == 2
+        assert len(watermarks[TradeType.TSE].row_hashes) == 2
+
+    @patch("main.market.services.bulk_upsert")
+    def test_ingest_material_facts_unchanged_feed(
+        self, mock_bulk_upsert: Mock, feed: list[dict[str, str]]
+    ) -> None:
+        mock_bulk_upsert.return_value = BulkUpsertResult(inserted=2, updated=0)
+        _ingest_material_facts(TradeType.TSE, feed)
+        mock_bulk_upsert.reset_mock()
+
+        assert _ingest_material_facts(TradeType.TSE, feed) == (0, 0, 2)
+        mock_bulk_upsert.assert_not_called()
+
+    def test_ingest_material_facts_changed_rows_only(
+        self, feed: list[dict[str, str]]
+    ) -> None:
+        _ingest_material_facts(TradeType.TSE, feed)
+        feed[1]["說明"] = "Corrected description"
+        feed.append(
+            {
+                "公司代號": "1234",
+                "公司名稱": "Test Company",
+                "發言日期": "1121130",
+                "發言時間": "160000",
+                "主旨 ": "Third announcement",
+                "說明": "Third description",
+            }
+        )
+
+        assert _ingest_material_facts(TradeType.TSE, feed) == (1, 1, 1)
+        assert set(
+            MaterialFact.objects.filter(company_id="1234").values_list(
+                "description", flat=True
+            )
+        ) == {"First description", "Corrected description", "Third description"}
+
+    @patch("main.market.services.requests.get")
+    @patch("main.market.services.MaterialFact.objects.filter")
+    def test_update_material_facts_purges_once_a_day(
+        self, mock_fact_filter: Mock, mock_get: Mock
+    ) -> None:
+        mock_get.return_value = Mock(json=Mock(return_value=[]))
+
+        with patch("main.market.services.cache") as mock_cache:
+            mock_cache.add.return_value = False
+            update_material_facts()
+
+        mock_fact_filter.assert_not_called()
+
 
 class TestRocDateStringToDate:
     def test_roc_date_string_to_date_valid(self) -> None:
@@ -0,0 +1,54 @@
+from main.market.tokenizer import (
+    infixes,
+    normalize,
+    query_tokens,
+    romanize,
+    search_document,
+    tokenize,
+)
+
+
+class TestNormalize:
+    def test_normalize_folds_width_and_case(self) -> None:
+        assert normalize("ｔｓｍｃ ２３３０") == "TSMC 2330"
+
+
+class TestTokenize:
+    def test_tokenize_cjk_into_unigrams_and_bigrams(self) -> None:
+        assert tokenize("台積電") == ["台", "積", "電", "台積", "積電"]
+
+    def test_tokenize_words(self) -> None:
+        assert tokenize("Taiwan Semiconductor, 2330") == [
+            "TAIWAN",
+            "SEMICONDUCTOR",
+            "2330",
+        ]
+
+    def test_tokenize_words_with_prefixes(self) -> None:
+        assert tokenize("TSMC 台", prefixes=True) == ["T", "TS", "TSM", "TSMC", "台"]
+
+
+class TestInfixes:
+    def test_infixes(self) -> None:
+        assert infixes("2330 台積電") == ["3", "33", "330", "3", "30", "0"]
+
+
+class TestQueryTokens:
+    def test_query_tokens(self) -> None:
+        assert query_tokens("台積電 tsm") == ["台積", "積電", "TSM"]
+
+    def test_query_tokens_keeps_lone_cjk_character(self) -> None:
+        assert query_tokens("台") == ["台"]
+
+
+class TestSearchDocument:
+    def test_search_document(self) -> None:
+        assert search_document("減資", "ＥＴＦ") == "減 資 減資 ETF"
+
+
+class TestRomanize:
+    def test_romanize(self) -> None:
+        assert romanize("台積電") == ["TAIJIDIAN", "TJD", "ㄊㄞㄐㄧㄉㄧㄢ", "ㄊㄐㄉ"]
+
+    def test_romanize_ignores_non_cjk_text(self) -> None:
+        assert romanize("TSMC") == []
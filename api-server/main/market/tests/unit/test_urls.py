@@ -9,9 +9,11 @@ class TestMarketUrls:
         url_patterns = [
             ("/api/market/market-index/", views.market_index),
             ("/api/market/current-stock-info/", views.current_stock_info),
+            ("/api/market/historical-prices/", views.batch_historical_prices),
             ("/api/market/historical-prices/2330/", views.historical_prices),
             ("/api/market/search/", views.search),
             ("/api/market/company-names/", views.company_names),
+            ("/api/market/material-facts/search/", views.material_fact_search),
         ]
 
         for url, expected_view in url_patterns:
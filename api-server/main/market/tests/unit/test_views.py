@@ -1,23 +1,43 @@
+import gzip
 import json
-from datetime import date
+from datetime import UTC, date, datetime, timedelta
 from typing import Any
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
+from asgiref.sync import async_to_sync
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import JsonResponse
 from django.test import RequestFactory
+from pytest_django import DjangoAssertNumQueries
+from pytest_django.fixtures import SettingsWrapper
 
 from main.account import OAuthOrganization
 from main.account.models import User
 from main.market import Frequency, TradeType
-from main.market.cache import TimeSeriesStockInfo
-from main.market.models import Company, History, StockInfo
+from main.market.cache import (
+    PriceSeries,
+    ResponseBodyCacheManager,
+    TimeSeriesStockInfo,
+)
+from main.market.models import (
+    Company,
+    History,
+    MarketIndexPerMinute,
+    MaterialFact,
+    StockInfo,
+)
+from main.market.search import CompanyPrefixIndex, CompanySearchIndex
+from main.market.services import _ingest_material_facts
+from main.market.tokenizer import search_document
 from main.market.views import (
+    batch_historical_prices,
+    company_names,
     current_stock_info,
     historical_prices,
     market_index,
+    material_fact_search,
     search,
 )
 
@@ -26,11 +46,15 @@ from main.market.views import (
 class TestMarketIndexView:
     @pytest.fixture(autouse=True)
     def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
-        mock_lua_script = Mock(return_value=1)  # Allow all requests
+        mock_lua_script = AsyncMock(return_value=1)  # Allow all requests
         monkeypatch.setattr(
-            "main.core.decorators.rate_limit.LUA_SCRIPT", mock_lua_script
+            "main.core.decorators.rate_limit.async_lua_script", mock_lua_script
         )
 
+    @pytest.fixture(autouse=True)
+    def clear_body_cache(self) -> None:
+        ResponseBodyCacheManager.delete("market_index")
+
     @pytest.fixture
     def request_factory(self) -> RequestFactory:
         return RequestFactory()
@@ -53,7 +77,7 @@ class TestMarketIndexView:
             }
         }
 
-    @patch("main.market.views.TimeSeriesStockInfoCacheManager.get")
+    @patch("main.market.views.TimeSeriesStockInfoCacheManager.aget")
     def test_market_index_with_cache_hit(
         self,
         mock_get: Mock,
@@ -73,7 +97,7 @@ class TestMarketIndexView:
         request = request_factory.get("/api/market/market-index/")
         request.user = user
 
-        response = market_index(request)
+        response = async_to_sync(market_index)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -93,58 +117,120 @@ class TestMarketIndexView:
         assert data[TradeType.TSE] == expected_data
         assert data[TradeType.OTC] == expected_data
 
-    @patch("main.market.views.TimeSeriesStockInfoCacheManager.get")
-    @patch("main.market.views.TimeSeriesStockInfoCacheManager.set")
-    @patch("main.market.views.MarketIndexPerMinute.objects.filter")
+    @patch("main.market.views.TimeSeriesStockInfoCacheManager.aget")
+    @patch("main.market.views.TimeSeriesStockInfoCacheManager.aset")
     def test_market_index_with_cache_miss(
         self,
-        mock_filter: Mock,
-        mock_set: Mock,
-        mock_get: Mock,
+        mock_aset: Mock,
+        mock_aget: Mock,
         request_factory: RequestFactory,
         user: User,
     ) -> None:
-        mock_get.return_value = None
+        mock_aget.return_value = None
+        for market, number, price, fluct_price in (
+            (TradeType.TSE, 30, 15000.0, 50.0),
+            (TradeType.TSE, 60, 15050.0, 100.0),
+        ):
+            MarketIndexPerMinute.objects.create(
+                market=market,
+                date=date(2023, 12, 1),
+                number=number,
+                price=price,
+                fluct_price=fluct_price,
+            )
 
-        mock_row_30 = {
-            "number": 30,
-            "date": date(2023, 12, 1),
-            "price": 15000.0,
-            "fluct_price": 50.0,
-        }
+        request = request_factory.get("/api/market/market-index/")
+        request.user = user
+
+        response = async_to_sync(market_index)(request)
+
+        assert isinstance(response, JsonResponse)
+        assert response.status_code == 200
 
-        mock_row_60 = {
-            "number": 60,
-            "date": date(2023, 12, 1),
-            "price": 15050.0,
-            "fluct_price": 100.0,
+        data = json.loads(response.content)
+        assert data["date"] == "2023-12-01"
+        assert data[TradeType.TSE] == {
+            "30": 15000.0,
+            "60": 15050.0,
+            "yesterday_price": 14950.0,
+            "last_fluct_price": 100.0,
         }
+        assert data[TradeType.OTC] == {"yesterday_price": 0, "last_fluct_price": 0}
 
-        mock_market_data = [mock_row_30, mock_row_60]
-        mock_queryset = Mock()
-        mock_queryset.values.return_value = mock_market_data
-        mock_filter.return_value = mock_queryset
+        assert mock_aset.call_count == 2
+        market_id, cached, timeout = mock_aset.call_args_list[0].args
+        assert market_id == TradeType.TSE
+        assert set(cached.data) == {30, 60}
+        assert timeout == 300
 
-        request = request_factory.get("/api/market/market-index/")
+    @patch("main.market.views.TimeSeriesStockInfoCacheManager.aget")
+    def test_market_index_gzip(
+        self,
+        mock_get: Mock,
+        request_factory: RequestFactory,
+        mock_cache_data: dict[str, Any],
+        user: User,
+    ) -> None:
+        mock_get.return_value = TimeSeriesStockInfo.model_validate(mock_cache_data)
+        request = request_factory.get(
+            "/api/market/market-index/", HTTP_ACCEPT_ENCODING="gzip, deflate, br"
+        )
         request.user = user
 
-        response = market_index(request)
+        response = async_to_sync(market_index)(request)
 
-        assert isinstance(response, JsonResponse)
         assert response.status_code == 200
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        data = json.loads(gzip.decompress(response.content))
+        assert data["date"] == "2023-12-01"
 
-        data = json.loads(response.content)
-        assert TradeType.TSE in data
-        assert TradeType.OTC in data
+    @patch("main.market.views.TimeSeriesStockInfoCacheManager.aget")
+    def test_market_index_gzip_refused(
+        self,
+        mock_get: Mock,
+        request_factory: RequestFactory,
+        mock_cache_data: dict[str, Any],
+        user: User,
+    ) -> None:
+        mock_get.return_value = TimeSeriesStockInfo.model_validate(mock_cache_data)
+        request = request_factory.get(
+            "/api/market/market-index/", HTTP_ACCEPT_ENCODING="gzip;q=0, br"
+        )
+        request.user = user
+
+        response = async_to_sync(market_index)(request)
+
+        assert response.status_code == 200
+        assert not response.has_header("Content-Encoding")
+        assert "Accept-Encoding" in response["Vary"]
+        assert json.loads(response.content)["date"] == "2023-12-01"
 
-        assert mock_set.call_count == 2
+    @patch("main.market.views.TimeSeriesStockInfoCacheManager.aget")
+    def test_market_index_serves_the_cached_body(
+        self,
+        mock_get: Mock,
+        request_factory: RequestFactory,
+        mock_cache_data: dict[str, Any],
+        user: User,
+    ) -> None:
+        mock_get.return_value = TimeSeriesStockInfo.model_validate(mock_cache_data)
+        request = request_factory.get("/api/market/market-index/")
+        request.user = user
+
+        first_response = async_to_sync(market_index)(request)
+        second_response = async_to_sync(market_index)(request)
+
+        assert mock_get.call_count == 2  # Once per market
+        assert not second_response.has_header("Content-Encoding")
+        assert second_response.content == first_response.content
 
     def test_market_index_method_not_allowed(
         self, request_factory: RequestFactory
     ) -> None:
         request = request_factory.post("/api/market/market-index/")
 
-        response = market_index(request)
+        response = async_to_sync(market_index)(request)
 
         assert response.status_code == 405
 
@@ -153,9 +239,9 @@ class TestMarketIndexView:
 class TestCurrentStockInfoView:
     @pytest.fixture(autouse=True)
     def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
-        mock_lua_script = Mock(return_value=1)  # Allow all requests
+        mock_lua_script = AsyncMock(return_value=1)  # Allow all requests
         monkeypatch.setattr(
-            "main.core.decorators.rate_limit.LUA_SCRIPT", mock_lua_script
+            "main.core.decorators.rate_limit.async_lua_script", mock_lua_script
         )
 
     @pytest.fixture
@@ -213,7 +299,7 @@ class TestCurrentStockInfoView:
         request = request_factory.get("/api/market/current-stock-info/?sids=1234,5678")
         request.user = user
 
-        response = current_stock_info(request)
+        response = async_to_sync(current_stock_info)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -234,7 +320,7 @@ class TestCurrentStockInfoView:
         request = request_factory.get("/api/market/current-stock-info/?sids=")
         request.user = user
 
-        response = current_stock_info(request)
+        response = async_to_sync(current_stock_info)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -248,7 +334,7 @@ class TestCurrentStockInfoView:
         request = request_factory.get("/api/market/current-stock-info/?sids=9999,8888")
         request.user = user
 
-        response = current_stock_info(request)
+        response = async_to_sync(current_stock_info)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -262,7 +348,7 @@ class TestCurrentStockInfoView:
         request = request_factory.get("/api/market/current-stock-info/")
         request.user = user
 
-        response = current_stock_info(request)
+        response = async_to_sync(current_stock_info)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -414,9 +500,161 @@ class TestHistoricalPricesView:
         assert "data" in data
         assert len(data["data"]) == 0
 
+    def test_historical_prices_columnar(
+        self,
+        request_factory: RequestFactory,
+        history_records: list[History],
+        user: User,
+    ) -> None:
+        request = request_factory.get(
+            "/api/market/historical-prices/1234/?format=columnar"
+        )
+        request.user = user
+
+        response = historical_prices(request, "1234")
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        # 2023-12-01 is the 19692nd day since 1970-01-01
+        assert data == {"days": [19692, 19693], "prices": [100.0, 102.5]}
+
+    def test_historical_prices_columnar_delta(
+        self,
+        request_factory: RequestFactory,
+        history_records: list[History],
+        user: User,
+    ) -> None:
+        request = request_factory.get(
+            "/api/market/historical-prices/1234/?format=columnar&delta=1"
+        )
+        request.user = user
+
+        response = historical_prices(request, "1234")
+
+        assert response.status_code == 200
+        data = json.loads(response.content)
+        assert data == {
+            "days": [19692, 1],
+            "prices": [10000, 250],
+            "delta": True,
+            "price_scale": 100,
+        }
+
+    def test_historical_prices_gzip(
+        self,
+        request_factory: RequestFactory,
+        history_records: list[History],
+        user: User,
+    ) -> None:
+        History.objects.bulk_create(
+            [
+                History(
+                    company_id="1234",
+                    frequency=Frequency.DAILY,
+                    date=date(2024, 1, 1) + timedelta(days=i),
+                    quantity=1000,
+                    close_price=100.0 + i,
+                )
+                for i in range(100)
+            ]
+        )
+        request = request_factory.get(
+            "/api/market/historical-prices/1234/", HTTP_ACCEPT_ENCODING="gzip"
+        )
+        request.user = user
+
+        response = historical_prices(request, "1234")
+
+        assert response.status_code == 200
+        assert response["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(response.content))["data"]) == 102
+
+    @patch("main.market.views.DownsampledPriceSeriesCacheManager.set")
+    @patch("main.market.views.DownsampledPriceSeriesCacheManager.get")
+    def test_historical_prices_max_points(
+        self,
+        mock_get: Mock,
+        mock_set: Mock,
+        request_factory: RequestFactory,
+        company: Company,
+        user: User,
+    ) -> None:
+        mock_get.return_value = None
+        History.objects.bulk_create(
+            [
+                History(
+                    company=company,
+                    frequency=Frequency.DAILY,
+                    date=date(2024, 1, 1) + timedelta(days=i),
+                    quantity=1000,
+                    close_price=500.0 if i == 50 else 100.0,
+                )
+                for i in range(100)
+            ]
+        )
+        request = request_factory.get(
+            "/api/market/historical-prices/1234/?max_points=10"
+        )
+        request.user = user
+
+        response = historical_prices(request, "1234")
+
+        assert response.status_code == 200
+        data = json.loads(response.content)["data"]
+        assert len(data) == 10
+        assert data[0]["date"] == "2024-01-01"
+        assert data[-1]["date"] == "2024-04-09"
+        # The spike survives downsampling
+        assert {"date": "2024-02-20", "price": 500.0} in data
+        mock_set.assert_called_once()
+        identifier, cached_series, _ = mock_set.call_args.args
+        assert identifier.endswith(f":1234:{Frequency.DAILY}:10")
+        assert len(cached_series.dates) == 10
+
+    @patch("main.market.views.DownsampledPriceSeriesCacheManager.get")
+    def test_historical_prices_max_points_with_cache_hit(
+        self,
+        mock_get: Mock,
+        request_factory: RequestFactory,
+        user: User,
+        django_assert_num_queries: DjangoAssertNumQueries,
+    ) -> None:
+        mock_get.return_value = PriceSeries(
+            dates=[date(2024, 1, 1), date(2024, 1, 2)], prices=[100.0, 101.0]
+        )
+        request = request_factory.get(
+            "/api/market/historical-prices/1234/?max_points=10&format=columnar"
+        )
+        request.user = user
+
+        with django_assert_num_queries(0):
+            response = historical_prices(request, "1234")
+
+        assert json.loads(response.content) == {
+            "days": [19723, 19724],
+            "prices": [100.0, 101.0],
+        }
+
+    @pytest.mark.parametrize("max_points", ["abc", "-1", "2"])
+    def test_historical_prices_invalid_max_points(
+        self,
+        request_factory: RequestFactory,
+        company: Company,
+        user: User,
+        max_points: str,
+    ) -> None:
+        request = request_factory.get(
+            f"/api/market/historical-prices/1234/?max_points={max_points}"
+        )
+        request.user = user
+
+        response = historical_prices(request, "1234")
+
+        assert response.status_code == 400
+
 
 @pytest.mark.django_db
-class TestSearchView:
+class TestBatchHistoricalPricesView:
     @pytest.fixture(autouse=True)
     def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
         mock_lua_script = Mock(return_value=1)  # Allow all requests
@@ -437,6 +675,146 @@ class TestSearchView:
             username="testuser",
         )
 
+    @pytest.fixture
+    def history_records(self) -> list[History]:
+        companies = [
+            Company.objects.create(stock_id=sid, name=f"Company {sid}")
+            for sid in ("1234", "5678")
+        ]
+        return History.objects.bulk_create(
+            [
+                History(
+                    company=company,
+                    frequency=Frequency.DAILY,
+                    date=date(2023, 12, 1) + timedelta(days=i),
+                    quantity=1000,
+                    close_price=100.0 + i,
+                )
+                for company in companies
+                for i in range(3)
+            ]
+        )
+
+    def test_batch_historical_prices(
+        self,
+        request_factory: RequestFactory,
+        history_records: list[History],
+        user: User,
+    ) -> None:
+        request = request_factory.get(
+            "/api/market/historical-prices/?sids=1234,5678,9999"
+        )
+        request.user = user
+
+        response = batch_historical_prices(request)
+
+        assert response.status_code == 200
+        data = json.loads(response.content)["data"]
+        assert data["1234"] == {
+            "days": [19692, 19693, 19694],
+            "prices": [100.0, 101.0, 102.0],
+        }
+        assert data["5678"] == data["1234"]
+        assert data["9999"] == {"days": [], "prices": []}
+
+    def test_batch_historical_prices_delta(
+        self,
+        request_factory: RequestFactory,
+        history_records: list[History],
+        user: User,
+    ) -> None:
+        request = request_factory.get(
+            "/api/market/historical-prices/?sids=1234&delta=1"
+        )
+        request.user = user
+
+        response = batch_historical_prices(request)
+
+        data = json.loads(response.content)["data"]
+        assert data["1234"]["days"] == [19692, 1, 1]
+        assert data["1234"]["prices"] == [10000, 100, 100]
+
+    @patch("main.market.views.DownsampledPriceSeriesCacheManager.set")
+    @patch("main.market.views.DownsampledPriceSeriesCacheManager.get")
+    def test_batch_historical_prices_max_points(
+        self,
+        mock_get: Mock,
+        mock_set: Mock,
+        request_factory: RequestFactory,
+        history_records: list[History],
+        user: User,
+    ) -> None:
+        cached_series = PriceSeries(dates=[date(2023, 12, 1)], prices=[100.0])
+        mock_get.side_effect = lambda identifier: (
+            cached_series if ":1234:" in identifier else None
+        )
+        request = request_factory.get(
+            "/api/market/historical-prices/?sids=1234,5678&max_points=3"
+        )
+        request.user = user
+
+        response = batch_historical_prices(request)
+
+        data = json.loads(response.content)["data"]
+        assert data["1234"] == {"days": [19692], "prices": [100.0]}
+        assert data["5678"] == {
+            "days": [19692, 19693, 19694],
+            "prices": [100.0, 101.0, 102.0],
+        }
+        # Only the cache miss is computed and stored
+        mock_set.assert_called_once()
+        assert ":5678:" in mock_set.call_args.args[0]
+
+    def test_batch_historical_prices_without_sids(
+        self, request_factory: RequestFactory, user: User
+    ) -> None:
+        request = request_factory.get("/api/market/historical-prices/")
+        request.user = user
+
+        response = batch_historical_prices(request)
+
+        assert response.status_code == 400
+
+    def test_batch_historical_prices_too_many_sids(
+        self, request_factory: RequestFactory, user: User
+    ) -> None:
+        sids = ",".join(str(i) for i in range(51))
+        request = request_factory.get(f"/api/market/historical-prices/?sids={sids}")
+        request.user = user
+
+        response = batch_historical_prices(request)
+
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestSearchView:
+    @pytest.fixture(autouse=True)
+    def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
+        mock_lua_script = AsyncMock(return_value=1)  # Allow all requests
+        monkeypatch.setattr(
+            "main.core.decorators.rate_limit.async_lua_script", mock_lua_script
+        )
+
+    @pytest.fixture(autouse=True)
+    def reset_search_indexes(self, monkeypatch: MonkeyPatch) -> None:
+        # In-memory indexes must not outlive the rolled back test data
+        monkeypatch.setattr(CompanyPrefixIndex, "_current", None)
+        monkeypatch.setattr(CompanySearchIndex, "_current", None)
+
+    @pytest.fixture
+    def request_factory(self) -> RequestFactory:
+        return RequestFactory()
+
+    @pytest.fixture
+    def user(self) -> User:
+        return User.objects.create_user(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="test_oauth_id",
+            email="test@example.com",
+            username="testuser",
+        )
+
     @pytest.fixture
     def companies_and_stock_infos(self) -> list[tuple[Company, StockInfo]]:
         companies_data = [
@@ -471,7 +849,7 @@ class TestSearchView:
         request = request_factory.get("/api/market/search/?keyword=1234")
         request.user = user
 
-        response = search(request)
+        response = async_to_sync(search)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -491,7 +869,7 @@ class TestSearchView:
         request = request_factory.get("/api/market/search/?keyword=TSMC")
         request.user = user
 
-        response = search(request)
+        response = async_to_sync(search)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -511,7 +889,7 @@ class TestSearchView:
         request = request_factory.get("/api/market/search/?keyword=23")
         request.user = user
 
-        response = search(request)
+        response = async_to_sync(search)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -530,7 +908,7 @@ class TestSearchView:
         request = request_factory.get("/api/market/search/?keyword=taiwan")
         request.user = user
 
-        response = search(request)
+        response = async_to_sync(search)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -540,13 +918,129 @@ class TestSearchView:
         assert len(data["data"]) == 1
         assert data["data"][0]["sid"] == "1234"
 
+    @pytest.mark.parametrize("backend", ["postgres", "tokens"])
+    def test_search_ranks_exact_then_prefix_then_substring(
+        self,
+        request_factory: RequestFactory,
+        user: User,
+        settings: SettingsWrapper,
+        backend: str,
+    ) -> None:
+        settings.MARKET_SEARCH_BACKEND = backend
+        for sid in ("12330", "23301", "2330"):
+            company = Company.objects.create(stock_id=sid, name=f"Company {sid}")
+            StockInfo.objects.create(
+                company=company,
+                date=date.today(),
+                quantity=1000000,
+                close_price=100.0,
+                fluct_price=1.0,
+            )
+        request = request_factory.get("/api/market/search/?keyword=2330")
+        request.user = user
+
+        response = async_to_sync(search)(request)
+
+        data = json.loads(response.content)
+        assert [item["sid"] for item in data["data"]] == ["2330", "23301", "12330"]
+
+    @pytest.mark.parametrize("backend", ["postgres", "tokens"])
+    def test_search_inside_stock_ids(
+        self,
+        request_factory: RequestFactory,
+        user: User,
+        settings: SettingsWrapper,
+        backend: str,
+    ) -> None:
+        settings.MARKET_SEARCH_BACKEND = backend
+        for sid, name in (("0050", "元大台灣50"), ("2330", "台積電")):
+            company = Company.objects.create(stock_id=sid, name=name)
+            StockInfo.objects.create(
+                company=company,
+                date=date.today(),
+                quantity=1000000,
+                close_price=100.0,
+                fluct_price=1.0,
+            )
+
+        for keyword, sids in (("50", ["0050"]), ("330", ["2330"])):
+            request = request_factory.get("/api/market/search/", {"keyword": keyword})
+            request.user = user
+
+            response = async_to_sync(search)(request)
+
+            data = json.loads(response.content)
+            assert [item["sid"] for item in data["data"]] == sids
+
+    def test_search_fuzzy_match(
+        self,
+        request_factory: RequestFactory,
+        companies_and_stock_infos: list[tuple[Company, StockInfo]],
+        user: User,
+        settings: SettingsWrapper,
+    ) -> None:
+        settings.MARKET_SEARCH_BACKEND = "postgres"
+        request = request_factory.get(
+            "/api/market/search/?keyword=Taiwan%20Semicondoctor"
+        )
+        request.user = user
+
+        response = async_to_sync(search)(request)
+
+        data = json.loads(response.content)
+        assert [item["sid"] for item in data["data"]] == ["1234"]
+
+    def test_search_with_trie_backend(
+        self,
+        request_factory: RequestFactory,
+        companies_and_stock_infos: list[tuple[Company, StockInfo]],
+        user: User,
+        settings: SettingsWrapper,
+    ) -> None:
+        settings.MARKET_SEARCH_BACKEND = "trie"
+        request = request_factory.get("/api/market/search/?keyword=semi")
+        request.user = user
+
+        response = async_to_sync(search)(request)
+
+        data = json.loads(response.content)
+        assert len(data["data"]) == 1
+        assert data["data"][0]["sid"] == "1234"
+        assert data["data"][0]["close"] == 100.0
+
+    def test_search_with_tokens_backend_by_romanization(
+        self,
+        request_factory: RequestFactory,
+        user: User,
+        settings: SettingsWrapper,
+    ) -> None:
+        settings.MARKET_SEARCH_BACKEND = "tokens"
+        for sid, name in (("2330", "台積電"), ("2303", "聯電")):
+            company = Company.objects.create(stock_id=sid, name=name)
+            StockInfo.objects.create(
+                company=company,
+                date=date.today(),
+                quantity=1000000,
+                close_price=100.0,
+                fluct_price=1.0,
+            )
+
+        for keyword in ("台積", "tjd", "ㄊㄐ"):
+            request = request_factory.get("/api/market/search/", {"keyword": keyword})
+            request.user = user
+
+            response = async_to_sync(search)(request)
+
+            data = json.loads(response.content)
+            assert [item["sid"] for item in data["data"]] == ["2330"]
+
     def test_search_no_keyword(
         self, request_factory: RequestFactory, user: User
     ) -> None:
         request = request_factory.get("/api/market/search/")
         request.user = user
 
-        response = search(request)
+        response = async_to_sync(search)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -564,7 +1058,7 @@ class TestSearchView:
         request = request_factory.get("/api/market/search/?keyword=nonexistent")
         request.user = user
 
-        response = search(request)
+        response = async_to_sync(search)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -594,7 +1088,7 @@ class TestSearchView:
         request = request_factory.get("/api/market/search/?keyword=TEST")
         request.user = user
 
-        response = search(request)
+        response = async_to_sync(search)(request)
 
         assert isinstance(response, JsonResponse)
         assert response.status_code == 200
@@ -602,3 +1096,161 @@ class TestSearchView:
         data = json.loads(response.content)
         assert "data" in data
         assert len(data["data"]) == 30
+
+
+@pytest.mark.django_db
+class TestMaterialFactSearchView:
+    @pytest.fixture(autouse=True)
+    def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
+        mock_lua_script = Mock(return_value=1)  # Allow all requests
+        monkeypatch.setattr(
+            "main.core.decorators.rate_limit.LUA_SCRIPT", mock_lua_script
+        )
+
+    @pytest.fixture
+    def user(self) -> User:
+        return User.objects.create_user(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="test_oauth_id",
+            email="test@example.com",
+            username="testuser",
+        )
+
+    @pytest.fixture
+    def material_facts(self) -> list[MaterialFact]:
+        company = Company.objects.create(stock_id="2330", name="台積電")
+        start = datetime(2024, 1, 1, 10, tzinfo=UTC)
+        return [
+            MaterialFact.objects.create(
+                company=company,
+                date_time=start + timedelta(days=i),
+                title=title,
+                description=description,
+                search_tokens=search_document(title, description),
+            )
+            for i, (title, description) in enumerate(
+                [
+                    ("公告董事會決議分派現金股利", "每股配發現金股利3元"),
+                    ("公告辦理減資", "本公司決議辦理現金減資"),
+                    ("公告股利發放日", "發放日訂於7月"),
+                    ("代子公司公告取得設備", "取得機器設備"),
+                ]
+            )
+        ]
+
+    def test_search_ranks_and_highlights(
+        self, user: User, material_facts: list[MaterialFact]
+    ) -> None:
+        request = RequestFactory().get("/", {"keyword": "股利"})
+        request.user = user
+
+        data = json.loads(material_fact_search(request).content)
+
+        assert [hit["title"] for hit in data["data"]] == [
+            "公告董事會決議分派現金<mark>股利</mark>",
+            "公告<mark>股利</mark>發放日",
+        ]
+        assert data["data"][0]["sid"] == "2330"
+        assert data["data"][0]["snippet"] == "每股配發現金<mark>股利</mark>3元"
+        assert data["next_page"] is None
+
+    def test_search_requires_every_token(
+        self, user: User, material_facts: list[MaterialFact]
+    ) -> None:
+        request = RequestFactory().get("/", {"keyword": "現金減資"})
+        request.user = user
+
+        data = json.loads(material_fact_search(request).content)
+
+        assert [hit["title"] for hit in data["data"]] == ["公告辦理<mark>減資</mark>"]
+
+    def test_search_pagination(
+        self, user: User, material_facts: list[MaterialFact]
+    ) -> None:
+        with patch("main.market.views.MATERIAL_FACT_SEARCH_PAGE_SIZE", 1):
+            first = RequestFactory().get("/", {"keyword": "公告"})
+            first.user = user
+            first_page = json.loads(material_fact_search(first).content)
+            last = RequestFactory().get("/", {"keyword": "公告", "page": 4})
+            last.user = user
+            last_page = json.loads(material_fact_search(last).content)
+
+        assert len(first_page["data"]) == 1
+        assert first_page["next_page"] == 2
+        assert len(last_page["data"]) == 1
+        assert last_page["next_page"] is None
+
+    @pytest.mark.parametrize(
+        "params", [{}, {"keyword": " "}, {"keyword": "股利", "page": "0"}]
+    )
+    def test_search_invalid_params(self, user: User, params: dict[str, str]) -> None:
+        request = RequestFactory().get("/", params)
+        request.user = user
+
+        response = material_fact_search(request)
+
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestCompanyNamesView:
+    @pytest.fixture(autouse=True)
+    def mock_rate_limit(self, monkeypatch: MonkeyPatch) -> None:
+        mock_lua_script = AsyncMock(return_value=1)  # Allow all requests
+        monkeypatch.setattr(
+            "main.core.decorators.rate_limit.async_lua_script", mock_lua_script
+        )
+
+    @pytest.fixture
+    def user(self) -> User:
+        return User.objects.create_user(
+            oauth_org=OAuthOrganization.GOOGLE,
+            oauth_id="test_oauth_id",
+            email="test@example.com",
+            username="testuser",
+        )
+
+    def test_company_names(self, user: User) -> None:
+        Company.objects.create(stock_id="2330", name="台積電")
+        request = RequestFactory().get(
+            "/api/market/company-names/", {"sids": "2330,9999"}
+        )
+        request.user = user
+
+        response = async_to_sync(company_names)(request)
+
+        assert response.status_code == 200
+        assert json.loads(response.content) == {"2330": "台積電", "9999": None}
+
+    @patch("main.market.services.MaterialFactWatermarkCacheManager")
+    def test_company_names_etag_changes_with_material_fact_companies(
+        self, mock_watermark_manager: Mock, user: User
+    ) -> None:
+        mock_watermark_manager.get.return_value = None
+        request = RequestFactory().get("/api/market/company-names/", {"sids": "9999"})
+        request.user = user
+        etag = async_to_sync(company_names)(request)["ETag"]
+
+        # The announcement of a company the list doesn't have yet
+        _ingest_material_facts(
+            TradeType.TSE,
+            [
+                {
+                    "公司代號": "9999",
+                    "公司名稱": "新公司",
+                    "發言日期": "1121130",
+                    "發言時間": "143000",
+                    "主旨 ": "Announcement",
+                    "說明": "Description",
+                }
+            ],
+        )
+        request = RequestFactory().get(
+            "/api/market/company-names/", {"sids": "9999"}, HTTP_IF_NONE_MATCH=etag
+        )
+        request.user = user
+        response = async_to_sync(company_names)(request)
+
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert json.loads(response.content) == {"9999": "新公司"}
@@ -0,0 +1,93 @@
+import re
+import unicodedata
+
+# Runs of CJK ideographs, or runs of letters, digits and zhuyin symbols
+_TOKEN_RUN_PATTERN = re.compile(
+    r"(?P<cjk>[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)"
+    r"|(?P<word>[0-9A-Z\u3100-\u312f\u31a0-\u31bf]+)"
+)
+_ZHUYIN_TONE_MARKS = str.maketrans("", "", "ˉˊˇˋ˙")
+
+
+def normalize(text: str) -> str:
+    """Fold full-width characters into half-width ones and ignore letter case."""
+    return unicodedata.normalize("NFKC", text).upper()
+
+
+def tokenize(text: str, *, prefixes: bool = False) -> list[str]:
+    """
+    Tokens to index `text` with. CJK runs produce unigrams and bigrams, other runs
+    produce whole words (and every prefix of them if `prefixes` is set).
+    """
+    tokens = []
+    for match in _TOKEN_RUN_PATTERN.finditer(normalize(text)):
+        if cjk := match["cjk"]:
+            tokens.extend(cjk)
+            tokens.extend(cjk[i : i + 2] for i in range(len(cjk) - 1))
+        elif prefixes:
+            tokens.extend(match["word"][:i] for i in range(1, len(match["word"]) + 1))
+        else:
+            tokens.append(match["word"])
+    return tokens
+
+
+def infixes(text: str) -> list[str]:
+    """
+    Substrings of the words of `text` that don't start them, e.g. 330 and 0 of
+    2330, so that queries match in the middle of stock IDs like `icontains` does.
+    CJK runs are left to their unigrams and bigrams.
+    """
+    return [
+        word[i:j]
+        for match in _TOKEN_RUN_PATTERN.finditer(normalize(text))
+        if (word := match["word"])
+        for i in range(1, len(word))
+        for j in range(i + 1, len(word) + 1)
+    ]
+
+
+def search_document(*texts: str) -> str:
+    """Space-separated tokens of `texts` for Postgres to build a `tsvector` with."""
+    return " ".join(token for text in texts for token in tokenize(text))
+
+
+def query_tokens(text: str) -> list[str]:
+    """
+    Tokens to look up for a search query: CJK bigrams (a lone character is kept as
+    a unigram) and whole words. Every token has to be matched.
+    """
+    tokens = []
+    for match in _TOKEN_RUN_PATTERN.finditer(normalize(text)):
+        if cjk := match["cjk"]:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i : i + 2] for i in range(len(cjk) - 1))
+        else:
+            tokens.append(match["word"])
+    return tokens
+
+
+def romanize(text: str) -> list[str]:
+    """
+    Romanization keys of the CJK characters in `text`: full pinyin, pinyin initials,
+    zhuyin without tone marks and zhuyin initials, e.g. 台積電 gives TAIJIDIAN, TJD,
+    ㄊㄞㄐㄧㄉㄧㄢ and ㄊㄐㄉ.
+    """
+    cjk = "".join(
+        match["cjk"]
+        for match in _TOKEN_RUN_PATTERN.finditer(normalize(text))
+        if match["cjk"]
+    )
+    if not cjk:
+        return []
+    # Imported here since loading the pinyin dictionaries takes long, and most
+    # processes (e.g. jobs) never romanize anything
+    from pypinyin import Style, lazy_pinyin
+
+    return [
+        "".join(lazy_pinyin(cjk)).upper(),
+        "".join(lazy_pinyin(cjk, style=Style.FIRST_LETTER)).upper(),
+        "".join(lazy_pinyin(cjk, style=Style.BOPOMOFO)).translate(_ZHUYIN_TONE_MARKS),
+        "".join(lazy_pinyin(cjk, style=Style.BOPOMOFO_FIRST)),
+    ]
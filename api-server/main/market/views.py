@@ -1,25 +1,84 @@
+import gzip
 import logging
+from collections.abc import Iterable
+from datetime import date
+from itertools import pairwise
 
-from django.db.models import Q
-from django.http import HttpRequest, JsonResponse
+from django.conf import settings
+from django.http import HttpRequest
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_GET
 
 from main.core.decorators.auth import require_login
+from main.core.decorators.conditional import etag
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse, accepts_encoding, dumps
 from main.market import Frequency, TradeType
-from main.market.cache import TimeSeriesStockInfo, TimeSeriesStockInfoCacheManager
+from main.market.cache import (
+    DownsampledPriceSeriesCacheManager,
+    PriceSeries,
+    ResponseBody,
+    ResponseBodyCacheManager,
+    TimeSeriesStockInfo,
+    TimeSeriesStockInfoCacheManager,
+    aget_company_list_version,
+    get_history_version,
+)
+from main.market.downsampling import downsample_price_rows
 from main.market.models import Company, History, MarketIndexPerMinute, StockInfo
+from main.market.search import (
+    CompanyPrefixIndex,
+    CompanySearchIndex,
+    highlight,
+    search_companies,
+    search_material_facts,
+)
 
 logger = logging.getLogger(__name__)
 
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+PRICE_SCALE = 100
+MAX_BATCH_SIDS = 50
+MIN_MAX_POINTS = 3
+DOWNSAMPLED_SERIES_CACHE_TIMEOUT = 60 * 60 * 24
+MATERIAL_FACT_SEARCH_PAGE_SIZE = 20
+# The realtime tick invalidates it every minute, see `_store_market_per_minute_info`
+MARKET_INDEX_BODY_CACHE_TIMEOUT = 60
 
+
+@query_budget(2)
 @rate_limit(rate=2)
 @require_GET
 @require_login
-def market_index(request: HttpRequest) -> JsonResponse:
+async def market_index(request: HttpRequest) -> JsonResponse:
+    """
+    The same for every user, so the body is cached already serialized and
+    compressed, and sent compressed to clients that accept gzip.
+    """
+    if (cached := await ResponseBodyCacheManager.aget("market_index")) is None:
+        body = dumps(await _build_market_index())
+        cached = ResponseBody(body=body, gzipped_body=gzip.compress(body, mtime=0))
+        await ResponseBodyCacheManager.aset(
+            "market_index", cached, MARKET_INDEX_BODY_CACHE_TIMEOUT
+        )
+
+    if accepts_encoding(request, "gzip"):
+        response = JsonResponse(cached.gzipped_body)
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = JsonResponse(cached.body)
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+async def _build_market_index() -> dict:
     result: dict = {"date": None}
     for market_id in (TradeType.TSE, TradeType.OTC):
-        if (cache_result := TimeSeriesStockInfoCacheManager.get(market_id)) is not None:
+        if (
+            cache_result := await TimeSeriesStockInfoCacheManager.aget(market_id)
+        ) is not None:
             data: dict = cache_result.model_dump()["data"]
         else:
             data = {
@@ -28,11 +87,11 @@ def market_index(request: HttpRequest) -> JsonResponse:
                     "price": row["price"],
                     "fluct_price": row["fluct_price"],
                 }
-                for row in MarketIndexPerMinute.objects.filter(market=market_id).values(
-                    "number", "date", "price", "fluct_price"
-                )
+                async for row in MarketIndexPerMinute.objects.filter(
+                    market=market_id
+                ).values("number", "date", "price", "fluct_price")
             }
-            TimeSeriesStockInfoCacheManager.set(
+            await TimeSeriesStockInfoCacheManager.aset(
                 market_id, TimeSeriesStockInfo.model_validate({"data": data}), 300
             )
         data = dict(sorted(data.items(), key=lambda item: item[0], reverse=True))
@@ -43,16 +102,17 @@ def market_index(request: HttpRequest) -> JsonResponse:
             result["date"] = last["date"]
             result[market_id]["yesterday_price"] = last["price"] - last["fluct_price"]
             result[market_id]["last_fluct_price"] = last["fluct_price"]
-    return JsonResponse(result)
+    return result
 
 
+@query_budget(1)
 @rate_limit(rate=3)
 @require_GET
 @require_login
-def current_stock_info(request: HttpRequest) -> JsonResponse:
+async def current_stock_info(request: HttpRequest) -> JsonResponse:
     result = {}
     sids = [sid for sid in request.GET.get("sids", "").strip(",").split(",") if sid]
-    for info in StockInfo.objects.filter(company__pk__in=sids).select_related(
+    async for info in StockInfo.objects.filter(company__pk__in=sids).select_related(
         "company"
     ):
         result[info.company.pk] = {
@@ -65,46 +125,232 @@ def current_stock_info(request: HttpRequest) -> JsonResponse:
     return JsonResponse(result)
 
 
+@query_budget(2)
 @rate_limit(rate=3)
+@gzip_page
 @require_GET
 @require_login
 def historical_prices(request: HttpRequest, sid: str) -> JsonResponse:
-    result = {"data": []}
-    for h in History.objects.filter(
-        company=Company.objects.get(pk=sid),
-        frequency=request.GET.get("frequency", Frequency.DAILY),
+    """
+    Query parameters:
+    - frequency: DAILY (default), WEEKLY or MONTHLY
+    - format: "columnar" to get parallel arrays instead of a list of points
+    - delta: "1" to delta-encode the columnar arrays
+    - max_points: downsample the series into at most this many points (LTTB)
+    """
+    try:
+        max_points = _parse_max_points(request)
+    except ValueError as e:
+        return JsonResponse({"message": str(e)}, status=400)
+
+    rows = _load_price_rows(
+        [sid], request.GET.get("frequency", Frequency.DAILY), max_points
+    )[sid]
+    if not rows:
+        Company.objects.get(pk=sid)  # Unknown stock IDs are still an error
+    if request.GET.get("format") == "columnar":
+        return JsonResponse(
+            _to_price_columns(rows, delta=request.GET.get("delta") == "1")
+        )
+    return JsonResponse({"data": [{"date": d, "price": p} for d, p in rows]})
+
+
+@query_budget(1)
+@rate_limit(rate=3)
+@gzip_page
+@require_GET
+@require_login
+def batch_historical_prices(request: HttpRequest) -> JsonResponse:
+    """Columnar price series of multiple stocks, see `historical_prices`."""
+    sids = [sid for sid in request.GET.get("sids", "").strip(",").split(",") if sid]
+    if not sids:
+        return JsonResponse({"message": "sids is required."}, status=400)
+    if len(sids) > MAX_BATCH_SIDS:
+        return JsonResponse(
+            {"message": f"At most {MAX_BATCH_SIDS} sids are allowed."}, status=400
+        )
+
+    try:
+        max_points = _parse_max_points(request)
+    except ValueError as e:
+        return JsonResponse({"message": str(e)}, status=400)
+
+    rows_by_sid = _load_price_rows(
+        sids, request.GET.get("frequency", Frequency.DAILY), max_points
+    )
+    delta = request.GET.get("delta") == "1"
+    return JsonResponse(
+        {
+            "data": {
+                sid: _to_price_columns(rows, delta=delta)
+                for sid, rows in rows_by_sid.items()
+            }
+        }
+    )
+
+
+def _parse_max_points(request: HttpRequest) -> int | None:
+    if (max_points := request.GET.get("max_points")) is None:
+        return None
+    if not max_points.isdigit() or int(max_points) < MIN_MAX_POINTS:
+        raise ValueError(f"max_points must be an integer >= {MIN_MAX_POINTS}.")
+    return int(max_points)
+
+
+def _load_price_rows(
+    sids: list[str], frequency: str, max_points: int | None
+) -> dict[str, list[tuple[date, float]]]:
+    """
+    Load the (date, price) series of `sids`. Downsampled series are cached until
+    the history table changes, so only cache misses hit the database.
+    """
+    history_version = get_history_version() if max_points is not None else None
+    rows_by_sid: dict[str, list[tuple[date, float]]] = {}
+    missed_sids = []
+    for sid in sids:
+        if max_points is not None and (
+            cached := DownsampledPriceSeriesCacheManager.get(
+                f"{history_version}:{sid}:{frequency}:{max_points}"
+            )
+        ):
+            rows_by_sid[sid] = list(zip(cached.dates, cached.prices, strict=True))
+        else:
+            rows_by_sid[sid] = []
+            missed_sids.append(sid)
+    if not missed_sids:
+        return rows_by_sid
+
+    for sid, date_, price in (
+        History.objects.filter(company_id__in=missed_sids, frequency=frequency)
+        .order_by("company_id", "date")
+        .values_list("company_id", "date", "close_price")
     ):
-        result["data"].append({"date": h.date, "price": h.close_price})
-    return JsonResponse(result)
+        rows_by_sid[sid].append((date_, price))
+
+    if max_points is not None:
+        for sid in missed_sids:
+            rows = downsample_price_rows(rows_by_sid[sid], max_points)
+            rows_by_sid[sid] = rows
+            DownsampledPriceSeriesCacheManager.set(
+                f"{history_version}:{sid}:{frequency}:{max_points}",
+                PriceSeries(dates=[d for d, _ in rows], prices=[p for _, p in rows]),
+                DOWNSAMPLED_SERIES_CACHE_TIMEOUT,
+            )
+    return rows_by_sid
+
 
+def _to_price_columns(rows: Iterable[tuple[date, float]], delta: bool) -> dict:
+    """
+    Days are counted since 1970-01-01. When delta-encoded, every element except the
+    first one is the difference from its predecessor, and prices are integers in
+    1/PRICE_SCALE units so that the differences stay exact.
+    """
+    rows = list(rows)
+    days = [d.toordinal() - EPOCH_ORDINAL for d, _ in rows]
+    prices = [p for _, p in rows]
+    if not delta:
+        return {"days": days, "prices": prices}
 
+    scaled_prices = [round(p * PRICE_SCALE) for p in prices]
+    return {
+        "days": days[:1] + [b - a for a, b in pairwise(days)],
+        "prices": scaled_prices[:1] + [b - a for a, b in pairwise(scaled_prices)],
+        "delta": True,
+        "price_scale": PRICE_SCALE,
+    }
+
+
+@query_budget(2)
 @rate_limit(rate=3)
 @require_GET
 @require_login
-def search(request: HttpRequest) -> JsonResponse:
+async def search(request: HttpRequest) -> JsonResponse:
     result = {"data": []}
     if keyword := request.GET.get("keyword"):
-        for info in StockInfo.objects.filter(
-            Q(company__pk__icontains=keyword) | Q(company__name__icontains=keyword)
-        ).select_related("company")[:30]:
+        if settings.MARKET_SEARCH_BACKEND == "postgres":
+            companies = [company async for company in search_companies(keyword)]
+        else:
+            index = (
+                CompanyPrefixIndex
+                if settings.MARKET_SEARCH_BACKEND == "trie"
+                else CompanySearchIndex
+            )
+            sids = (await index.aget_current()).search(keyword)
+            companies = sorted(
+                [
+                    company
+                    async for company in Company.objects.filter(
+                        pk__in=sids
+                    ).select_related("stock_info")
+                ],
+                key=lambda company: sids.index(company.pk),
+            )
+        for company in companies:
             result["data"].append(
                 {
-                    "sid": info.company.pk,
-                    "name": info.company.name,
-                    "quantity": info.quantity,
-                    "close": info.close_price,
-                    "fluct_price": info.fluct_price,
+                    "sid": company.pk,
+                    "name": company.name,
+                    "quantity": company.stock_info.quantity,
+                    "close": company.stock_info.close_price,
+                    "fluct_price": company.stock_info.fluct_price,
                 }
             )
     return JsonResponse(result)
 
 
+@query_budget(1)
+@rate_limit(rate=3)
+@require_GET
+@require_login
+def material_fact_search(request: HttpRequest) -> JsonResponse:
+    keyword = request.GET.get("keyword", "").strip()
+    if not keyword:
+        return JsonResponse({"message": "keyword is required."}, status=400)
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        return JsonResponse({"message": "page must be a positive integer."}, status=400)
+
+    # One more than a page to tell whether there is a next page
+    facts = search_material_facts(
+        keyword,
+        offset=(page - 1) * MATERIAL_FACT_SEARCH_PAGE_SIZE,
+        limit=MATERIAL_FACT_SEARCH_PAGE_SIZE + 1,
+    )
+    return JsonResponse(
+        {
+            "data": [
+                {
+                    "sid": fact.company.pk,
+                    "company_name": fact.company.name,
+                    "date_time": fact.date_time,
+                    "title": highlight(fact.title, keyword),
+                    "snippet": highlight(fact.description, keyword),
+                }
+                for fact in facts[:MATERIAL_FACT_SEARCH_PAGE_SIZE]
+            ],
+            "next_page": (
+                page + 1 if len(facts) > MATERIAL_FACT_SEARCH_PAGE_SIZE else None
+            ),
+        }
+    )
+
+
+async def _company_names_etag(request: HttpRequest) -> str:
+    # Names only change along with the company list version
+    return str(await aget_company_list_version())
+
+
+@query_budget(1)
 @rate_limit(rate=2)
 @require_GET
 @require_login
-def company_names(request: HttpRequest) -> JsonResponse:
+@etag(_company_names_etag)
+async def company_names(request: HttpRequest) -> JsonResponse:
     sids = [sid for sid in request.GET.get("sids", "").strip(",").split(",") if sid]
     result = dict.fromkeys(sids, None)
-    for company in Company.objects.filter(stock_id__in=sids):
+    async for company in Company.objects.filter(stock_id__in=sids):
         result[company.stock_id] = company.name
     return JsonResponse(result)
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
+    "django.contrib.postgres",
     # 3rd-party
     "corsheaders",
     # Local
@@ -49,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that the time of the other middleware is included
+    "main.core.middleware.request_metrics_middleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -68,16 +71,41 @@ DATABASES = {
         "PASSWORD": env.DB_PASSWORD,
         "HOST": env.DB_HOST,
         "PORT": env.DB_PORT,
+        # Connections are checked when they are taken from the pool
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # One pool per process. Requests borrow a connection from it instead
+            # of opening and closing their own.
+            "pool": {
+                "min_size": 2,
+                "max_size": 10,
+                "timeout": 10,  # To wait for a connection before giving up
+                "max_idle": 60 * 5,  # Before closing connections above min_size
+                "max_lifetime": 60 * 60,
+            },
+        },
     }
 }
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "BACKEND": "main.core.cache.TimedRedisCache",
         "LOCATION": f"redis://{env.REDIS_HOST}:{env.REDIS_PORT}",
     }
 }
 
+# "tokens": per-worker inverted index with CJK n-grams, word infixes and romanization,
+# "postgres": ranked trigram search, "trie": per-worker in-memory prefix trie
+MARKET_SEARCH_BACKEND = "tokens"
+
+# Only ever turned off to load test the API server
+RATE_LIMIT_ENABLED = True
+
+# Per-route request metrics in Redis, and a Server-Timing header for superusers
+REQUEST_METRICS_ENABLED = True
+# The fraction of requests to profile with cProfile
+REQUEST_PROFILE_SAMPLE_RATE = 0.0
+
 AUTHENTICATION_BACKENDS = [
     "main.account.backends.MyBackend",
     "django.contrib.auth.backends.ModelBackend",
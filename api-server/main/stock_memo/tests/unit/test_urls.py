@@ -11,6 +11,10 @@ class TestStockMemoUrls:
             ("/api/stock-memo/2330", views.update_or_create_stock_memo),
             ("/api/stock-memo/company-info/", views.list_company_info),
             ("/api/stock-memo/company-info", views.list_company_info),
+            (
+                "/api/stock-memo/company-info/2330/material-facts",
+                views.list_material_facts,
+            ),
         ]
 
         for url, expected_view in url_patterns:
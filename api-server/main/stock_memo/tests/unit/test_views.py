@@ -1,14 +1,22 @@
 import json
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
 from json import JSONDecodeError
 
 import pytest
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse
 from django.test import RequestFactory
+from pytest_django import DjangoAssertNumQueries
 
 from main.account.models import User
 from main.market.models import Company, MaterialFact
 from main.stock_memo.models import StockMemo
-from main.stock_memo.views import list_company_info, update_or_create_stock_memo
+from main.stock_memo.views import (
+    MATERIAL_FACTS_PAGE_SIZE,
+    list_company_info,
+    list_material_facts,
+    update_or_create_stock_memo,
+)
 
 
 @pytest.mark.django_db
@@ -87,6 +95,140 @@ class TestStockMemoViews:
         assert data[company.pk]["note"] == "TSMC memo"
         assert data[company.pk]["material_facts"][0]["title"] == "Material fact"
 
+    @pytest.fixture
+    def material_facts(self, company: Company) -> list[MaterialFact]:
+        start = datetime(2024, 1, 1, 10, tzinfo=UTC)
+        return MaterialFact.objects.bulk_create(
+            MaterialFact(
+                company=company,
+                date_time=start + timedelta(days=i),
+                title=f"Fact {i}",
+            )
+            for i in range(5)
+        )
+
+    def test_list_company_info_latest_material_facts_first(
+        self,
+        user: User,
+        company: Company,
+        material_facts: list[MaterialFact],
+        django_assert_num_queries: DjangoAssertNumQueries,
+    ) -> None:
+        other = Company.objects.create(stock_id="2317", name="鴻海")
+        request = RequestFactory().get(
+            "/", {"sids": f"{company.pk},{other.pk},{company.pk}", "limit": 2}
+        )
+        request.user = user  # type: ignore
+
+        with django_assert_num_queries(3):
+            response = list_company_info(request)
+        data = json.loads(response.content)
+
+        assert response.status_code == 200
+        assert [m["title"] for m in data[company.pk]["material_facts"]] == [
+            "Fact 4",
+            "Fact 3",
+        ]
+        assert data[company.pk]["material_facts_next_cursor"] is not None
+        assert data[other.pk]["material_facts"] == []
+        assert data[other.pk]["material_facts_next_cursor"] is None
+
+    def test_list_company_info_all_material_facts_by_default(
+        self, user: User, company: Company
+    ) -> None:
+        start = datetime(2024, 1, 1, 10, tzinfo=UTC)
+        MaterialFact.objects.bulk_create(
+            MaterialFact(company=company, date_time=start + timedelta(days=i))
+            for i in range(MATERIAL_FACTS_PAGE_SIZE + 5)
+        )
+        request = RequestFactory().get("/", {"sids": company.pk})
+        request.user = user  # type: ignore
+
+        data = json.loads(list_company_info(request).content)
+
+        facts = data[company.pk]["material_facts"]
+        assert len(facts) == MATERIAL_FACTS_PAGE_SIZE + 5
+        assert facts[0]["date_time"] > facts[-1]["date_time"]
+        assert data[company.pk]["material_facts_next_cursor"] is None
+
+    @pytest.mark.parametrize("limit", ["0", "abc"])
+    def test_list_company_info_invalid_limit(
+        self, user: User, company: Company, limit: str
+    ) -> None:
+        request = RequestFactory().get("/", {"sids": company.pk, "limit": limit})
+        request.user = user  # type: ignore
+
+        response = list_company_info(request)
+
+        assert response.status_code == 400
+
+    def test_list_company_info_within_query_budget(
+        self,
+        user: User,
+        company: Company,
+        material_facts: list[MaterialFact],
+        assert_view_query_budget: Callable[..., HttpResponse],
+    ) -> None:
+        others = [
+            Company.objects.create(stock_id=sid, name=name)
+            for sid, name in [("2317", "鴻海"), ("2454", "聯發科")]
+        ]
+        for c in [company, *others]:
+            StockMemo.objects.create(owner=user, company=c, note=f"{c.name} memo")
+            MaterialFact.objects.create(
+                company=c, date_time=datetime(2024, 2, 1, tzinfo=UTC), title="New"
+            )
+        sids = ",".join(c.pk for c in [company, *others])
+        request = RequestFactory().get("/", {"sids": sids})
+        request.user = user  # type: ignore
+
+        response = assert_view_query_budget(list_company_info, request)
+        data = json.loads(response.content)
+
+        assert response.status_code == 200
+        assert [data[c.pk]["note"] for c in others] == ["鴻海 memo", "聯發科 memo"]
+        assert len(data[company.pk]["material_facts"]) == 6
+
+    def test_list_material_facts_pages_through_cursor(
+        self, user: User, company: Company, material_facts: list[MaterialFact]
+    ) -> None:
+        titles, cursor = [], None
+        for _ in range(3):
+            params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+            request = RequestFactory().get("/", params)
+            request.user = user  # type: ignore
+
+            data = json.loads(list_material_facts(request, company.pk).content)
+            titles.extend(m["title"] for m in data["material_facts"])
+            if (cursor := data["next_cursor"]) is None:
+                break
+
+        assert titles == ["Fact 4", "Fact 3", "Fact 2", "Fact 1", "Fact 0"]
+        assert cursor is None
+
+    @pytest.mark.parametrize("params", [{"limit": "0"}, {"limit": "abc"}])
+    def test_list_material_facts_invalid_limit(
+        self, user: User, company: Company, params: dict[str, str]
+    ) -> None:
+        request = RequestFactory().get("/", params)
+        request.user = user  # type: ignore
+
+        response = list_material_facts(request, company.pk)
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("cursor", ["yesterday", "2024-01-01T10:00:00"])
+    def test_list_material_facts_invalid_cursor(
+        self, user: User, company: Company, cursor: str
+    ) -> None:
+        request = RequestFactory().get("/", {"cursor": cursor})
+        request.user = user  # type: ignore
+
+        response = list_material_facts(request, company.pk)
+
+        assert response.status_code == 400
+        assert json.loads(response.content)["message"] == "Invalid cursor."
+
     def test_list_company_info_requires_sids(self, user: User) -> None:
         request = RequestFactory().get("/")
         request.user = user  # type: ignore
@@ -4,5 +4,9 @@ from main.stock_memo import views
 
 urlpatterns = [
     re_path(r"^company-info[/]?$", views.list_company_info),
+    re_path(
+        r"^company-info/(?P<sid>\w+)/material-facts[/]?$",
+        views.list_material_facts,
+    ),
     re_path(r"^(?P<sid>\w+)[/]?$", views.update_or_create_stock_memo),
 ]
@@ -1,15 +1,26 @@
 import json
+from datetime import UTC, datetime
+from typing import Any
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpRequest, JsonResponse
+from django.http import HttpRequest
 from django.views.decorators.http import require_GET, require_POST
 
 from main.core.decorators.auth import require_login
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
-from main.market.models import Company
+from main.core.http import JsonResponse
+from main.market.models import Company, MaterialFact
 from main.stock_memo.models import StockMemo
 
+MATERIAL_FACTS_PAGE_SIZE = 10
+MAX_MATERIAL_FACTS_PAGE_SIZE = 100
+LIMIT_ERROR_MESSAGE = (
+    f"limit must be an integer in [1, {MAX_MATERIAL_FACTS_PAGE_SIZE}]."
+)
 
+
+@query_budget(3)
 @rate_limit(rate=1)
 @require_POST
 @require_login
@@ -34,39 +45,99 @@ def update_or_create_stock_memo(request: HttpRequest, sid: str) -> JsonResponse:
     )
 
 
+@query_budget(3)
 @rate_limit(rate=3)
 @require_GET
 @require_login
 def list_company_info(request: HttpRequest) -> JsonResponse:
-    sids = [sid for sid in request.GET.get("sids", "").strip(",").split(",") if sid]
+    """
+    Every material fact of each company, unless `limit` is given: then only the
+    latest `limit`, and older ones are paged through `list_material_facts`.
+    """
+    sids = list(
+        dict.fromkeys(
+            sid for sid in request.GET.get("sids", "").strip(",").split(",") if sid
+        )
+    )
     if not sids:
         return JsonResponse({"message": "sids is required."}, status=400)
+    limit = None
+    if "limit" in request.GET and (limit := _parse_limit(request)) is None:
+        return JsonResponse({"message": LIMIT_ERROR_MESSAGE}, status=400)
 
-    company_query_set = Company.objects.prefetch_related("material_facts").filter(
-        pk__in=sids
-    )
+    company_query_set = Company.objects.filter(pk__in=sids)
     memo_query_set = request.user.stock_memos.filter(company__pk__in=sids)  # type: ignore
     stock_id_memo_map = {
         memo.company.pk: memo.note for memo in memo_query_set.select_related("company")
     }
+    # One more than asked to tell whether there are older ones
+    sid_facts_map = MaterialFact.objects.latest_per_company(  # type: ignore
+        sids, limit + 1 if limit is not None else None
+    )
     result = {}
     for company in company_query_set:
+        facts, next_cursor = _paginate(sid_facts_map[company.pk], limit)
         result[company.pk] = {
             "sid": company.pk,
             "company_name": company.name,
             "business": company.business,
             "note": stock_id_memo_map.get(company.pk, ""),
-            "material_facts": sorted(
-                [
-                    {
-                        "date_time": m.date_time,
-                        "title": m.title,
-                        "description": m.description,
-                    }
-                    for m in company.material_facts.all()  # type: ignore
-                ],
-                key=lambda x: x["date_time"],
-                reverse=True,
-            ),
+            "material_facts": facts,
+            "material_facts_next_cursor": next_cursor,
         }
     return JsonResponse(result)
+
+
+@query_budget(1)
+@rate_limit(rate=3)
+@require_GET
+@require_login
+def list_material_facts(request: HttpRequest, sid: str) -> JsonResponse:
+    """
+    Older material facts of a company, page by page. `cursor` is the
+    `material_facts_next_cursor`/`next_cursor` of the previous page.
+    """
+    if (limit := _parse_limit(request)) is None:
+        return JsonResponse({"message": LIMIT_ERROR_MESSAGE}, status=400)
+    before = None
+    if cursor := request.GET.get("cursor"):
+        try:
+            before = datetime.fromisoformat(cursor)
+        except ValueError:
+            return JsonResponse({"message": "Invalid cursor."}, status=400)
+        if before.tzinfo is None:
+            return JsonResponse({"message": "Invalid cursor."}, status=400)
+
+    facts, next_cursor = _paginate(
+        MaterialFact.objects.latest_per_company([sid], limit + 1, before)[sid],  # type: ignore
+        limit,
+    )
+    return JsonResponse(
+        {"sid": sid, "material_facts": facts, "next_cursor": next_cursor}
+    )
+
+
+def _parse_limit(request: HttpRequest) -> int | None:
+    try:
+        limit = int(request.GET.get("limit", MATERIAL_FACTS_PAGE_SIZE))
+    except ValueError:
+        return None
+    return limit if 1 <= limit <= MAX_MATERIAL_FACTS_PAGE_SIZE else None
+
+
+def _paginate(
+    facts: list[MaterialFact], limit: int | None
+) -> tuple[list[dict[str, Any]], str | None]:
+    page = facts[:limit]
+    return (
+        [
+            {"date_time": m.date_time, "title": m.title, "description": m.description}
+            for m in page
+        ],
+        # In UTC so that the cursor has no "+" to be escaped in a query string
+        (
+            page[-1].date_time.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            if limit is not None and len(facts) > limit
+            else None
+        ),
+    )
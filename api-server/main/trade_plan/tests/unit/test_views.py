@@ -1,9 +1,10 @@
 import json
+from collections.abc import Callable
 from json import JSONDecodeError
 from typing import Any
 
 import pytest
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse
 from django.test import RequestFactory
 
 from main.account.models import User
@@ -109,6 +110,32 @@ class TestTradePlanViews:
         assert response.status_code == 200
         assert data["data"][0]["id"] == plan.id
 
+    def test_list_trade_plans_within_query_budget(
+        self,
+        user: User,
+        company: Company,
+        assert_view_query_budget: Callable[..., HttpResponse],
+    ) -> None:
+        other = Company.objects.create(stock_id="2317", name="鴻海", trade_type="tse")
+        for i in range(4):
+            TradePlan.objects.create(
+                owner=user,
+                company=company if i % 2 else other,
+                plan_type="buy",
+                target_price=500.0 + i,
+                target_quantity=1000,
+            )
+        request = RequestFactory().get("/")
+        request.user = user  # type: ignore
+
+        response = assert_view_query_budget(list_trade_plans, request)
+
+        assert response.status_code == 200
+        assert {p["company_name"] for p in json.loads(response.content)["data"]} == {
+            "台積電",
+            "鴻海",
+        }
+
     def test_update_trade_plan_success(
         self, user: User, company: Company, request_obj: HttpRequest
     ) -> None:
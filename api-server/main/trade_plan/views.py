@@ -1,15 +1,21 @@
 import json
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpRequest, JsonResponse
+from django.db.models import QuerySet
+from django.http import HttpRequest
 from django.views.decorators.http import require_GET, require_http_methods, require_POST
 
 from main.core.decorators.auth import require_login
+from main.core.decorators.conditional import etag
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse, aggregate_etag
+from main.market.cache import get_company_list_version
 from main.market.models import Company
 from main.trade_plan.models import TradePlan
 
 
+@query_budget(2)
 @require_http_methods(["GET", "POST"])
 def create_or_list_trade_plans(request: HttpRequest) -> JsonResponse:
     if request.method == "GET":
@@ -20,6 +26,7 @@ def create_or_list_trade_plans(request: HttpRequest) -> JsonResponse:
         return JsonResponse({"message": "Method Not Allowed"}, status=405)
 
 
+@query_budget(2)
 @rate_limit(rate=1)
 @require_POST
 @require_login
@@ -62,18 +69,18 @@ def create_trade_plan(request: HttpRequest) -> JsonResponse:
     )
 
 
+@query_budget(2)
 @rate_limit(rate=2)
 @require_GET
 @require_login
+@etag(
+    # Company names are part of the response
+    lambda request: aggregate_etag(
+        _filter_trade_plans(request), request.user.pk, get_company_list_version()
+    )
+)
 def list_trade_plans(request: HttpRequest) -> JsonResponse:
-    if sids := [
-        sid for sid in request.GET.get("sids", "").strip(",").split(",") if sid
-    ]:
-        query_set = request.user.trade_plans.filter(company__pk__in=sids)
-    else:
-        query_set = request.user.trade_plans.all()
-
-    query_set = query_set.select_related("company")
+    query_set = _filter_trade_plans(request).select_related("company")
     return JsonResponse(
         {
             "data": [
@@ -91,6 +98,15 @@ def list_trade_plans(request: HttpRequest) -> JsonResponse:
     )
 
 
+def _filter_trade_plans(request: HttpRequest) -> QuerySet[TradePlan]:
+    if sids := [
+        sid for sid in request.GET.get("sids", "").strip(",").split(",") if sid
+    ]:
+        return request.user.trade_plans.filter(company__pk__in=sids)
+    return request.user.trade_plans.all()
+
+
+@query_budget(3)
 @rate_limit(rate=1)
 @require_login
 @require_http_methods(["POST", "DELETE"])
@@ -1,11 +1,12 @@
 import json
+from collections.abc import Callable
 from datetime import date
 from unittest.mock import Mock, patch
 
 import pytest
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponseNotAllowed, JsonResponse
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
 from django.test import RequestFactory
 
 from main.account import OAuthOrganization
@@ -16,7 +17,7 @@ from main.market.models import Company
 from main.trade_record.models import TradeRecord
 from main.trade_record.views import _create as create
 from main.trade_record.views import _list as list_view
-from main.trade_record.views import update_or_delete
+from main.trade_record.views import create_or_list, update_or_delete
 
 
 @pytest.mark.django_db
@@ -105,6 +106,33 @@ class TestTradeRecordListView:
         }
         assert set(record.keys()) == expected_keys
 
+    def test_list_within_query_budget(
+        self,
+        request_factory: RequestFactory,
+        user: User,
+        companies: list[Company],
+        assert_view_query_budget: Callable[..., HttpResponse],
+    ) -> None:
+        for i in range(6):
+            TradeRecord.objects.create(
+                owner=user,
+                company=companies[i % 2],
+                deal_time=date(2023, 12, i + 1),
+                deal_price=100,
+                deal_quantity=1000,
+                handling_fee=50,
+            )
+        request = request_factory.get("/api/trade-records/")
+        request.user = user
+
+        response = assert_view_query_budget(create_or_list, request)
+
+        updates = json.loads(response.content)["updates"]
+        assert [record["company_name"] for record in updates] == [
+            "Company B",
+            "Company A",
+        ] * 3
+
     def test_list_incremental_records(
         self,
         request_factory: RequestFactory,
@@ -308,6 +336,31 @@ class TestTradeRecordCreateView:
         assert change_log.revision == 1
         assert change_log.operation == DataChangeLog.Operation.UPSERT
 
+    def test_create_within_query_budget(
+        self,
+        request_factory: RequestFactory,
+        user: User,
+        company: Company,
+        assert_view_query_budget: Callable[..., HttpResponse],
+    ) -> None:
+        payload = {
+            "deal_time": "2023-12-01",
+            "sid": "1234",
+            "deal_price": 100.5,
+            "deal_quantity": 1000,
+            "handling_fee": 50,
+        }
+        request = request_factory.post(
+            "/api/trade-records/",
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+        request.user = user
+
+        response = assert_view_query_budget(create_or_list, request)
+
+        assert response.status_code == 200
+
     def test_create_missing_deal_time(
         self, request_factory: RequestFactory, user: User
     ) -> None:
@@ -551,6 +604,35 @@ class TestTradeRecordUpdateOrDeleteView:
         assert change_log.revision == 1
         assert change_log.operation == DataChangeLog.Operation.DELETE
 
+    @pytest.mark.parametrize("method", ["post", "delete"])
+    def test_update_or_delete_within_query_budget(
+        self,
+        request_factory: RequestFactory,
+        user: User,
+        trade_record: TradeRecord,
+        method: str,
+        assert_view_query_budget: Callable[..., HttpResponse],
+    ) -> None:
+        payload = {
+            "deal_time": "2023-12-02",
+            "sid": "1111",
+            "deal_price": 200.0,
+            "deal_quantity": 2000,
+            "handling_fee": 100,
+        }
+        request = getattr(request_factory, method)(
+            f"/api/trade-records/{trade_record.pk}/",
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+        request.user = user
+
+        response = assert_view_query_budget(
+            update_or_delete, request, str(trade_record.pk)
+        )
+
+        assert response.status_code == 200
+
     def test_update_or_delete_invalid_method(
         self, request_factory: RequestFactory, user: User, trade_record: TradeRecord
     ) -> None:
@@ -3,13 +3,15 @@ from datetime import datetime
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.http import HttpRequest, JsonResponse
+from django.http import HttpRequest
 from django.views.decorators.http import require_http_methods
 
 from main.core.data_change import append_data_change_log
 from main.core.data_change import get_last_revision as get_data_change_last_revision
 from main.core.decorators.auth import require_login
+from main.core.decorators.query_budget import query_budget
 from main.core.decorators.rate_limit import rate_limit
+from main.core.http import JsonResponse
 from main.core.models import DataChangeLog
 from main.market.models import Company
 from main.trade_record.models import TradeRecord
@@ -17,6 +19,7 @@ from main.trade_record.models import TradeRecord
 TRADE_RECORD_SUBJECT = DataChangeLog.Subject.TRADE_RECORD
 
 
+@query_budget(5)
 @rate_limit(rate=2)
 @require_login
 @require_http_methods(["GET", "POST"])
@@ -133,6 +136,7 @@ def _create(request: HttpRequest) -> JsonResponse:
     return JsonResponse(_serialize_trade_record(record))
 
 
+@query_budget(6)
 @rate_limit(rate=1)
 @require_login
 @require_http_methods(["POST", "DELETE"])
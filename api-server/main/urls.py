@@ -9,4 +9,5 @@ urlpatterns = [
     re_path(r"^api/trade-records/?", include("main.trade_record.urls")),
     re_path(r"^api/cash-dividends/?", include("main.cash_dividend.urls")),
     re_path(r"^api/handling-fee/", include("main.handling_fee.urls")),
+    re_path(r"^api/admin/", include("main.core.urls")),
 ]
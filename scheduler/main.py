@@ -5,17 +5,20 @@ We don't use Cronjob.
 import logging
 import os
 import signal
-import subprocess
 import sys
 import threading
+from collections.abc import Callable
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, JobEvent
 from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from main.core.job_queue import enqueue_job, record_job_event
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -24,56 +27,31 @@ shutdown_event = threading.Event()
 
 
 ###################################### Define Jobs #####################################
+# Jobs are run by the `run_job_worker` processes of the api-server image, the
+# scheduler only enqueues them.
 
 
-def fetch_and_store_realtime_stock_info() -> None:
-    try:
-        subprocess.run(  # noqa: S603
-            ["python", "manage.py", "fetch_and_store_realtime_stock_info"],  # noqa: S607
-            check=True,
-        )
-    except Exception as e:
-        logger.error(f"Error in fetch_and_store_realtime_stock_info: {e}")
-
-
-def update_all_stocks_history() -> None:
-    try:
-        subprocess.run(  # noqa: S603
-            ["python", "manage.py", "update_all_stocks_history"],  # noqa: S607
-            check=True,
-        )
-    except Exception as e:
-        logger.error(f"Error in update_all_stocks_history: {e}")
-
-
-def update_company_list() -> None:
-    try:
-        subprocess.run(  # noqa: S603
-            ["python", "manage.py", "update_company_list"],  # noqa: S607
-            check=True,
-        )
-    except Exception as e:
-        logger.error(f"Error in update_company_list: {e}")
-
+def enqueue(name: str) -> Callable[[], None]:
+    def job() -> None:
+        try:
+            enqueue_job(name)
+        except Exception as e:
+            logger.error(f"Error in enqueuing {name}: {e}")
 
-def update_material_facts() -> None:
-    try:
-        subprocess.run(  # noqa: S603
-            ["python", "manage.py", "update_material_facts"],  # noqa: S607
-            check=True,
-        )
-    except Exception as e:
-        logger.error(f"Error in update_material_facts: {e}")
+    job.__name__ = name
+    return job
 
 
-def cleanup_data_change_logs() -> None:
+def count_dropped_runs(event: JobEvent) -> None:
+    if scheduler is None or (job := scheduler.get_job(event.job_id)) is None:
+        return
+    name = job.func.__name__
+    kind = "scheduler_missed" if event.code == EVENT_JOB_MISSED else "scheduler_overlap"
+    logger.warning(f"A run of {name} was dropped ({kind})")
     try:
-        subprocess.run(  # noqa: S603
-            ["python", "manage.py", "cleanup_data_change_logs"],  # noqa: S607
-            check=True,
-        )
+        record_job_event(name, kind)
     except Exception as e:
-        logger.error(f"Error in cleanup_data_change_logs: {e}")
+        logger.error(f"Error in recording {kind} of {name}: {e}")
 
 
 ########################################################################################
@@ -108,32 +86,46 @@ if __name__ == "__main__":
         timezone=ZoneInfo(timezone),
     )
 
+    scheduler.add_listener(
+        count_dropped_runs, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+    )
+
     # NOTE: In the day_of_week field, 0 = Monday, 6 = Sunday
     scheduler.add_job(
-        fetch_and_store_realtime_stock_info,
+        enqueue("fetch_and_store_realtime_stock_info"),
         CronTrigger.from_crontab("* 9-13 * * mon-fri"),
         name="fetch_realtime_stock_info",
     )
     scheduler.add_job(
-        update_all_stocks_history,
+        enqueue("update_all_stocks_history"),
         CronTrigger.from_crontab("0 15 * * mon-fri"),
         name="update_stock_history",
     )
     scheduler.add_job(
-        update_company_list,
+        enqueue("update_company_list"),
         CronTrigger.from_crontab("30 22 * * *"),
         name="update_company_list",
     )
     scheduler.add_job(
-        update_material_facts,
+        enqueue("enrich_companies"),
+        CronTrigger.from_crontab("*/10 * * * *"),
+        name="enrich_companies",
+    )
+    scheduler.add_job(
+        enqueue("update_material_facts"),
         CronTrigger.from_crontab("0 * * * *"),
         name="update_material_facts",
     )
     scheduler.add_job(
-        cleanup_data_change_logs,
+        enqueue("cleanup_data_change_logs"),
         CronTrigger.from_crontab("20 3 * * *"),
         name="cleanup_data_change_logs",
     )
+    scheduler.add_job(
+        enqueue("cleanup_job_runs"),
+        CronTrigger.from_crontab("40 3 * * *"),
+        name="cleanup_job_runs",
+    )
 
     try:
         scheduler.start()